@@ -45,7 +45,13 @@ except Exception:
 	# If anything fails here, fall back to the raw websocket app (no-origin validation)
 	pass
 
+# Answer MEDIA_URL before Django (range requests, 304s, zero-copy send when the server supports it)
+http_app = django_asgi_app
+if getattr(settings, 'SERVE_MEDIA', False):
+	from Product.media import MediaFilesApp
+	http_app = MediaFilesApp(django_asgi_app)
+
 application = ProtocolTypeRouter({
-	'http': django_asgi_app,
+	'http': http_app,
 	'websocket': websocket_app,
 })
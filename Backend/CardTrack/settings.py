@@ -10,9 +10,10 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 import os
-import ssl
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
+from django.core.exceptions import ImproperlyConfigured
 from urllib.parse import urlsplit
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -62,14 +63,17 @@ def _sanitize_origins(origins):
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = os.getenv(
-    'SECRET_KEY',
-    'django-insecure-xl1k&)^2#erz#wmslkqx=myya$bs-usj@&7farpuwanr%hya3('
-)
+_INSECURE_SECRET_KEY = 'django-insecure-xl1k&)^2#erz#wmslkqx=myya$bs-usj@&7farpuwanr%hya3('
+SECRET_KEY = os.getenv('SECRET_KEY', _INSECURE_SECRET_KEY)
 
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = os.getenv('DEBUG', 'True').lower() in ('1', 'true', 'yes', 'on')
 
+# SECRET_KEY signs the auth tokens (Product.tokens): with the key from the repo anyone
+# could sign a token for any user
+if not DEBUG and SECRET_KEY == _INSECURE_SECRET_KEY:
+    raise ImproperlyConfigured('SECRET_KEY must be set when DEBUG is off.')
+
 # Hosts
 _env_allowed_hosts = _get_list_from_env('ALLOWED_HOSTS')
 ALLOWED_HOSTS = _env_allowed_hosts if _env_allowed_hosts is not None else []
@@ -94,15 +98,53 @@ if USE_CHANNELS:
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'Product.authentication.FakeTokenAuthentication',
+        'Product.authentication.SignedTokenAuthentication',
         # 'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # Proxies in front of the app (Render: 1). Per-IP limits key on the client address they
+    # append to X-Forwarded-For; without this, a forged header would get a fresh bucket
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', '1')),
+    # Token buckets (Product.throttling): 'N/period' allows bursts of N at N per period
+    'DEFAULT_THROTTLE_CLASSES': [
+        'Product.throttling.AnonRateThrottle',
+        'Product.throttling.UserRateThrottle',
+        'Product.throttling.ActionRateThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'anon': '120/min',
+        'user': '1200/min',
+        'login': '10/min',
+        'register': '5/min',
+        'invite': '30/min',
+        'ws_connect': '60/min',
+        'ws_message': '30/min',
+    },
 }
 
+# Rate limits: off switch, and the cache holding REST buckets (share it across workers for
+# global limits; socket limits are per process)
+THROTTLE_ENABLED = os.getenv('THROTTLE_ENABLED', 'True').lower() in ('1', 'true', 'yes', 'on')
+THROTTLE_CACHE = os.getenv('THROTTLE_CACHE', 'default')
+
+# Max entries accepted by one bulk invite request (POST /api/boards/<id>/members/bulk/)
+INVITE_MAX_BATCH = int(os.getenv('INVITE_MAX_BATCH', '500'))
+
+# Signed auth tokens (Product.tokens): lifetime, and how long each process trusts a cached
+# token_version before re-reading it (revocations from other processes take up to this long
+# to apply unless CACHES is shared)
+AUTH_TOKEN_MAX_AGE = int(os.getenv('AUTH_TOKEN_MAX_AGE', str(7 * 24 * 3600)))
+AUTH_TOKEN_VERSION_CACHE_TTL = int(os.getenv('AUTH_TOKEN_VERSION_CACHE_TTL', '300'))
+
+# SimpleJWT's /api/token/ endpoints are not used by the frontend and importing the package
+# adds ~50 ms to every cold start; only mounted when enabled
+SIMPLEJWT_ENDPOINTS = os.getenv('SIMPLEJWT_ENDPOINTS', 'False').lower() in ('1', 'true', 'yes', 'on')
+
 MIDDLEWARE = [
+    # First so its timings cover the whole stack (see Product.middleware)
+    'Product.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -113,6 +155,14 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Dev/CI: check per-view query budgets and flag repeated SQL shapes (N+1) per request
+# (Product.querybudget); strict mode raises instead of logging
+QUERY_BUDGET_CHECKS = os.getenv('QUERY_BUDGET_CHECKS', 'False').lower() in ('1', 'true', 'yes', 'on')
+QUERY_BUDGET_STRICT = os.getenv('QUERY_BUDGET_STRICT', 'False').lower() in ('1', 'true', 'yes', 'on')
+N_PLUS_ONE_THRESHOLD = int(os.getenv('N_PLUS_ONE_THRESHOLD', '5'))
+if QUERY_BUDGET_CHECKS:
+    MIDDLEWARE.append('Product.middleware.QueryBudgetMiddleware')
+
 ROOT_URLCONF = 'CardTrack.urls'
 
 TEMPLATES = [
@@ -155,6 +205,10 @@ if USE_CHANNELS:
         }
 
 
+# Board events queued for the background sender (Product.realtime) before new ones are dropped
+REALTIME_QUEUE_SIZE = int(os.getenv('REALTIME_QUEUE_SIZE', '10000'))
+
+
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
@@ -165,16 +219,26 @@ DB_SSL_MODE = os.getenv('DB_SSL_MODE')  # e.g., REQUIRED, VERIFY_CA, VERIFY_IDEN
 DB_SSL_CA = os.getenv('DB_SSL_CA')  # path to CA file
 DB_SSL_CA_PEM = os.getenv('DB_SSL_CA_PEM')  # CA contents (PEM) if you prefer storing in env
 
-# If CA content is provided via env, write it to a temp file so MySQL client can use it
+# If CA content is provided via env, write it to a file so the MySQL client can use it.
+# Written only when missing or changed (cold starts stay read-only), next to the project
+# or in the temp dir when the deployment filesystem is read-only (serverless).
+def _write_ca_file(pem: str):
+    content = pem.replace('\\n', '\n')
+    for directory in (BASE_DIR, Path(tempfile.gettempdir())):
+        ca_path = directory / 'aiven-ca.pem'
+        try:
+            if ca_path.exists() and ca_path.read_text(encoding='utf-8') == content:
+                return str(ca_path)
+            ca_path.write_text(content, encoding='utf-8')
+            return str(ca_path)
+        except OSError:
+            continue
+    return None
+
+
 if (not DB_SSL_CA or (DB_SSL_CA and not os.path.exists(DB_SSL_CA))) and DB_SSL_CA_PEM:
-    try:
-        ca_path = BASE_DIR / 'aiven-ca.pem'
-        with open(ca_path, 'w', encoding='utf-8') as f:
-            f.write(DB_SSL_CA_PEM.replace('\\n', '\n'))
-        DB_SSL_CA = str(ca_path)
-    except Exception:
-        # If we can't write the file, we'll proceed without CA path
-        pass
+    # If we can't write the file, we'll proceed without CA path
+    DB_SSL_CA = _write_ca_file(DB_SSL_CA_PEM) or DB_SSL_CA
 
 _db_options = {}
 if DB_SSL_CA and os.path.exists(DB_SSL_CA):
@@ -242,6 +306,46 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Media files (user-uploaded)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Cache lifetime (seconds) for media that is not content-addressed (content-addressed files are immutable)
+MEDIA_CACHE_MAX_AGE = int(os.getenv('MEDIA_CACHE_MAX_AGE', '3600'))
+# Serve MEDIA_URL from the app itself (Product.media: ranges, ETag/304, zero-copy under ASGI); defaults to DEBUG
+SERVE_MEDIA = os.getenv('SERVE_MEDIA', str(DEBUG)).lower() in ('1', 'true', 'yes', 'on')
+# Let the front server send the bytes: nginx internal location prefix (X-Accel-Redirect),
+# or the header name understood by Apache/lighttpd (e.g. X-Sendfile)
+MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv('MEDIA_ACCEL_REDIRECT_PREFIX') or None
+MEDIA_SENDFILE_HEADER = os.getenv('MEDIA_SENDFILE_HEADER') or None
+
+# Browser/CDN cache lifetime (seconds) for the public carousel list
+CAROUSEL_CACHE_MAX_AGE = int(os.getenv('CAROUSEL_CACHE_MAX_AGE', '3600'))
+
+# In-process background tasks (Product.tasks): worker threads, or run inline when eager
+TASK_WORKERS = int(os.getenv('TASK_WORKERS', '2'))
+TASKS_EAGER = os.getenv('TASKS_EAGER', 'False').lower() in ('1', 'true', 'yes', 'on')
+
+# Boards with at least this many cards are soft-deleted and purged in the background (0 disables)
+BOARD_ASYNC_DELETE_THRESHOLD = int(os.getenv('BOARD_ASYNC_DELETE_THRESHOLD', '5000'))
+
+# Per-user cache lifetime (seconds) for the "cards due soon" feed (0 disables)
+DUE_FEED_CACHE_TTL = int(os.getenv('DUE_FEED_CACHE_TTL', '30'))
+
+# Per-board cache lifetime (seconds) for /stats/ (0 disables). Writes clear it only in the
+# worker that made them, so keep it short unless CACHES is shared
+BOARD_STATS_CACHE_TTL = int(os.getenv('BOARD_STATS_CACHE_TTL', '30'))
+
+# Request instrumentation (Product.middleware / Product.metrics): Server-Timing header on
+# responses, and the bearer token required by /api/metrics/ (without one the endpoint is
+# only served when DEBUG is on)
+SERVER_TIMING_HEADER = os.getenv('SERVER_TIMING_HEADER', 'True').lower() in ('1', 'true', 'yes', 'on')
+METRICS_TOKEN = os.getenv('METRICS_TOKEN') or None
+
+# Slow query log (Product.slowqueries): queries over SLOW_QUERY_MS are logged and stored with
+# their EXPLAIN plan (admin: Slow Queries). 0 disables it. In production only a sample of
+# the slow queries is recorded and each shape is explained at most once per interval.
+SLOW_QUERY_MS = int(os.getenv('SLOW_QUERY_MS', '500'))
+SLOW_QUERY_SAMPLE_RATE = float(os.getenv('SLOW_QUERY_SAMPLE_RATE', '1.0' if DEBUG else '0.1'))
+SLOW_QUERY_EXPLAIN_INTERVAL = int(os.getenv('SLOW_QUERY_EXPLAIN_INTERVAL', '300'))
+# Query parameters (emails, password hashes...) are redacted from the log unless enabled
+SLOW_QUERY_LOG_PARAMS = os.getenv('SLOW_QUERY_LOG_PARAMS', 'False').lower() in ('1', 'true', 'yes', 'on')
 
 # CORS configuration (env-driven with safe defaults for dev)
 _env_cors_origins = _get_list_from_env('CORS_ALLOWED_ORIGINS')
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import User, Board, Column, Card, CarouselImage, Release, BoardMembership
+from .models import User, Board, Column, Card, CarouselImage, Release, BoardMembership, SlowQuery
 
 
 @admin.register(User)
@@ -10,9 +10,12 @@ class UserAdmin(admin.ModelAdmin):
 
 @admin.register(Board)
 class BoardAdmin(admin.ModelAdmin):
-	list_display = ("id", "title", "user", "created_at")
+	list_display = ("id", "title", "user", "created_at", "deleted_at")
 	search_fields = ("title",)
-	list_filter = ("created_at",)
+	list_filter = ("created_at", "deleted_at")
+	# __str__ of related rows reads further relations; load them with the changelist query
+	list_select_related = ("user",)
+	raw_id_fields = ("user",)
 
 
 @admin.register(BoardMembership)
@@ -20,6 +23,8 @@ class BoardMembershipAdmin(admin.ModelAdmin):
 	list_display = ("id", "board", "user", "role", "invited_at")
 	list_filter = ("role", "invited_at")
 	search_fields = ("board__title", "user__email")
+	list_select_related = ("board__user", "user")
+	raw_id_fields = ("board", "user")
 
 
 @admin.register(Column)
@@ -27,6 +32,8 @@ class ColumnAdmin(admin.ModelAdmin):
 	list_display = ("id", "title", "board", "position", "created_at")
 	list_filter = ("created_at",)
 	search_fields = ("title", "board__title")
+	list_select_related = ("board__user",)
+	raw_id_fields = ("board",)
 
 
 @admin.register(Card)
@@ -34,6 +41,8 @@ class CardAdmin(admin.ModelAdmin):
 	list_display = ("id", "title", "column", "position", "priority", "is_completed", "created_at")
 	list_filter = ("priority", "is_completed", "created_at")
 	search_fields = ("title", "column__title")
+	list_select_related = ("column__board",)
+	raw_id_fields = ("column",)
 
 
 @admin.register(CarouselImage)
@@ -48,3 +57,31 @@ class ReleaseAdmin(admin.ModelAdmin):
 	list_display = ("id", "release_title", "release_date")
 	search_fields = ("release_title",)
 	list_filter = ("release_date",)
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+	"""Worst query shapes first (total time); filled by Product.slowqueries."""
+	list_display = ("short_shape", "count", "avg", "max_ms", "total_ms", "view", "last_seen")
+	list_filter = ("view", "last_seen")
+	search_fields = ("shape", "view")
+	ordering = ("-total_ms",)
+	readonly_fields = (
+		"shape", "count", "total_ms", "max_ms", "last_ms", "view", "sql", "params", "explain", "stack",
+		"first_seen", "last_seen",
+	)
+	exclude = ("shape_hash",)
+
+	@admin.display(description="Query shape", ordering="shape")
+	def short_shape(self, obj):
+		return obj.shape[:120]
+
+	@admin.display(description="Avg ms")
+	def avg(self, obj):
+		return round(obj.avg_ms, 1)
+
+	def has_add_permission(self, request):
+		return False
+
+	def has_change_permission(self, request, obj=None):
+		return False
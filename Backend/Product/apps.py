@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ProductConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Product'
+
+    def ready(self):
+        from . import slowqueries
+        slowqueries.install()
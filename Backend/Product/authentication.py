@@ -1,40 +1,36 @@
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 
-from .models import User
+from . import tokens
 
 
-class FakeTokenAuthentication(BaseAuthentication):
+class SignedTokenAuthentication(BaseAuthentication):
     """
-    Autenticación basada en header Authorization: "Token fake-token-{email}"
-    Si el token es válido, asigna el usuario correspondiente a request.user.
+    Autenticación con token firmado (ver Product.tokens) en el header
+    Authorization: "Token <token>" o "Bearer <token>".
+    La firma y la versión del token se verifican sin consultar la base de datos
+    (la versión sale de caché); request.user carga el resto de su fila al usarse.
     """
 
-    keyword = 'Token'
-    prefix = 'fake-token-'
+    keywords = ('Token', 'Bearer')
 
     def authenticate(self, request):
         auth_header = request.headers.get('Authorization')
         if not auth_header:
-
             return None
 
         parts = auth_header.split()
-        if len(parts) != 2 or parts[0] != self.keyword:
+        if not parts or parts[0] not in self.keywords:
             return None
-
-        token = parts[1].strip()
-        if not token.startswith(self.prefix):
-            raise AuthenticationFailed('Invalid token format.')
-
-        email = token[len(self.prefix):]
-        if not email:
-            raise AuthenticationFailed('Invalid token.')
+        if len(parts) != 2:
+            raise AuthenticationFailed('Invalid token header.')
 
         try:
-            user = User.objects.get(email=email)
-        except User.DoesNotExist:
-            raise AuthenticationFailed('User not found.')
-
-
+            user = tokens.user_from_token(parts[1])
+        except tokens.InvalidToken as exc:
+            raise AuthenticationFailed(str(exc))
         return (user, None)
+
+    def authenticate_header(self, request):
+        # Makes DRF answer 401 (with WWW-Authenticate) instead of 403 to anonymous requests
+        return self.keywords[0]
@@ -0,0 +1,347 @@
+"""Synthetic data and in-process load benchmarks.
+
+``seed(...)`` fills the database with users, boards, columns, cards and
+memberships at a chosen scale. It uses ``bulk_create`` (no signals, so no socket
+events or search indexing). The data is reproducible for a given ``seed``.
+
+``run_http(...)`` replays a weighted request mix against the DRF app through the
+Django test client. The mix is ``DEFAULT_MIX`` or a JSONL file with one entry per
+line::
+
+    {"name": "card.patch", "method": "PATCH", "path": "/api/boards/{board}/columns/{column}/cards/{card}/",
+     "body": {"title": "t{n}"}, "weight": 10}
+
+Placeholders are filled from the benchmark user's own data. ``{n}`` is a counter
+that keeps created emails and titles unique. ``run_ws(...)`` connects socket
+clients to a board, triggers card updates over HTTP and measures how long each
+event takes to reach every client (needs Channels).
+
+Both return per-endpoint p50/p95/p99 latency (ms) and queries per request.
+Everything runs in this process against the configured database (SQLite or a
+local MySQL). Management commands: ``seed_synthetic_data`` and ``run_benchmark``.
+"""
+import asyncio
+import json
+import random
+import re
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from .models import Board, BoardMembership, Card, Column, User
+from .querybudget import QueryRecorder
+from .tokens import issue_token
+
+
+DEFAULT_PASSWORD = 'benchmark-pass'
+PRIORITIES = ('low', 'medium', 'high')
+
+DEFAULT_MIX = [
+    {'name': 'users.me', 'method': 'GET', 'path': '/api/users/me/', 'weight': 10},
+    {'name': 'boards.list', 'method': 'GET', 'path': '/api/boards/', 'weight': 15},
+    {'name': 'boards.retrieve', 'method': 'GET', 'path': '/api/boards/{board}/', 'weight': 20},
+    {'name': 'boards.stats', 'method': 'GET', 'path': '/api/boards/{board}/stats/', 'weight': 5},
+    {'name': 'members.list', 'method': 'GET', 'path': '/api/boards/{board}/members/', 'weight': 3},
+    {'name': 'columns.list', 'method': 'GET', 'path': '/api/boards/{board}/columns/', 'weight': 5},
+    {'name': 'cards.list', 'method': 'GET', 'path': '/api/boards/{board}/columns/{column}/cards/', 'weight': 10},
+    {'name': 'cards.create', 'method': 'POST', 'path': '/api/boards/{board}/columns/{column}/cards/',
+     'body': {'title': 'Benchmark card {n}'}, 'weight': 5},
+    {'name': 'cards.patch', 'method': 'PATCH', 'path': '/api/boards/{board}/columns/{column}/cards/{card}/',
+     'body': {'title': 'Edited {n}'}, 'weight': 12},
+    {'name': 'cards.due', 'method': 'GET', 'path': '/api/cards/due/?days=30', 'weight': 5},
+    {'name': 'search', 'method': 'GET', 'path': '/api/search/?q=task', 'weight': 5},
+    {'name': 'releases.list', 'method': 'GET', 'path': '/api/releases/', 'weight': 2},
+]
+
+
+# ---- synthetic data -----------------------------------------------------------
+
+def seed(users=50, boards=5, columns=4, cards=25, members=3, prefix='bench', seed=0,
+         password=DEFAULT_PASSWORD, batch_size=1000) -> dict:
+    """Create ``users`` users with ``boards`` boards each, ``columns`` columns per board
+    and ``cards`` cards per column. Each board also gets ``members`` memberships taken
+    from the other synthetic users.
+
+    Emails are ``<prefix><i>@example.com``. Returns the number of rows created per model.
+    """
+    rng = random.Random(seed)
+    password_hash = make_password(password)
+    today = timezone.localdate()
+
+    with transaction.atomic():
+        User.objects.bulk_create(
+            [User(name=f'{prefix.title()} User {i}', email=f'{prefix}{i}@example.com', password_hash=password_hash)
+             for i in range(users)],
+            batch_size=batch_size,
+        )
+        # Re-read ids: MySQL does not return primary keys from bulk_create
+        user_ids = list(User.objects.filter(email__in=[f'{prefix}{i}@example.com' for i in range(users)])
+                        .order_by('id').values_list('id', flat=True))
+
+        Board.objects.bulk_create(
+            [Board(user_id=user_id, title=f'Board {b + 1}', description=f'Synthetic board {b + 1}')
+             for user_id in user_ids for b in range(boards)],
+            batch_size=batch_size,
+        )
+        board_owners = list(Board.objects.filter(user_id__in=user_ids).order_by('id').values_list('id', 'user_id'))
+
+        memberships = []
+        for board_id, owner_id in board_owners:
+            memberships.append(BoardMembership(board_id=board_id, user_id=owner_id, role=BoardMembership.ROLE_OWNER))
+            others = [u for u in user_ids if u != owner_id]
+            for user_id in rng.sample(others, min(members, len(others))):
+                role = rng.choice((BoardMembership.ROLE_EDITOR, BoardMembership.ROLE_VIEWER))
+                memberships.append(BoardMembership(board_id=board_id, user_id=user_id, role=role))
+        BoardMembership.objects.bulk_create(memberships, batch_size=batch_size, ignore_conflicts=True)
+
+        board_ids = [board_id for board_id, _ in board_owners]
+        Column.objects.bulk_create(
+            [Column(board_id=board_id, title=f'Column {c + 1}', position=c)
+             for board_id in board_ids for c in range(columns)],
+            batch_size=batch_size,
+        )
+        column_ids = list(Column.objects.filter(board_id__in=board_ids).order_by('id').values_list('id', flat=True))
+
+        card_rows = []
+        for column_id in column_ids:
+            for k in range(cards):
+                due = today + timedelta(days=rng.randint(-30, 60)) if rng.random() < 0.6 else None
+                card_rows.append(Card(
+                    column_id=column_id,
+                    title=f'Task {k + 1} {rng.choice(("design", "review", "deploy", "fix", "test"))}',
+                    description=f'Synthetic card {k + 1}',
+                    position=k,
+                    due_date=due,
+                    is_completed=rng.random() < 0.2,
+                    priority=rng.choice(PRIORITIES),
+                ))
+        Card.objects.bulk_create(card_rows, batch_size=batch_size)
+
+    return {
+        'users': len(user_ids),
+        'boards': len(board_ids),
+        'memberships': len(memberships),
+        'columns': len(column_ids),
+        'cards': len(card_rows),
+    }
+
+
+def delete_seeded(prefix='bench') -> int:
+    """Delete the synthetic users of ``prefix`` (boards and the rest cascade)."""
+    deleted, _ = User.objects.filter(email__regex=rf'^{re.escape(prefix)}[0-9]+@example\.com$').delete()
+    return deleted
+
+
+# ---- reporting ------------------------------------------------------------------
+
+def percentile(values, p):
+    """Nearest-rank percentile of ``values`` (0 < p <= 100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(samples) -> dict:
+    """``samples``: name -> list of (seconds, queries, status). Latencies in ms."""
+    report = {}
+    for name, rows in sorted(samples.items()):
+        latencies = [row[0] * 1000 for row in rows]
+        queries = [row[1] for row in rows]
+        report[name] = {
+            'requests': len(rows),
+            'errors': sum(1 for row in rows if row[2] >= 400),
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+            'mean': sum(latencies) / len(latencies),
+            'queries': sum(queries) / len(queries),
+            'max_queries': max(queries),
+        }
+    return report
+
+
+def format_report(report) -> str:
+    header = f"{'endpoint':<22}{'reqs':>6}{'errs':>6}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}"
+    lines = [header, '-' * len(header)]
+    for name, row in report.items():
+        queries = '' if row['queries'] is None else f"{row['queries']:.1f}"
+        lines.append(
+            f"{name:<22}{row['requests']:>6}{row['errors']:>6}"
+            f"{row['p50']:>9.2f}{row['p95']:>9.2f}{row['p99']:>9.2f}{queries:>9}"
+        )
+    return '\n'.join(lines)
+
+
+# ---- HTTP -------------------------------------------------------------------------
+
+def load_mix(path) -> list:
+    """Read a JSONL request mix (blank lines and ``#`` comments ignored)."""
+    mix = []
+    with open(path, encoding='utf-8') as fh:
+        for line in fh:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            entry = json.loads(line)
+            entry.setdefault('name', f"{entry['method'].upper()} {entry['path']}")
+            entry.setdefault('weight', 1)
+            mix.append(entry)
+    return mix
+
+
+def auth_headers(user) -> dict:
+    return {'HTTP_AUTHORIZATION': f'Token {issue_token(user)}'}
+
+
+def default_host() -> str:
+    for host in settings.ALLOWED_HOSTS:
+        if host and host[0] not in '.*':
+            return host
+    return 'localhost'
+
+
+class Targets:
+    """Boards, columns and cards of the benchmark user, for filling placeholders."""
+
+    def __init__(self, user, rng):
+        self.user = user
+        self.rng = rng
+        self.counter = 0
+        self.cards = defaultdict(list)
+        self.columns = defaultdict(list)
+        for column_id, board_id in Column.objects.filter(board__user=user, board__deleted_at__isnull=True).values_list('id', 'board_id'):
+            self.columns[board_id].append(column_id)
+        for card_id, column_id in Card.objects.filter(column__board__user=user).values_list('id', 'column_id'):
+            self.cards[column_id].append(card_id)
+        self.boards = sorted(board_id for board_id, columns in self.columns.items() if columns)
+        if not self.boards:
+            raise ValueError(f'{user.email} has no boards with columns to benchmark')
+
+    def pick(self) -> dict:
+        """Placeholder values for one request; board, column and card belong together."""
+        self.counter += 1
+        board = self.rng.choice(self.boards)
+        column = self.rng.choice(self.columns[board])
+        card = self.rng.choice(self.cards[column]) if self.cards[column] else 0
+        return {'user': self.user.id, 'board': board, 'column': column, 'card': card, 'n': self.counter}
+
+    def request(self, entry):
+        values = self.pick()
+        return _fill(entry['path'], values), _fill(entry.get('body'), values)
+
+
+def _fill(value, values):
+    if isinstance(value, dict):
+        return {key: _fill(item, values) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_fill(item, values) for item in value]
+    if isinstance(value, str):
+        return value.format(**values)
+    return value
+
+
+def _send(client, method, path, body, headers):
+    recorder = QueryRecorder()
+    start = time.perf_counter()
+    with connection.execute_wrapper(recorder):
+        if method.upper() == 'GET':
+            response = client.get(path, body, **headers)
+        else:
+            response = getattr(client, method.lower())(path, body, format='json', **headers)
+        if response.streaming:
+            b''.join(response.streaming_content)
+    return time.perf_counter() - start, recorder.count, response.status_code
+
+
+def run_http(user, mix=None, requests=500, warmup=50, seed=0, host=None) -> dict:
+    """Replay ``requests`` weighted picks from ``mix`` as ``user``; returns ``summarize`` output."""
+    from rest_framework.test import APIClient
+
+    mix = mix or DEFAULT_MIX
+    rng = random.Random(seed)
+    targets = Targets(user, rng)
+    client = APIClient(HTTP_HOST=host or default_host())
+    headers = auth_headers(user)
+    weights = [entry.get('weight', 1) for entry in mix]
+
+    samples = defaultdict(list)
+    # one synthetic user replays the whole load: rate limits would only measure 429s
+    with override_settings(THROTTLE_ENABLED=False):
+        for i in range(warmup + requests):
+            entry = rng.choices(mix, weights)[0]
+            path, body = targets.request(entry)
+            result = _send(client, entry['method'], path, body, headers)
+            if i >= warmup:
+                samples[entry['name']].append(result)
+    return summarize(samples)
+
+
+# ---- WebSocket --------------------------------------------------------------------
+
+async def _ws_fanout(user, clients, events, host, timeout):
+    from channels.db import database_sync_to_async
+    from channels.routing import URLRouter
+    from channels.testing import WebsocketCommunicator
+    from rest_framework.test import APIClient
+
+    from .routing import websocket_urlpatterns
+    from .ws_auth import TokenAuthMiddleware
+
+    app = TokenAuthMiddleware(URLRouter(websocket_urlpatterns))
+    targets = await database_sync_to_async(Targets)(user, random.Random(0))
+    board = targets.boards[0]
+    column = targets.columns[board][0]
+    card = (targets.cards[column] or [None])[0]
+    if card is None:
+        raise ValueError(f'board {board} has no cards to update')
+    token = issue_token(user)
+
+    samples = defaultdict(list)
+    sockets = []
+    try:
+        for _ in range(clients):
+            communicator = WebsocketCommunicator(app, f'/ws/boards/{board}/?token={token}')
+            start = time.perf_counter()
+            connected, _ = await communicator.connect(timeout)
+            samples['ws.connect'].append((time.perf_counter() - start, 0, 200 if connected else 403))
+            if connected:
+                sockets.append(communicator)
+        if not sockets:
+            raise ValueError('no WebSocket client could connect')
+
+        client = APIClient(HTTP_HOST=host or default_host())
+        headers = auth_headers(user)
+        path = f'/api/boards/{board}/columns/{column}/cards/{card}/'
+        for n in range(events):
+            start = time.perf_counter()
+            await database_sync_to_async(client.patch)(path, {'title': f'Fan-out {n}'}, format='json', **headers)
+            for communicator in sockets:
+                try:
+                    await communicator.receive_output(timeout)
+                    samples['ws.fanout'].append((time.perf_counter() - start, 0, 200))
+                except asyncio.TimeoutError:
+                    samples['ws.fanout'].append((timeout, 0, 504))
+    finally:
+        for communicator in sockets:
+            await communicator.disconnect()
+    return samples
+
+
+def run_ws(user, clients=10, events=20, host=None, timeout=2) -> dict:
+    """Connect ``clients`` sockets to the user's first board and time ``events`` card updates end to end."""
+    if not getattr(settings, 'CHANNEL_LAYERS', None):
+        raise ValueError('CHANNEL_LAYERS is not configured (set USE_CHANNELS=1)')
+    with override_settings(THROTTLE_ENABLED=False):
+        samples = asyncio.run(_ws_fanout(user, clients, events, host, timeout))
+    report = summarize(samples)
+    for row in report.values():
+        row['queries'] = None
+    return report
@@ -0,0 +1,144 @@
+"""Board templates and server-side board duplication.
+
+Columns are inserted with one ``bulk_create`` and cards are copied with a single
+``INSERT ... SELECT`` so cloning a board costs a handful of queries regardless of
+its size. Everything runs in one transaction with per-row socket events
+suppressed; one ``board.reloaded`` event is sent for the new board.
+"""
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import events, search, stats
+from .models import Board, Column, Card, broadcast_to_board
+
+
+# key -> {'title', 'description', 'columns': [{'title', 'color', 'cards': [title, ...]}]}
+BOARD_TEMPLATES = {}
+
+# Card fields copied verbatim when duplicating (column_id and created_at are rewritten)
+CARD_COPY_FIELDS = ('title', 'description', 'position', 'due_date', 'is_completed', 'priority')
+
+
+def register_template(key: str, title: str, columns, description: str = ''):
+    """Add (or replace) a board template.
+
+    ``columns`` is a list of dicts with 'title' and optional 'color' and 'cards'
+    (a list of card titles).
+    """
+    BOARD_TEMPLATES[key] = {
+        'title': title,
+        'description': description,
+        'columns': [dict(c) for c in columns],
+    }
+
+
+def list_templates():
+    return [
+        {'key': key, 'title': tpl['title'], 'description': tpl['description'],
+         'columns': [c['title'] for c in tpl['columns']]}
+        for key, tpl in BOARD_TEMPLATES.items()
+    ]
+
+
+register_template('kanban', 'Kanban', [
+    {'title': 'Por hacer', 'color': '#007ACF'},
+    {'title': 'En progreso', 'color': '#F5A623'},
+    {'title': 'Hecho', 'color': '#2EA44F'},
+], description='Flujo básico de tres columnas.')
+
+register_template('scrum', 'Scrum', [
+    {'title': 'Backlog', 'color': '#6E7781'},
+    {'title': 'Sprint', 'color': '#007ACF'},
+    {'title': 'En progreso', 'color': '#F5A623'},
+    {'title': 'En revisión', 'color': '#8250DF'},
+    {'title': 'Hecho', 'color': '#2EA44F'},
+], description='Backlog, sprint y revisión.')
+
+register_template('bugs', 'Seguimiento de bugs', [
+    {'title': 'Reportados', 'color': '#CF222E', 'cards': ['Plantilla: pasos para reproducir']},
+    {'title': 'Confirmados', 'color': '#F5A623'},
+    {'title': 'Corregidos', 'color': '#2EA44F'},
+], description='Triaje de errores.')
+
+
+def _create_columns(board: Board, specs):
+    """bulk_create columns and return their new ids in spec order.
+
+    Ids are read back ordered by pk because MySQL's bulk_create does not set them.
+    """
+    Column.objects.bulk_create([
+        Column(board=board, title=s['title'][:100], position=s.get('position', i), color=s.get('color') or '#007ACF')
+        for i, s in enumerate(specs)
+    ])
+    return list(Column.objects.filter(board=board).order_by('id').values_list('id', flat=True))
+
+
+def _copy_cards(column_map: dict) -> int:
+    """Copy every card of the source columns into their mapped columns with one INSERT ... SELECT."""
+    if not column_map:
+        return 0
+    qn = connection.ops.quote_name
+    table = qn(Card._meta.db_table)
+    column_col = qn(Card._meta.get_field('column').column)
+    copy_cols = ', '.join(qn(Card._meta.get_field(f).column) for f in CARD_COPY_FIELDS)
+    created_col = qn(Card._meta.get_field('created_at').column)
+
+    case = ' '.join('WHEN %s THEN %s' for _ in column_map)
+    placeholders = ', '.join('%s' for _ in column_map)
+    sql = (
+        f"INSERT INTO {table} ({column_col}, {copy_cols}, {created_col}) "
+        f"SELECT CASE {column_col} {case} END, {copy_cols}, %s "
+        f"FROM {table} WHERE {column_col} IN ({placeholders}) ORDER BY {qn('id')}"
+    )
+    params = [v for pair in column_map.items() for v in pair]
+    params.append(connection.ops.adapt_datetimefield_value(timezone.now()))
+    params.extend(column_map.keys())
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def duplicate_board(board: Board, user, title: str = None, include_cards: bool = True):
+    """Clone ``board`` (columns and, optionally, cards) into a new board owned by ``user``.
+
+    Returns ``(new_board, counts)``.
+    """
+    with events.suppress_board_events(), transaction.atomic():
+        new_board = Board.objects.create(
+            user=user,
+            title=(title or f"{board.title} (copia)")[:100],
+            description=board.description,
+        )
+        source = list(
+            Column.objects.filter(board=board).order_by('id').values('id', 'title', 'position', 'color')
+        )
+        new_ids = _create_columns(new_board, source)
+        column_map = {src['id']: new_id for src, new_id in zip(source, new_ids)}
+        cards = _copy_cards(column_map) if include_cards else 0
+
+    search.reindex_board(new_board.id)
+    stats.invalidate_board_stats(new_board.id)
+    broadcast_to_board(new_board.id, events.build_event('board.reloaded', {'id': new_board.id}))
+    return new_board, {'columns': len(new_ids), 'cards': cards}
+
+
+def create_from_template(key: str, user, title: str = None):
+    """Create a board for ``user`` from a registered template. Raises KeyError for unknown keys."""
+    template = BOARD_TEMPLATES[key]
+    with events.suppress_board_events(), transaction.atomic():
+        board = Board.objects.create(
+            user=user,
+            title=(title or template['title'])[:100],
+            description=template['description'] or None,
+        )
+        column_ids = _create_columns(board, template['columns'])
+        Card.objects.bulk_create([
+            Card(column_id=column_id, title=card_title[:100], position=pos)
+            for spec, column_id in zip(template['columns'], column_ids)
+            for pos, card_title in enumerate(spec.get('cards') or [])
+        ])
+
+    search.reindex_board(board.id)
+    stats.invalidate_board_stats(board.id)
+    broadcast_to_board(board.id, events.build_event('board.reloaded', {'id': board.id}))
+    return board
@@ -0,0 +1,139 @@
+"""Cached carousel manifest for the public homepage.
+
+The list served by ``CarouselImageViewSet.list`` (DB rows, or files under
+MEDIA_ROOT/carousel when the table is empty) is rendered to JSON once and reused
+until the ``CarouselImage`` table or the carousel directory changes:
+
+- table changes bump a version stored in the Django cache (see the CarouselImage
+  signal handlers in models.py); with a shared cache this invalidates every worker
+- directory changes are detected through its mtime (one ``stat`` per request)
+
+Entries are also rebuilt after ``MANIFEST_MAX_AGE`` seconds as a safety net for
+per-process caches.
+
+Fallback files whose derivatives are missing are listed without ``image_srcset``
+(clients use ``image_url``). Their derivatives are generated by a background task,
+which then invalidates the manifest.
+"""
+import hashlib
+import os
+import threading
+import time
+import uuid
+from collections import namedtuple
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.renderers import JSONRenderer
+
+from . import images
+from . import tasks
+from .models import CarouselImage
+
+
+VERSION_KEY = 'carousel:manifest:version'
+MANIFEST_MAX_AGE = 300
+ALLOWED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg'}
+
+Manifest = namedtuple('Manifest', ['signature', 'body', 'etag', 'built_at'])
+
+# absolute base URL -> Manifest (URLs in the payload are absolute, so they depend on the host)
+_manifests = {}
+_lock = threading.Lock()
+
+
+def invalidate_manifest():
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def _table_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def carousel_dir() -> Path:
+    return Path(settings.MEDIA_ROOT) / 'carousel'
+
+
+def _dir_mtime(path: Path):
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _media_url():
+    media_url = str(settings.MEDIA_URL)
+    return media_url if media_url.endswith('/') else media_url + '/'
+
+
+def generate_derivatives(name):
+    """Background task: create the derivatives of a fallback file, then refresh the manifest."""
+    if images.generate_derivatives(name):
+        invalidate_manifest()
+
+
+def _srcset(name, base):
+    """srcset of a fallback file, or None (queuing its derivatives) until they all exist."""
+    if not images.is_raster(name):
+        return None
+    if not images.derivatives_exist(name):
+        tasks.enqueue(generate_derivatives, name)
+        return None
+    return images.srcset(name, lambda derived: base + derived)
+
+
+def _filesystem_items(request):
+    """Describe image files in MEDIA_ROOT/carousel with the serializer's fields."""
+    path = carousel_dir()
+    if not path.is_dir():
+        return []
+    files = sorted(f for f in os.listdir(path) if Path(f).suffix.lower() in ALLOWED_EXTENSIONS)
+    base = request.build_absolute_uri(_media_url())
+    return [
+        {
+            'id': None,
+            'image': None,
+            'image_url': base + 'carousel/' + fname,
+            'image_srcset': _srcset('carousel/' + fname, base),
+            'title': Path(fname).stem,
+            'alt_text': '',
+            'caption': '',
+            'link_url': '',
+            'is_active': True,
+            'position': idx,
+            'created_at': None,
+        }
+        for idx, fname in enumerate(files)
+    ]
+
+
+def build_manifest_data(request):
+    """Return the carousel list: DB rows when there are any, otherwise the filesystem fallback."""
+    from .serializers import CarouselImageSerializer
+
+    rows = list(CarouselImage.objects.all().order_by('position', '-created_at'))
+    if rows:
+        return CarouselImageSerializer(rows, many=True, context={'request': request}).data
+    return _filesystem_items(request)
+
+
+def get_manifest(request) -> Manifest:
+    """Return the cached manifest for this request's host, rebuilding it when stale."""
+    base = request.build_absolute_uri('/')
+    signature = (_table_version(), _dir_mtime(carousel_dir()))
+    now = time.monotonic()
+    with _lock:
+        entry = _manifests.get(base)
+    if entry and entry.signature == signature and now - entry.built_at < MANIFEST_MAX_AGE:
+        return entry
+
+    body = JSONRenderer().render(build_manifest_data(request))
+    entry = Manifest(signature, body, '"%s"' % hashlib.sha1(body).hexdigest(), now)
+    with _lock:
+        _manifests[base] = entry
+    return entry
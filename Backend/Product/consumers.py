@@ -1,10 +1,17 @@
 import json
+import time
+
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.db.models import Q
 
 from .models import Board, BoardMembership, User
-from .models import Message
+from . import events, metrics, throttling
+
+try:
+    from .models import Message
+except ImportError:  # chat persistence is optional; board events work without it
+    Message = None
 
 
 @database_sync_to_async
@@ -14,7 +21,7 @@ def _is_board_member(board_id: int, user_id: int) -> bool:
     try:
         # Owner or any membership
         return Board.objects.filter(
-            Q(id=board_id) & (Q(user_id=user_id) | Q(memberships__user_id=user_id))
+            Q(id=board_id, deleted_at__isnull=True) & (Q(user_id=user_id) | Q(memberships__user_id=user_id))
         ).exists()
     except Exception:
         return False
@@ -22,6 +29,8 @@ def _is_board_member(board_id: int, user_id: int) -> bool:
 
 @database_sync_to_async
 def _save_message(board_id: int, user_id: int, content: str):
+    if Message is None:
+        return None
     return Message.objects.create(board_id=board_id, user_id=user_id, content=content)
 
 
@@ -32,16 +41,24 @@ class BoardChatConsumer(AsyncJsonWebsocketConsumer):
         if not user or not getattr(user, 'id', None):
             await self.close()
             return
+        client = self.scope.get('client') or (None,)
+        if throttling.throttle(throttling.local_buckets, 'ws_connect', client[0]):
+            await self.close()
+            return
         is_member = await _is_board_member(self.board_id, user.id)
         if not is_member:
             await self.close()
             return
         self.group_name = f'board_{self.board_id}'
+        # Compact v2 framing is opt-in through the WebSocket subprotocol; None keeps legacy JSON
+        self.subprotocol = events.negotiate_subprotocol(self.scope.get('subprotocols'))
         await self.channel_layer.group_add(self.group_name, self.channel_name)
-        await self.accept()
+        await self.accept(subprotocol=self.subprotocol)
+        metrics.ws_connections.inc({'board': self.board_id})
 
     async def disconnect(self, close_code):
         if hasattr(self, 'group_name'):
+            metrics.ws_connections.dec({'board': self.board_id})
             await self.channel_layer.group_discard(self.group_name, self.channel_name)
 
     async def receive_json(self, content, **kwargs):
@@ -55,7 +72,19 @@ class BoardChatConsumer(AsyncJsonWebsocketConsumer):
         if not text:
             return
         user = self.scope.get('user')
+        wait = throttling.throttle(throttling.local_buckets, 'ws_message', user.id)
+        if wait:
+            metrics.ws_dropped.inc({'event': 'chat.message', 'reason': 'throttled'})
+            await self._send_frame('error', {
+                'type': 'error',
+                'code': 'throttled',
+                'detail': 'Demasiados mensajes. Intenta de nuevo en unos segundos.',
+                'retry_after': round(wait, 1),
+            })
+            return
         saved = await _save_message(self.board_id, user.id, text)
+        if saved is None:
+            return
         payload = {
             'type': 'chat.message',
             'message': {
@@ -68,15 +97,30 @@ class BoardChatConsumer(AsyncJsonWebsocketConsumer):
         }
         await self.channel_layer.group_send(self.group_name, payload)
 
+    async def _send_frame(self, name, body):
+        """Send ``body`` in the negotiated framing: a v2 ``name`` envelope, or as is for legacy clients."""
+        subprotocol = getattr(self, 'subprotocol', None)
+        payload = events.build_event(name, body) if subprotocol else body
+        text, data = events.encode(payload, subprotocol)
+        await self.send(text_data=text, bytes_data=data)
+
     async def chat_message(self, event):
-        await self.send_json(event['message'])
+        await self._send_frame('chat.message', event['message'])
+        metrics.ws_delivered.inc({'event': 'chat.message'})
 
     async def broadcast(self, event):
         """Generic broadcast handler used by server-side signals.
 
-        Expects event to contain a 'payload' dict. We forward it to client
-        as-is so frontend can route by payload['event'].
+        Expects event to contain a 'payload' dict (a v2 envelope, see Product.events).
+        It is encoded for the subprotocol negotiated on connect; legacy clients get
+        the v1 shape so frontend can route by payload['event'].
         """
         payload = event.get('payload') or event.get('message') or event
-        # send_json accepts dicts
-        await self.send_json(payload)
+        text, data = events.encode(payload, getattr(self, 'subprotocol', None))
+        await self.send(text_data=text, bytes_data=data)
+        name = payload.get('e', 'unknown')
+        metrics.ws_delivered.inc({'event': name})
+        ts = payload.get('ts')
+        if ts is not None:
+            # ts is stamped in build_event (ms); clocks are shared within a deployment
+            metrics.ws_delivery_latency.observe(max(time.time() - ts / 1000, 0.0), {'event': name})
@@ -0,0 +1,72 @@
+"""Fast deletion of (large) boards.
+
+Django's Collector loads every Column and Card of a board into memory so it can
+fire ``post_delete`` for each one, and every handler does its own socket send.
+Here cards and columns are removed with raw, chunked deletes by primary key
+(no instances, no signals) and subscribers get a single ``board.deleted`` event.
+
+Every deleted board is first marked with ``Board.deleted_at``, which hides it
+from the API. Boards above ``settings.BOARD_ASYNC_DELETE_THRESHOLD`` cards are then
+purged by a background task, smaller ones inline. The purge commits chunk by chunk,
+so an interrupted one (inline or not) leaves a hidden, marked board that
+``purge_deleted_boards`` finishes.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import events
+from . import stats
+from . import tasks
+from .models import Board, Column, Card, BoardMembership, broadcast_to_board, forget_column_boards
+
+
+PURGE_CHUNK_SIZE = 2000
+
+
+def _raw_delete_chunked(queryset, chunk_size=PURGE_CHUNK_SIZE) -> int:
+    """Delete the rows of ``queryset`` in pk chunks, each in its own short transaction."""
+    model = queryset.model
+    deleted = 0
+    while True:
+        pks = list(queryset.order_by().values_list('pk', flat=True)[:chunk_size])
+        if not pks:
+            return deleted
+        with transaction.atomic():
+            deleted += model._base_manager.filter(pk__in=pks)._raw_delete(model._base_manager.db)
+
+
+def purge_board(board_id: int, chunk_size=PURGE_CHUNK_SIZE) -> dict:
+    """Remove a board and everything under it without per-row signals."""
+    with events.suppress_board_events():
+        counts = {
+            'cards': _raw_delete_chunked(Card.objects.filter(column__board_id=board_id), chunk_size),
+            'columns': _raw_delete_chunked(Column.objects.filter(board_id=board_id), chunk_size),
+            'memberships': _raw_delete_chunked(BoardMembership.objects.filter(board_id=board_id), chunk_size),
+        }
+        # Anything else still pointing at the board goes through the regular collector,
+        # which is cheap now that the heavy relations are empty.
+        Board.objects.filter(pk=board_id).delete()
+    stats.invalidate_board_stats(board_id)
+    forget_column_boards()
+    return counts
+
+
+def delete_board(board: Board) -> bool:
+    """Delete ``board`` quickly and notify subscribers once.
+
+    Returns True when the board was purged inline, False when the purge was handed
+    to a background task.
+    """
+    card_count = Card.objects.filter(column__board_id=board.id).count()
+    threshold = getattr(settings, 'BOARD_ASYNC_DELETE_THRESHOLD', 5000)
+    inline = not threshold or card_count < threshold
+
+    # Marked first so a purge that fails halfway can be resumed
+    Board.objects.filter(pk=board.pk).update(deleted_at=timezone.now())
+    if inline:
+        purge_board(board.id)
+    else:
+        tasks.enqueue(purge_board, board.id)
+    broadcast_to_board(board.id, events.build_event('board.deleted', {'id': board.id}))
+    return inline
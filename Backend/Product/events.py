@@ -0,0 +1,167 @@
+"""Realtime event envelope and wire encodings for board sockets.
+
+Signal handlers build a compact, versioned envelope:
+
+    {"v": 2, "e": "card.updated", "d": {...changed fields...}, "ts": 1700000000000}
+
+Clients pick an encoding through the WebSocket subprotocol:
+- ``cardtrack.v2.msgpack``: the envelope as a MessagePack binary frame
+- ``cardtrack.v2.json``: the envelope as a JSON text frame
+- no subprotocol: legacy v1 shape ({"event", "data": {..., "timestamp"}})
+
+Chat messages use the same framing (a ``chat.message`` envelope); legacy clients
+get the bare message object.
+"""
+import contextvars
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone as dt_timezone
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack is optional
+    msgpack = None
+
+
+EVENT_SCHEMA_VERSION = 2
+
+SUBPROTOCOL_JSON = 'cardtrack.v2.json'
+SUBPROTOCOL_MSGPACK = 'cardtrack.v2.msgpack'
+
+# Fields sent in card/column events. The id (and column_id for cards) is always included,
+# the rest only when created or changed.
+CARD_EVENT_FIELDS = ('title', 'description', 'position', 'is_completed', 'priority', 'due_date')
+COLUMN_EVENT_FIELDS = ('title', 'position', 'color')
+# Fields whose changes trigger an update event (a card moving columns is a change too)
+CARD_TRACKED_FIELDS = CARD_EVENT_FIELDS + ('column_id',)
+
+
+# Attribute holding the last saved/loaded values of tracked fields on a model instance
+SNAPSHOT_ATTR = '_event_snapshot'
+
+
+def take_snapshot(instance, fields):
+    """Remember the current values of ``fields`` (skipping deferred ones, to avoid queries)."""
+    values = instance.__dict__
+    setattr(instance, SNAPSHOT_ATTR, {f: values[f] for f in fields if f in values})
+
+
+def changed_fields(instance, fields, update_fields=None):
+    """Return the set of ``fields`` whose value differs from the snapshot.
+
+    Fields missing from the snapshot (deferred when loaded) count as changed. When
+    ``update_fields`` is given only those columns were written, so the diff is limited to them.
+    """
+    snapshot = getattr(instance, SNAPSHOT_ATTR, None) or {}
+    if update_fields is not None:
+        # update_fields may name FKs either way ('column' or 'column_id')
+        update_fields = set(update_fields) | {f'{name}_id' for name in update_fields}
+    changed = set()
+    for f in fields:
+        if update_fields is not None and f not in update_fields:
+            continue
+        if f not in snapshot or snapshot[f] != getattr(instance, f):
+            changed.add(f)
+    return changed
+
+
+_suppressed = contextvars.ContextVar('board_events_suppressed', default=False)
+
+
+@contextmanager
+def suppress_board_events():
+    """Drop per-row board events inside the block (bulk operations send one summary event)."""
+    token = _suppressed.set(True)
+    try:
+        yield
+    finally:
+        _suppressed.reset(token)
+
+
+def events_suppressed() -> bool:
+    return _suppressed.get()
+
+
+def supported_subprotocols():
+    """Subprotocols this server can speak, in order of preference."""
+    if msgpack is not None:
+        return [SUBPROTOCOL_MSGPACK, SUBPROTOCOL_JSON]
+    return [SUBPROTOCOL_JSON]
+
+
+def negotiate_subprotocol(requested):
+    """Pick the first server-preferred subprotocol offered by the client, or None (legacy)."""
+    offered = set(requested or [])
+    for proto in supported_subprotocols():
+        if proto in offered:
+            return proto
+    return None
+
+
+def _jsonable(value):
+    # Dates are the only non-JSON scalars our models emit (Card.due_date)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def build_event(name: str, data: dict) -> dict:
+    """Return a v2 envelope for ``name`` with the given data dict."""
+    return {
+        'v': EVENT_SCHEMA_VERSION,
+        'e': name,
+        'd': {k: _jsonable(v) for k, v in data.items()},
+        'ts': int(time.time() * 1000),
+    }
+
+
+def _row_fields(instance, fields, changed):
+    if changed is None:
+        names = fields
+    else:
+        names = [f for f in fields if f in changed]
+    return {name: getattr(instance, name) for name in names}
+
+
+def card_event(instance, created: bool, changed=None) -> dict:
+    """Build a card.created/card.updated envelope.
+
+    ``changed`` is an iterable of field names that changed; None means "unknown"
+    and sends every event field. With a known diff, description text (the bulkiest
+    field) is only included when it is part of the diff.
+    """
+    data = {'id': instance.id, 'column_id': instance.column_id}
+    data.update(_row_fields(instance, CARD_EVENT_FIELDS, None if created else changed))
+    return build_event('card.created' if created else 'card.updated', data)
+
+
+def column_event(instance, created: bool, changed=None) -> dict:
+    """Build a column.created/column.updated envelope (see card_event)."""
+    data = {'id': instance.id}
+    data.update(_row_fields(instance, COLUMN_EVENT_FIELDS, None if created else changed))
+    return build_event('column.created' if created else 'column.updated', data)
+
+
+def to_legacy(envelope: dict) -> dict:
+    """Expand a v2 envelope into the v1 payload shape older clients route on."""
+    if 'v' not in envelope:
+        # already a legacy/raw payload
+        return envelope
+    data = dict(envelope.get('d') or {})
+    ts = envelope.get('ts')
+    if ts is not None:
+        data['timestamp'] = datetime.fromtimestamp(ts / 1000, tz=dt_timezone.utc).isoformat()
+    return {'event': envelope.get('e'), 'data': data}
+
+
+def encode(envelope: dict, subprotocol):
+    """Encode an envelope for a socket.
+
+    Returns a ``(text, bytes)`` pair; exactly one is not None.
+    """
+    if subprotocol == SUBPROTOCOL_MSGPACK and msgpack is not None:
+        return None, msgpack.packb(envelope, use_bin_type=True)
+    if subprotocol == SUBPROTOCOL_JSON:
+        return json.dumps(envelope, separators=(',', ':')), None
+    return json.dumps(to_legacy(envelope)), None
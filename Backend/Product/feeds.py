@@ -0,0 +1,109 @@
+"""Cross-board "my cards due soon" feed.
+
+One query per page: open cards with a due date up to ``days`` ahead (overdue ones
+included unless ``overdue=false``) on every live board the user owns or is a
+member of. Older boards can lack the owner's membership row (see
+``backfill_owner_memberships``), so ownership is checked as well. Both conditions
+sit in an ``IN (subquery)`` over boards, which yields each card once without a
+DISTINCT. The ``(due_date, is_completed)`` index on Card drives the range scan.
+
+Pages are ordered by ``(due_date, id)`` and linked with an opaque keyset cursor,
+so deep pages cost the same as the first one. Pages are cached per user for
+``DUE_FEED_CACHE_TTL`` seconds; edits show up once the entry expires.
+"""
+import base64
+import hashlib
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .models import Board, Card
+
+
+DEFAULT_DAYS = 7
+MAX_DAYS = 365
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+def encode_cursor(due_date, card_id) -> str:
+    return base64.urlsafe_b64encode(f'{due_date.isoformat()}|{card_id}'.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        day, card_id = raw.split('|')
+        return date.fromisoformat(day), int(card_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValidationError({'cursor': ['Cursor inválido.']})
+
+
+def _int_param(params, name, default, maximum):
+    try:
+        value = int(params.get(name, default))
+    except (TypeError, ValueError):
+        raise ValidationError({name: ['Debe ser un número entero.']})
+    if value < 0:
+        raise ValidationError({name: ['Debe ser un número positivo.']})
+    return min(value, maximum)
+
+
+def due_cards_queryset(user, days=DEFAULT_DAYS, include_overdue=True, after=None):
+    today = timezone.localdate()
+    qs = Card.objects.filter(
+        is_completed=False,
+        due_date__lte=today + timedelta(days=days),
+        column__board__in=Board.objects.filter(
+            Q(user=user) | Q(memberships__user=user), deleted_at__isnull=True,
+        ),
+    )
+    qs = qs.filter(due_date__gte=today) if not include_overdue else qs.filter(due_date__isnull=False)
+    if after:
+        due, card_id = after
+        qs = qs.filter(Q(due_date__gt=due) | Q(due_date=due, id__gt=card_id))
+    return qs.order_by('due_date', 'id').values(
+        'id', 'title', 'due_date', 'priority', 'is_completed', 'column_id',
+        column_title=F('column__title'),
+        board_id=F('column__board_id'),
+        board_title=F('column__board__title'),
+    )
+
+
+def _build_page(user, days, include_overdue, cursor, limit):
+    after = decode_cursor(cursor) if cursor else None
+    rows = list(due_cards_queryset(user, days, include_overdue, after)[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    today = timezone.localdate()
+    for row in rows:
+        row['overdue'] = row['due_date'] < today
+    last = rows[-1] if rows else None
+    return {
+        'results': rows,
+        'next': encode_cursor(last['due_date'], last['id']) if has_more else None,
+    }
+
+
+def due_feed(user, params) -> dict:
+    """Return ``{'results': [...], 'next': cursor}`` for the query parameters ``params``."""
+    days = _int_param(params, 'days', DEFAULT_DAYS, MAX_DAYS)
+    limit = max(1, _int_param(params, 'limit', DEFAULT_LIMIT, MAX_LIMIT))
+    overdue = (params.get('overdue') or 'true').lower() not in ('0', 'false', 'no', 'off')
+    cursor = params.get('cursor') or ''
+
+    ttl = getattr(settings, 'DUE_FEED_CACHE_TTL', 30)
+    if not ttl:
+        return _build_page(user, days, overdue, cursor, limit)
+    # The day is part of the key: "overdue" and the window both move at midnight
+    signature = f'{timezone.localdate()}|{days}|{overdue}|{limit}|{cursor}'
+    key = f'due_feed:{user.pk}:' + hashlib.sha1(signature.encode()).hexdigest()
+    page = cache.get(key)
+    if page is None:
+        page = _build_page(user, days, overdue, cursor, limit)
+        cache.set(key, page, ttl)
+    return page
@@ -0,0 +1,116 @@
+"""Server-side card filtering and sorting.
+
+Query parameters understood by the card list (``/boards/{id}/columns/{id}/cards/``)
+and by the board endpoints, where they filter the nested ``columns[].cards``:
+
+- ``priority``: one or more of ``low``, ``medium``, ``high`` (comma separated)
+- ``is_completed``: ``true`` / ``false``
+- ``due_after`` / ``due_before``: ISO dates, inclusive
+- ``overdue``: ``true`` for open cards whose due date has passed
+- ``ordering``: comma separated fields from ``CARD_ORDERINGS`` (``-`` for descending)
+
+The filters line up with the composite indexes on Card (column + position,
+column + is_completed + due_date, column + priority).
+"""
+from datetime import date
+
+from django.db.models import Case, IntegerField, Prefetch, Value, When
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .models import Card
+
+
+CARD_FILTER_PARAMS = ('priority', 'is_completed', 'due_after', 'due_before', 'overdue', 'ordering')
+PRIORITIES = ('low', 'medium', 'high')
+# public ordering name -> model field (priority sorts by rank, not alphabetically)
+CARD_ORDERINGS = {
+    'position': 'position',
+    'due_date': 'due_date',
+    'priority': 'priority_rank',
+    'created_at': 'created_at',
+    'title': 'title',
+}
+_TRUE = ('1', 'true', 'yes', 'on')
+_FALSE = ('0', 'false', 'no', 'off')
+
+
+def has_card_filters(params) -> bool:
+    return any(params.get(name) not in (None, '') for name in CARD_FILTER_PARAMS)
+
+
+def _bool(params, name):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    value = value.lower()
+    if value in _TRUE:
+        return True
+    if value in _FALSE:
+        return False
+    raise ValidationError({name: ['Debe ser true o false.']})
+
+
+def _date(params, name):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValidationError({name: ['Fecha inválida, usa el formato AAAA-MM-DD.']})
+
+
+def priority_rank():
+    return Case(
+        *[When(priority=p, then=Value(rank)) for rank, p in enumerate(PRIORITIES)],
+        default=Value(len(PRIORITIES)),
+        output_field=IntegerField(),
+    )
+
+
+def filter_cards(queryset, params):
+    """Apply the card filter/ordering query parameters to a Card queryset (400 on invalid values)."""
+    priority = params.get('priority')
+    if priority:
+        wanted = [p.strip().lower() for p in priority.split(',') if p.strip()]
+        if not wanted or any(p not in PRIORITIES for p in wanted):
+            raise ValidationError({'priority': [f"Valores permitidos: {', '.join(PRIORITIES)}."]})
+        queryset = queryset.filter(priority__in=wanted)
+
+    is_completed = _bool(params, 'is_completed')
+    if is_completed is not None:
+        queryset = queryset.filter(is_completed=is_completed)
+
+    due_after = _date(params, 'due_after')
+    if due_after:
+        queryset = queryset.filter(due_date__gte=due_after)
+    due_before = _date(params, 'due_before')
+    if due_before:
+        queryset = queryset.filter(due_date__lte=due_before)
+
+    overdue = _bool(params, 'overdue')
+    if overdue is True:
+        queryset = queryset.filter(is_completed=False, due_date__lt=timezone.localdate())
+    elif overdue is False:
+        queryset = queryset.exclude(is_completed=False, due_date__lt=timezone.localdate())
+
+    ordering = params.get('ordering')
+    if ordering:
+        fields = []
+        for term in (t.strip() for t in ordering.split(',')):
+            name = term.lstrip('-')
+            if name not in CARD_ORDERINGS:
+                raise ValidationError({'ordering': [f"Valores permitidos: {', '.join(CARD_ORDERINGS)}."]})
+            fields.append(('-' if term.startswith('-') else '') + CARD_ORDERINGS[name])
+        if any(f.lstrip('-') == 'priority_rank' for f in fields):
+            queryset = queryset.annotate(priority_rank=priority_rank())
+        queryset = queryset.order_by(*fields, 'id')
+    return queryset
+
+
+def cards_prefetch(params, lookup='columns__cards'):
+    """Prefetch for nested cards that honours the card filters (plain lookup when there are none)."""
+    if not has_card_filters(params):
+        return lookup
+    return Prefetch(lookup, queryset=filter_cards(Card.objects.all(), params))
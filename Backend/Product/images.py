@@ -0,0 +1,158 @@
+"""Responsive image derivatives (Pillow).
+
+For every stored image we keep width-bucketed WebP and JPEG copies under
+``derived/``, with deterministic names so serializers can build ``srcset``
+URLs from the original's name:
+
+    carousel/sky.jpg      -> derived/carousel/sky_w480.webp, ..._w1600.jpg
+    profilepic/users/8/me.png -> derived/profilepic/users/8/me_s64.webp, ..._s256.jpg
+
+Carousel images get ``WIDTH_BUCKETS`` (never upscaled); profile pictures get
+square ``AVATAR_SIZES`` thumbnails. Derivatives are generated when an upload is
+saved (see the signal handlers in models.py), in the background for the carousel's
+filesystem fallback, and by ``generate_image_derivatives`` for existing media.
+
+``ready_srcset`` only advertises derivatives that exist: until they do, clients
+get None (and use the plain URL) while a background task generates them.
+"""
+import io
+import logging
+import os
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+DERIVED_ROOT = 'derived'
+WIDTH_BUCKETS = (480, 960, 1600)
+AVATAR_SIZES = (64, 128, 256)
+# srcset key -> (file extension, Pillow format, save options)
+FORMATS = {
+    'webp': ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('jpg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+RASTER_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp', '.tif', '.tiff'}
+
+
+def is_raster(name) -> bool:
+    return bool(name) and os.path.splitext(str(name))[1].lower() in RASTER_EXTENSIONS
+
+
+def _derived_name(name, suffix, fmt):
+    stem = os.path.splitext(str(name))[0]
+    return f"{DERIVED_ROOT}/{stem}_{suffix}.{FORMATS[fmt][0]}"
+
+
+def width_name(name, width, fmt):
+    return _derived_name(name, f"w{width}", fmt)
+
+
+def avatar_name(name, size, fmt):
+    return _derived_name(name, f"s{size}", fmt)
+
+
+def _targets(name, avatar):
+    sizes = AVATAR_SIZES if avatar else WIDTH_BUCKETS
+    namer = avatar_name if avatar else width_name
+    return [(size, fmt, namer(name, size, fmt)) for size in sizes for fmt in FORMATS]
+
+
+def derivative_names(name, avatar=False):
+    return [t[2] for t in _targets(name, avatar)]
+
+
+def derivatives_exist(name, avatar=False, storage=None) -> bool:
+    storage = storage or default_storage
+    return all(storage.exists(derived) for derived in derivative_names(name, avatar))
+
+
+def _encode(image, fmt):
+    _ext, pil_format, options = FORMATS[fmt]
+    if pil_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def generate_derivatives(name, avatar=False, storage=None, force=False):
+    """Create missing derivatives of the stored file ``name``; returns the names written.
+
+    Failures (missing file, not an image) are logged and yield an empty list so
+    uploads never fail because of thumbnailing.
+    """
+    storage = storage or default_storage
+    if not is_raster(name):
+        return []
+    targets = _targets(name, avatar)
+    if not force:
+        targets = [t for t in targets if not storage.exists(t[2])]
+    if not targets:
+        return []
+
+    from PIL import Image, ImageOps
+
+    written = []
+    try:
+        with storage.open(name, 'rb') as fh:
+            source = Image.open(fh)
+            source.load()
+        source = ImageOps.exif_transpose(source)
+        for size, fmt, target in targets:
+            if avatar:
+                image = ImageOps.fit(source, (size, size), Image.LANCZOS)
+            else:
+                image = source.copy()
+                if image.width > size:
+                    image.thumbnail((size, image.height), Image.LANCZOS)
+            if storage.exists(target):
+                storage.delete(target)
+            written.append(storage.save(target, ContentFile(_encode(image, fmt))))
+    except FileNotFoundError:
+        logger.debug(f"Original {name} not found; no derivatives generated")
+    except Exception:
+        logger.warning(f"Could not generate derivatives for {name}", exc_info=True)
+    return written
+
+
+def remove_unused_profilepicture(name, storage=None):
+    """Delete a replaced profile picture and its thumbnails unless it is a default or still in use."""
+    from .models import User
+
+    storage = storage or default_storage
+    if not name or os.path.basename(str(name)).lower().startswith('default'):
+        return
+    if User.objects.filter(profilepicture=name).exists():
+        return
+    for target in [name] + derivative_names(name, avatar=True):
+        if storage.exists(target):
+            storage.delete(target)
+
+
+def srcset(name, url_for, avatar=False):
+    """Return {'webp': 'url 480w, ...', 'jpeg': ...} for ``name``, or None for non-raster files.
+
+    ``url_for`` maps a storage name to the URL the client should use.
+    """
+    if not is_raster(name):
+        return None
+    sizes = AVATAR_SIZES if avatar else WIDTH_BUCKETS
+    namer = avatar_name if avatar else width_name
+    return {
+        fmt: ', '.join(f"{url_for(namer(name, size, fmt))} {size}w" for size in sizes)
+        for fmt in FORMATS
+    }
+
+
+def ready_srcset(name, url_for, avatar=False, storage=None):
+    """``srcset`` once every derivative of ``name`` exists; otherwise queue them and return None."""
+    if not is_raster(name):
+        return None
+    if not derivatives_exist(name, avatar, storage):
+        from .tasks import enqueue
+        enqueue(generate_derivatives, name, avatar=avatar, storage=storage)
+        return None
+    return srcset(name, url_for, avatar)
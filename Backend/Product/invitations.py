@@ -0,0 +1,120 @@
+"""Batched board invitations.
+
+``invite_many(board, entries)`` adds many people to a board with a fixed number of
+queries, whatever the batch size:
+
+1. existing users are resolved with one ``email IN (...)`` query
+2. missing users are inserted with one ``bulk_create(ignore_conflicts=True)`` and
+   read back (ids are not returned by every backend, and a concurrent signup may
+   have won the insert; the registration timestamp tells whose row it is)
+3. current memberships of those users are read in one query
+4. new memberships are inserted with one ``bulk_create(ignore_conflicts=True)``
+
+SQLite caps the parameters per query, so Django splits large inserts there into
+a few batches.
+
+Emails are matched case-insensitively: MySQL's collation already compares them
+that way and would skip the insert of ``Bob@x.com`` when ``bob@x.com`` exists.
+The lookup also tries the spelling as sent, so existing mixed-case rows are found
+on case-sensitive backends. New users are stored in lower case.
+
+Each entry gets its own result: ``invited`` (with ``user_created``),
+``already_member`` (the role is left unchanged), ``duplicate`` (the email appeared
+earlier in the batch) or ``invalid``. Like the single invite, new users are named
+after the local part of their email and have no password. ``bulk_create`` skips
+``post_save``, so no avatar thumbnails are queued for them; they share the default
+picture.
+"""
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from .models import BoardMembership, User
+
+INVITABLE_ROLES = (BoardMembership.ROLE_EDITOR, BoardMembership.ROLE_VIEWER)
+DEFAULT_MAX_BATCH = 500
+
+
+def parse_entries(data, default_role=BoardMembership.ROLE_VIEWER) -> list:
+    """Request ``invites`` items (``"email"`` or ``{"email", "role"}``) -> list of (email, role, errors)."""
+    entries = []
+    for item in data:
+        if isinstance(item, str):
+            email, role = item, default_role
+        elif isinstance(item, dict):
+            email, role = item.get('email'), item.get('role') or default_role
+        else:
+            entries.append(('', default_role, ['Formato inválido; se espera un email o {"email", "role"}.']))
+            continue
+        email = email.strip() if isinstance(email, str) else ''
+        errors = []
+        if not email:
+            errors.append('El email es requerido.')
+        else:
+            try:
+                validate_email(email)
+            except ValidationError:
+                errors.append('Email inválido.')
+        if role not in INVITABLE_ROLES:
+            errors.append('Valor inválido o no permitido para role.')
+        entries.append((email, role, errors))
+    return entries
+
+
+def invite_many(board, entries) -> list:
+    """Invite ``entries`` (from ``parse_entries``) to ``board``; returns one result per entry."""
+    results = [None] * len(entries)
+    wanted = {}  # normalized email -> (index, email as sent, role), first occurrence wins
+    for i, (email, role, errors) in enumerate(entries):
+        key = email.lower()
+        if errors:
+            results[i] = {'email': email, 'status': 'invalid', 'errors': errors}
+        elif key in wanted:
+            results[i] = {'email': email, 'status': 'duplicate'}
+        else:
+            wanted[key] = (i, email, role)
+    if not wanted:
+        return results
+
+    with transaction.atomic():
+        spellings = set(wanted) | {email for _, email, _ in wanted.values()}
+        users = {
+            email.lower(): user_id
+            for email, user_id in User.objects.filter(email__in=list(spellings)).values_list('email', 'id')
+        }
+        created = set()
+        missing = [key for key in wanted if key not in users]
+        if missing:
+            new_users = [User(email=key, name=key.split('@')[0][:100]) for key in missing]
+            User.objects.bulk_create(new_users, ignore_conflicts=True)
+            # bulk_create stamped registration_date on each object: a row with another
+            # stamp was inserted by someone else (concurrent signup or invite)
+            stamps = {user.email: user.registration_date for user in new_users}
+            for email, user_id, registered in (
+                User.objects.filter(email__in=missing).values_list('email', 'id', 'registration_date')
+            ):
+                users[email.lower()] = user_id
+                if registered == stamps.get(email):
+                    created.add(email.lower())
+
+        current = dict(
+            BoardMembership.objects
+            .filter(board=board, user_id__in=list(users.values()))
+            .values_list('user_id', 'role')
+        )
+        new = [
+            BoardMembership(board=board, user_id=users[key], role=role)
+            for key, (_, _, role) in wanted.items() if users[key] not in current
+        ]
+        BoardMembership.objects.bulk_create(new, ignore_conflicts=True)
+
+    for key, (i, email, role) in wanted.items():
+        user_id = users[key]
+        if user_id in current:
+            results[i] = {'email': email, 'status': 'already_member', 'user': user_id, 'role': current[user_id]}
+        else:
+            results[i] = {
+                'email': email, 'status': 'invited', 'user': user_id, 'role': role,
+                'user_created': key in created,
+            }
+    return results
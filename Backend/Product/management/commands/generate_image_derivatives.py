@@ -0,0 +1,31 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from Product.images import generate_derivatives
+from Product.models import User, CarouselImage
+
+
+class Command(BaseCommand):
+    help = "Generate responsive derivatives for existing carousel images and avatar thumbnails for profile pictures."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regenerate derivatives that already exist')
+
+    def handle(self, *args, **options):
+        force = options['force']
+        carousel = set(n for n in CarouselImage.objects.values_list('image', flat=True) if n)
+        carousel_dir = os.path.join(settings.MEDIA_ROOT, 'carousel')
+        if os.path.isdir(carousel_dir):
+            carousel.update(f'carousel/{f}' for f in os.listdir(carousel_dir))
+        avatars = set(n for n in User.objects.values_list('profilepicture', flat=True).distinct() if n)
+
+        written = 0
+        for name in sorted(carousel):
+            written += len(generate_derivatives(name, force=force))
+        for name in sorted(avatars):
+            written += len(generate_derivatives(name, avatar=True, force=force))
+        self.stdout.write(self.style.SUCCESS(
+            f'Done. {written} derivative files written for {len(carousel)} carousel images and {len(avatars)} avatars.'
+        ))
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+
+from Product.images import generate_derivatives, derivative_names
+from Product.models import User, CarouselImage
+from Product.storage import get_media_storage, is_content_addressed
+
+
+class Command(BaseCommand):
+    help = "Move existing profile pictures and carousel images to content-addressed names (deduplicating identical files)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Show which files would be migrated without changing anything')
+        parser.add_argument('--delete-old', action='store_true', help='Delete the original files (and their derivatives) once migrated')
+
+    def _migrate(self, model, field_name, avatar, dry_run, stale):
+        storage = get_media_storage()
+        # name -> new name, so each distinct file is hashed and copied once
+        moved = {}
+        rows = model.objects.exclude(**{field_name: ''}).values_list('pk', field_name)
+        for pk, name in rows.iterator():
+            if not name or is_content_addressed(name) or name.split('/')[-1].lower().startswith('default'):
+                continue
+            if name not in moved:
+                if not storage.exists(name):
+                    self.stdout.write(self.style.WARNING(f"Missing file {name} ({model.__name__} #{pk}); skipped"))
+                    moved[name] = None
+                    continue
+                if dry_run:
+                    self.stdout.write(f"Would migrate {name}")
+                    moved[name] = name
+                    continue
+                with storage.open(name, 'rb') as fh:
+                    moved[name] = storage.save(name, fh)
+                generate_derivatives(moved[name], avatar=avatar)
+                stale.add((name, avatar))
+            if moved[name] and not dry_run:
+                model.objects.filter(pk=pk).update(**{field_name: moved[name]})
+        return len([n for n in moved.values() if n])
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        stale = set()
+        users = self._migrate(User, 'profilepicture', True, dry_run, stale)
+        images = self._migrate(CarouselImage, 'image', False, dry_run, stale)
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING('Dry run complete. No changes applied.'))
+            return
+        if options['delete_old']:
+            storage = get_media_storage()
+            for name, avatar in stale:
+                for target in [name] + derivative_names(name, avatar=avatar):
+                    if storage.exists(target):
+                        storage.delete(target)
+        self.stdout.write(self.style.SUCCESS(
+            f'Migration complete. {users} profile pictures and {images} carousel images moved '
+            f'({len(stale)} files {"deleted" if options["delete_old"] else "left in place"}).'
+        ))
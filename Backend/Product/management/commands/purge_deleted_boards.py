@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from Product.deletion import purge_board, PURGE_CHUNK_SIZE
+from Product.models import Board
+
+
+class Command(BaseCommand):
+    help = "Purge soft-deleted boards (Board.deleted_at set) whose background purge did not finish."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=PURGE_CHUNK_SIZE, help='Rows deleted per statement')
+        parser.add_argument('--dry-run', action='store_true', help='List the boards that would be purged')
+
+    def handle(self, *args, **options):
+        board_ids = list(Board.objects.filter(deleted_at__isnull=False).values_list('id', flat=True))
+        if options['dry_run']:
+            for board_id in board_ids:
+                self.stdout.write(f"Would purge board #{board_id}")
+            self.stdout.write(self.style.WARNING('Dry run complete. No changes applied.'))
+            return
+        for board_id in board_ids:
+            counts = purge_board(board_id, chunk_size=options['chunk_size'])
+            self.stdout.write(f"Purged board #{board_id}: {counts['cards']} cards, {counts['columns']} columns")
+        self.stdout.write(self.style.SUCCESS(f'Done. Purged {len(board_ids)} boards.'))
@@ -0,0 +1,46 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Product import benchmark
+from Product.models import User
+
+
+class Command(BaseCommand):
+    help = ("Replay a weighted request mix against the API in-process and report p50/p95/p99 latency "
+            "and queries per endpoint. Run seed_synthetic_data first.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', default='bench0@example.com', help='Email of the user making the requests')
+        parser.add_argument('--mix', help='JSONL request mix (default: Product.benchmark.DEFAULT_MIX)')
+        parser.add_argument('--requests', type=int, default=500, help='Measured HTTP requests')
+        parser.add_argument('--warmup', type=int, default=50, help='Requests sent before measuring')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the request sequence')
+        parser.add_argument('--host', help='Host header (default: first ALLOWED_HOSTS entry or localhost)')
+        parser.add_argument('--ws-clients', type=int, default=0, help='WebSocket clients for the fan-out test (0 skips it)')
+        parser.add_argument('--ws-events', type=int, default=20, help='Card updates sent during the fan-out test')
+        parser.add_argument('--json', dest='json_path', help='Also write the report to this file')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(email=options['user']).first()
+        if user is None:
+            raise CommandError(f"User {options['user']} not found. Run seed_synthetic_data first.")
+        mix = benchmark.load_mix(options['mix']) if options['mix'] else None
+
+        try:
+            report = benchmark.run_http(
+                user, mix, requests=options['requests'], warmup=options['warmup'],
+                seed=options['seed'], host=options['host'],
+            )
+            if options['ws_clients']:
+                report.update(benchmark.run_ws(
+                    user, clients=options['ws_clients'], events=options['ws_events'], host=options['host'],
+                ))
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(benchmark.format_report(report))
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write(f"Report written to {options['json_path']}")
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from Product.benchmark import DEFAULT_PASSWORD, delete_seeded, seed
+from Product.models import User
+
+
+class Command(BaseCommand):
+    help = "Create synthetic users, boards, columns, cards and memberships for load testing (see Product.benchmark)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50, help='Users to create')
+        parser.add_argument('--boards', type=int, default=5, help='Boards per user')
+        parser.add_argument('--columns', type=int, default=4, help='Columns per board')
+        parser.add_argument('--cards', type=int, default=25, help='Cards per column')
+        parser.add_argument('--members', type=int, default=3, help='Extra memberships per board')
+        parser.add_argument('--prefix', default='bench', help='Emails are <prefix><n>@example.com')
+        parser.add_argument('--password', default=DEFAULT_PASSWORD, help='Password of every synthetic user')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed (same seed, same data)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per INSERT')
+        parser.add_argument('--reset', action='store_true', help='Delete the users of this prefix first')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if options['reset']:
+            deleted = delete_seeded(prefix)
+            self.stdout.write(f"Deleted {deleted} rows from a previous run.")
+        elif User.objects.filter(email=f'{prefix}0@example.com').exists():
+            raise CommandError(f"Synthetic data for prefix '{prefix}' already exists. Use --reset or another --prefix.")
+
+        counts = seed(
+            users=options['users'],
+            boards=options['boards'],
+            columns=options['columns'],
+            cards=options['cards'],
+            members=options['members'],
+            prefix=prefix,
+            seed=options['seed'],
+            password=options['password'],
+            batch_size=options['batch_size'],
+        )
+        summary = ', '.join(f'{n} {name}' for name, n in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Done. Created {summary}. Log in as {prefix}0@example.com."))
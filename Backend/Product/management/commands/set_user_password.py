@@ -2,6 +2,7 @@ from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth.hashers import make_password
 from getpass import getpass
 
+from Product import tokens
 from Product.models import User
 
 
@@ -49,6 +50,8 @@ class Command(BaseCommand):
 
         user.password_hash = hashed
         user.save(update_fields=['password_hash'])
+        # Sessions signed in with the old password must not survive the reset
+        tokens.revoke_tokens(user)
 
         self.stdout.write(self.style.SUCCESS(
             f"Password updated for user {user.id} <{user.email}>"
@@ -0,0 +1,42 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Product.startup import TARGETS, profile
+
+
+class Command(BaseCommand):
+    help = "Measure cold-start time of manage.py, WSGI and ASGI and summarize `python -X importtime`."
+
+    def add_arguments(self, parser):
+        parser.add_argument('targets', nargs='*', help=f"Any of {', '.join(sorted(TARGETS))} (default: all)")
+        parser.add_argument('--runs', type=int, default=5, help='Cold starts timed per target')
+        parser.add_argument('--top', type=int, default=15, help='Modules and packages listed')
+        parser.add_argument('--json', dest='json_path', help='Also write the report to this file')
+
+    def handle(self, *args, **options):
+        unknown = set(options['targets']) - set(TARGETS)
+        if unknown:
+            raise CommandError(f"Unknown target(s): {', '.join(sorted(unknown))}")
+        reports = []
+        for target in options['targets'] or sorted(TARGETS):
+            try:
+                report = profile(target, runs=options['runs'], top=options['top'])
+            except RuntimeError as exc:
+                raise CommandError(f"{target}: {exc}")
+            reports.append(report)
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{target}: min {report['min_ms']:.0f} ms, median {report['median_ms']:.0f} ms "
+                f"({report['modules']} modules, {report['import_ms']:.0f} ms importing)"
+            ))
+            self.stdout.write("  slowest imports (cumulative):")
+            for name, ms in report['slowest']:
+                self.stdout.write(f"    {ms:8.1f} ms  {name}")
+            self.stdout.write("  by package (self time):")
+            for name, ms in report['packages']:
+                self.stdout.write(f"    {ms:8.1f} ms  {name}")
+
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as fh:
+                json.dump(reports, fh, indent=2)
+            self.stdout.write(f"Report written to {options['json_path']}")
@@ -0,0 +1,209 @@
+"""Media file serving for production.
+
+``plan_response`` decides status and headers for a media request (ETag and
+Last-Modified validators, 304s, single byte ranges, cache policy, front-server
+offload) and is shared by:
+
+- ``serve_media``: Django view (WSGI). Full files go through FileResponse, which
+  gunicorn sends with ``sendfile`` via ``wsgi.file_wrapper``.
+- ``MediaFilesApp``: ASGI wrapper that answers MEDIA_URL requests before Django,
+  using the ``http.response.zerocopysend`` extension when the server offers it.
+
+With ``MEDIA_ACCEL_REDIRECT_PREFIX`` (nginx) or ``MEDIA_SENDFILE_HEADER``
+(e.g. ``X-Sendfile`` for Apache/lighttpd) set, only headers are produced and the
+front server transfers the file.
+
+Content-addressed files (see Product.storage) and their derivatives never change
+under the same name, so they are served as ``immutable`` for a year; anything
+else (legacy uploads, the default avatar) gets a short ``max-age``.
+"""
+import asyncio
+import mimetypes
+from collections import namedtuple
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_http_date_safe
+
+from .storage import is_content_addressed
+
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+CHUNK_SIZE = 64 * 1024
+
+# status, [(header, value)], absolute file path (None when there is no body), offset, length
+MediaPlan = namedtuple('MediaPlan', ['status', 'headers', 'path', 'offset', 'length'])
+
+
+def cache_control_for(path) -> str:
+    if is_content_addressed(path):
+        return IMMUTABLE_CACHE_CONTROL
+    return f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}'
+
+
+def _resolve(path, document_root=None):
+    try:
+        full = Path(safe_join(str(document_root or settings.MEDIA_ROOT), path))
+    except Exception:
+        # SuspiciousFileOperation (path traversal) or invalid path
+        return None
+    return full if full.is_file() else None
+
+
+def _parse_range(value, size):
+    """Parse a single 'bytes=' range; returns (start, end), 'invalid' (ignore) or None (unsatisfiable)."""
+    unit, _, spec = (value or '').partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return 'invalid'
+    first, _, last = spec.strip().partition('-')
+    try:
+        if first == '':
+            length = int(last)
+            if length <= 0:
+                return None
+            return max(0, size - length), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return 'invalid'
+    if start > end or start >= size:
+        return None
+    return start, min(end, size - 1)
+
+
+def _etag_matches(header, etag):
+    return header.strip() == '*' or etag in [t.strip() for t in header.split(',')]
+
+
+def plan_response(path, method='GET', headers=None, document_root=None) -> MediaPlan:
+    """Work out how to answer a GET/HEAD for media ``path``; ``headers`` is a case-insensitive mapping."""
+    headers = headers or {}
+    full = _resolve(path, document_root)
+    if full is None:
+        return MediaPlan(404, [], None, 0, 0)
+    st = full.stat()
+    size = st.st_size
+    etag = f'"{st.st_mtime_ns:x}-{size:x}"'
+    validators = [
+        ('ETag', etag),
+        ('Last-Modified', http_date(st.st_mtime)),
+        ('Cache-Control', cache_control_for(path)),
+    ]
+
+    if_none_match = headers.get('If-None-Match')
+    if if_none_match:
+        if _etag_matches(if_none_match, etag):
+            return MediaPlan(304, validators, None, 0, 0)
+    else:
+        since = parse_http_date_safe(headers.get('If-Modified-Since') or '')
+        if since is not None and int(st.st_mtime) <= since:
+            return MediaPlan(304, validators, None, 0, 0)
+
+    content_type, encoding = mimetypes.guess_type(str(full))
+    entity = validators + [('Content-Type', content_type or 'application/octet-stream'), ('Accept-Ranges', 'bytes')]
+    if encoding:
+        entity.append(('Content-Encoding', encoding))
+
+    accel_prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', None)
+    if accel_prefix:
+        # nginx serves the internal location (ranges included) and keeps our headers
+        return MediaPlan(200, entity + [('X-Accel-Redirect', accel_prefix.rstrip('/') + '/' + quote(path))], None, 0, 0)
+    sendfile_header = getattr(settings, 'MEDIA_SENDFILE_HEADER', None)
+    if sendfile_header:
+        return MediaPlan(200, entity + [(sendfile_header, str(full))], None, 0, 0)
+
+    range_header = headers.get('Range')
+    if_range = headers.get('If-Range')
+    if range_header and method == 'GET' and (not if_range or if_range.strip() == etag):
+        byte_range = _parse_range(range_header, size)
+        if byte_range is None:
+            return MediaPlan(416, validators + [('Content-Range', f'bytes */{size}')], None, 0, 0)
+        if byte_range != 'invalid':
+            start, end = byte_range
+            length = end - start + 1
+            return MediaPlan(206, entity + [
+                ('Content-Range', f'bytes {start}-{end}/{size}'),
+                ('Content-Length', str(length)),
+            ], str(full), start, length)
+
+    return MediaPlan(200, entity + [('Content-Length', str(size))], str(full), 0, size)
+
+
+def _read_range(path, offset, length):
+    with open(path, 'rb') as fh:
+        fh.seek(offset)
+        remaining = length
+        while remaining > 0:
+            chunk = fh.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                return
+            remaining -= len(chunk)
+            yield chunk
+
+
+def serve_media(request, path, document_root=None):
+    """Django view for MEDIA_URL (see plan_response)."""
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponse(status=405, headers={'Allow': 'GET, HEAD'})
+    plan = plan_response(path, request.method, request.headers, document_root)
+    if plan.status == 404:
+        raise Http404('Archivo no encontrado.')
+    if plan.path is None or request.method == 'HEAD':
+        response = HttpResponse(status=plan.status)
+        if plan.status != 304 and 'Content-Length' not in dict(plan.headers):
+            response['Content-Length'] = '0'
+    elif plan.status == 200:
+        response = FileResponse(open(plan.path, 'rb'))
+    else:
+        response = StreamingHttpResponse(_read_range(plan.path, plan.offset, plan.length), status=plan.status)
+    for name, value in plan.headers:
+        response[name] = value
+    return response
+
+
+class MediaFilesApp:
+    """ASGI app answering GET/HEAD under MEDIA_URL itself and passing everything else to ``app``."""
+
+    def __init__(self, app, prefix=None, document_root=None):
+        self.app = app
+        self.prefix = prefix or str(settings.MEDIA_URL)
+        self.document_root = document_root
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] not in ('GET', 'HEAD') or not scope['path'].startswith(self.prefix):
+            return await self.app(scope, receive, send)
+        headers = {k.decode('latin-1').title(): v.decode('latin-1') for k, v in scope.get('headers') or []}
+        path = scope['path'][len(self.prefix):]
+        plan = plan_response(path, scope['method'], headers, self.document_root)
+        if plan.status == 404:
+            # Let Django produce its regular 404 page
+            return await self.app(scope, receive, send)
+
+        await send({
+            'type': 'http.response.start',
+            'status': plan.status,
+            'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in plan.headers],
+        })
+        if plan.path is None or scope['method'] == 'HEAD':
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+
+        loop = asyncio.get_running_loop()
+        with open(plan.path, 'rb') as fh:
+            if 'http.response.zerocopysend' in (scope.get('extensions') or {}):
+                await send({'type': 'http.response.zerocopysend', 'file': fh, 'offset': plan.offset, 'count': plan.length})
+                return
+            fh.seek(plan.offset)
+            remaining = plan.length
+            while remaining > 0:
+                chunk = await loop.run_in_executor(None, fh.read, min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': remaining > 0})
+            if remaining > 0:
+                # File shrank while sending: close the response
+                await send({'type': 'http.response.body', 'body': b''})
@@ -0,0 +1,207 @@
+"""In-process metrics registry with Prometheus text exposition.
+
+Counters, gauges and histograms live in this process only (each ASGI/WSGI worker
+exposes its own numbers; Prometheus sums them per instance). ``render()`` produces
+the text served by ``/api/metrics/``.
+
+Per-request timings are collected by ``Product.middleware.PerformanceMiddleware``;
+``span(name)`` lets code (serializers, renderers) add its own time to the current
+request. The realtime path (``Product.realtime`` and ``BoardChatConsumer``)
+records events per board, ``group_send`` time, dropped sends, delivery latency and
+open sockets.
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_metrics = {}
+
+
+def _label_key(labels):
+    return tuple(sorted((labels or {}).items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in pairs
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.values = {}
+
+    def samples(self):
+        for key, value in sorted(self.values.items()):
+            yield self.name, key, (), value
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, labels=None, value=1):
+        key = _label_key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value, labels=None):
+        with _lock:
+            self.values[_label_key(labels)] = value
+
+    def inc(self, labels=None, value=1):
+        key = _label_key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+    def dec(self, labels=None, value=1):
+        self.inc(labels, -value)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, labels=None):
+        key = _label_key(labels)
+        with _lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self):
+        for key, (counts, total, count) in sorted(self.values.items()):
+            for bound, n in zip(self.buckets, counts):
+                yield f'{self.name}_bucket', key, (('le', repr(float(bound))),), n
+            yield f'{self.name}_bucket', key, (('le', '+Inf'),), count
+            yield f'{self.name}_sum', key, (), total
+            yield f'{self.name}_count', key, (), count
+
+
+def _register(cls, name, help_text, **kwargs):
+    with _lock:
+        metric = _metrics.get(name)
+        if metric is None:
+            metric = _metrics[name] = cls(name, help_text, **kwargs)
+    return metric
+
+
+def counter(name, help_text) -> Counter:
+    return _register(Counter, name, help_text)
+
+
+def gauge(name, help_text) -> Gauge:
+    return _register(Gauge, name, help_text)
+
+
+def histogram(name, help_text, buckets=DEFAULT_BUCKETS) -> Histogram:
+    return _register(Histogram, name, help_text, buckets=buckets)
+
+
+def render() -> str:
+    """Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    with _lock:
+        metrics = sorted(_metrics.values(), key=lambda m: m.name)
+        snapshot = [(m, list(m.samples())) for m in metrics]
+    for metric, samples in snapshot:
+        lines.append(f'# HELP {metric.name} {metric.help}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        for name, key, extra, value in samples:
+            lines.append(f'{name}{_format_labels(key, extra)} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def reset():
+    """Forget every recorded value (tests)."""
+    with _lock:
+        for metric in _metrics.values():
+            metric.values.clear()
+
+
+# ---- per-request spans -------------------------------------------------------
+
+_current = contextvars.ContextVar('cardtrack_request_timings', default=None)
+_active_spans = contextvars.ContextVar('cardtrack_active_spans', default=frozenset())
+
+
+def start_request():
+    """Begin collecting spans for the current request; returns the dict they accumulate in."""
+    timings = {}
+    return timings, _current.set(timings)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+@contextmanager
+def span(name):
+    """Add the time spent in the block to the current request's ``name`` timing.
+
+    Nested spans with the same name are counted once (e.g. nested serializers).
+    """
+    timings = _current.get()
+    active = _active_spans.get()
+    if timings is None or name in active:
+        yield
+        return
+    token = _active_spans.set(active | {name})
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+        _active_spans.reset(token)
+
+
+# ---- HTTP metrics (recorded by PerformanceMiddleware) --------------------------
+
+http_requests = counter('cardtrack_http_requests_total', 'HTTP requests by view, method and status.')
+http_duration = histogram('cardtrack_http_request_duration_seconds', 'HTTP request latency by view.')
+db_queries = counter('cardtrack_db_queries_total', 'Database queries executed by view.')
+db_duration = counter('cardtrack_db_query_duration_seconds_total', 'Time spent in database queries by view.')
+serialize_duration = counter('cardtrack_serialize_duration_seconds_total', 'Time spent serializing by view.')
+render_duration = counter('cardtrack_render_duration_seconds_total', 'Time spent rendering responses by view.')
+response_bytes = counter('cardtrack_response_bytes_total', 'Response body bytes by view (non-streaming responses).')
+throttled = counter('cardtrack_throttled_total', 'Requests and socket messages rejected by a rate limit, by scope.')
+
+
+# ---- realtime metrics (Product.realtime and BoardChatConsumer) ---------------------
+
+ws_events = counter('cardtrack_ws_events_total', 'Realtime events emitted by board and event name.')
+ws_group_send = histogram(
+    'cardtrack_ws_group_send_seconds', 'Time spent in channel layer group_send by event name.',
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+ws_dropped = counter('cardtrack_ws_dropped_events_total', 'Events not handed to the channel layer, by event name and reason.')
+ws_delivered = counter('cardtrack_ws_delivered_total', 'Frames pushed to sockets by event name.')
+ws_delivery_latency = histogram(
+    'cardtrack_ws_delivery_latency_seconds', 'Time from event emission (envelope ts) to the consumer sending it, by event name.',
+)
+ws_connections = gauge('cardtrack_ws_connections', 'Open board sockets by board.')
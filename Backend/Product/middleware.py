@@ -0,0 +1,143 @@
+"""Request performance instrumentation.
+
+``PerformanceMiddleware`` measures every request and records, per view (the
+viewset action, e.g. ``BoardViewSet.retrieve``):
+
+- total latency
+- number and time of DB queries, through ``connection.execute_wrapper``
+- serializer time (``metrics.span('serialize')`` in serializers.py)
+- render time: from ``process_template_response`` until the rendered response
+  comes back, which is where DRF renders
+- response size
+
+The totals go to the Prometheus registry in Product.metrics (``/api/metrics/``).
+They are also sent back in a ``Server-Timing`` header when
+``SERVER_TIMING_HEADER`` is on.
+
+``QueryBudgetMiddleware`` (opt-in) checks the declared query budgets and flags
+N+1 patterns; see Product.querybudget.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from . import metrics
+from . import querybudget
+from . import slowqueries
+
+logger = logging.getLogger(__name__)
+
+
+class _QueryTimer:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+def view_label(request) -> str:
+    """Stable, low-cardinality name for the view that handled ``request``."""
+    func = getattr(request, '_view_func', None)
+    if func is None:
+        return 'unmatched'
+    cls = getattr(func, 'cls', None)
+    if cls is not None:
+        actions = getattr(func, 'actions', None) or {}
+        action = actions.get(request.method.lower()) or request.method.lower()
+        return f"{cls.__name__}.{action}"
+    return getattr(func, '__name__', 'view')
+
+
+class PerformanceMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings, token = metrics.start_request()
+        view_token = slowqueries.current_view.set('')
+        queries = _QueryTimer()
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(queries):
+                response = self.get_response(request)
+        finally:
+            metrics.end_request(token)
+            slowqueries.current_view.reset(view_token)
+        total = time.perf_counter() - start
+        render_start = getattr(request, '_perf_render_start', None)
+        if render_start is not None:
+            timings['render'] = time.perf_counter() - render_start
+        self._record(request, response, total, queries, timings)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._view_func = view_func
+        # names the view in the slow query log
+        slowqueries.current_view.set(view_label(request))
+
+    def process_template_response(self, request, response):
+        request._perf_render_start = time.perf_counter()
+        return response
+
+    def _record(self, request, response, total, queries, timings):
+        label = view_label(request)
+        view = {'view': label}
+        size = None if response.streaming else len(response.content)
+
+        metrics.http_requests.inc({'view': label, 'method': request.method, 'status': response.status_code})
+        metrics.http_duration.observe(total, view)
+        metrics.db_queries.inc(view, queries.count)
+        metrics.db_duration.inc(view, queries.duration)
+        metrics.serialize_duration.inc(view, timings.get('serialize', 0.0))
+        metrics.render_duration.inc(view, timings.get('render', 0.0))
+        if size is not None:
+            metrics.response_bytes.inc(view, size)
+
+        request.perf = {'view': label, 'queries': queries.count, 'db': queries.duration, 'total': total, **timings}
+        if getattr(settings, 'SERVER_TIMING_HEADER', True):
+            parts = [
+                f'db;dur={queries.duration * 1000:.1f};desc="{queries.count} queries"',
+                *(f'{name};dur={value * 1000:.1f}' for name, value in sorted(timings.items())),
+                f'total;dur={total * 1000:.1f}',
+            ]
+            response['Server-Timing'] = ', '.join(parts)
+
+
+class QueryBudgetMiddleware:
+    """Log (or raise, with QUERY_BUDGET_STRICT) when a view exceeds its budget or repeats a query shape."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = querybudget.QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        view_func = getattr(request, '_view_func', None)
+        if view_func is None:
+            return response
+        problems = querybudget.check(
+            recorder,
+            querybudget.view_budget(view_func, request.method),
+            getattr(settings, 'N_PLUS_ONE_THRESHOLD', 5),
+            label=f'{view_label(request)} {request.method} {request.path}',
+        )
+        if problems:
+            if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise querybudget.QueryBudgetExceeded('; '.join(problems))
+            for problem in problems:
+                logger.warning(problem)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._view_func = view_func
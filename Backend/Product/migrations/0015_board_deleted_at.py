@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Product', '0014_rename_added_at_to_invited_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='board',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
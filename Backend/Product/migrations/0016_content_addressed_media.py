@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:36
+
+import Product.models
+import Product.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Product', '0015_board_deleted_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='carouselimage',
+            name='image',
+            field=models.ImageField(storage=Product.storage.get_media_storage, upload_to='carousel/'),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='profilepicture',
+            field=models.ImageField(default='profilepic/default.png', storage=Product.storage.get_media_storage, upload_to=Product.models.upload_to_user_profile),
+        ),
+    ]
@@ -0,0 +1,42 @@
+"""FULLTEXT indexes used by Product.search on MySQL (other databases use the in-process index)."""
+
+from django.db import migrations
+
+
+# model -> (index name, columns); MATCH() in Product.search must list the same columns
+FULLTEXT_INDEXES = {
+    'board': ('board_title_ft', ['title']),
+    'column': ('column_title_ft', ['title']),
+    'card': ('card_title_description_ft', ['title', 'description']),
+}
+
+
+def create_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    quote = schema_editor.quote_name
+    for model_name, (index_name, columns) in FULLTEXT_INDEXES.items():
+        table = apps.get_model('Product', model_name)._meta.db_table
+        schema_editor.execute(
+            f"CREATE FULLTEXT INDEX {quote(index_name)} ON {quote(table)} ({', '.join(quote(c) for c in columns)})"
+        )
+
+
+def drop_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    quote = schema_editor.quote_name
+    for model_name, (index_name, _columns) in FULLTEXT_INDEXES.items():
+        table = apps.get_model('Product', model_name)._meta.db_table
+        schema_editor.execute(f"DROP INDEX {quote(index_name)} ON {quote(table)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Product', '0016_content_addressed_media'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext_indexes, drop_fulltext_indexes),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Product', '0017_search_fulltext_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['column', 'position'], name='card_column_position_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['column', 'is_completed', 'due_date'], name='card_column_done_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['column', 'priority'], name='card_column_priority_idx'),
+        ),
+    ]
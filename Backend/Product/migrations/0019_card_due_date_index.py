@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Product', '0018_card_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['due_date', 'is_completed'], name='card_due_done_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Product', '0019_card_due_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shape_hash', models.CharField(max_length=40, unique=True)),
+                ('shape', models.TextField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total_ms', models.FloatField(default=0)),
+                ('max_ms', models.FloatField(default=0)),
+                ('last_ms', models.FloatField(default=0)),
+                ('sql', models.TextField()),
+                ('params', models.TextField(blank=True)),
+                ('view', models.CharField(blank=True, max_length=200)),
+                ('stack', models.TextField(blank=True)),
+                ('explain', models.TextField(blank=True)),
+                ('first_seen', models.DateTimeField(auto_now_add=True)),
+                ('last_seen', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Slow Query',
+                'verbose_name_plural': 'Slow Queries',
+                'ordering': ['-total_ms'],
+            },
+        ),
+    ]
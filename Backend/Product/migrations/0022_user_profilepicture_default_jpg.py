@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-19 19:20
+
+from django.db import migrations, models
+
+import Product.models
+import Product.storage
+
+
+OLD_DEFAULT = 'profilepic/default.png'
+NEW_DEFAULT = 'profilepic/default.jpg'
+
+
+def forwards(apps, schema_editor):
+    # The old default never existed in media; point those users at the shipped image
+    apps.get_model('Product', 'User').objects.filter(profilepicture=OLD_DEFAULT).update(profilepicture=NEW_DEFAULT)
+
+
+def backwards(apps, schema_editor):
+    apps.get_model('Product', 'User').objects.filter(profilepicture=NEW_DEFAULT).update(profilepicture=OLD_DEFAULT)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Product', '0021_user_token_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='profilepicture',
+            field=models.ImageField(default='profilepic/default.jpg', storage=Product.storage.get_media_storage, upload_to=Product.models.upload_to_user_profile),
+        ),
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -1,10 +1,14 @@
 from django.db import models
 
+from .storage import get_media_storage
+
 #   User
 def upload_to_user_profile(instance, filename):
     """Place uploaded user profile images under profilepic/users/<user_id>/filename.
 
     If the instance has no id yet (unsaved), place in a temp folder with timestamp.
+    The content-addressed media storage only keeps the top-level 'profilepic' folder
+    of this name (see Product.storage).
     """
     import time, os
     base = 'profilepic/users'
@@ -16,17 +20,26 @@ def upload_to_user_profile(instance, filename):
 
 
 class User(models.Model):
-    profilepicture = models.ImageField(upload_to=upload_to_user_profile, default='profilepic/default.png')
+    profilepicture = models.ImageField(upload_to=upload_to_user_profile, storage=get_media_storage, default='profilepic/default.jpg')
     name = models.CharField(max_length=100)
     email = models.EmailField(unique=True)
     password_hash = models.CharField(max_length=255)  
     aboutme = models.TextField(blank=True, null=True, max_length=255)
     registration_date = models.DateTimeField(auto_now_add=True)
     last_login = models.DateTimeField(null=True, blank=True)
+    # Bumped to revoke every auth token issued so far (see Product.tokens)
+    token_version = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.email
 
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # Users authenticated from token claims only have id/token_version loaded: reading
+        # any other field loads all the deferred ones in one query instead of one per field
+        if fields is not None:
+            fields = set(fields) | self.get_deferred_fields()
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+
     @property
     def is_authenticated(self):
         """
@@ -41,6 +54,8 @@ class Board(models.Model):
     title = models.CharField(max_length=100)
     description = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Set when a large board is soft-deleted and waiting for the background purge
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)
 
     def __str__(self):
         return f"{self.title} ({self.user.email})"
@@ -84,7 +99,6 @@ class BoardMembership(models.Model):
 # Ensure board owner is always recorded as a membership with role=owner
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from django.utils import timezone
 
 
 #   Column
@@ -119,6 +133,14 @@ class Card(models.Model):
 
     class Meta:
         ordering = ["position"]
+        # Card list filters/sorting within a column (see Product.filters)
+        indexes = [
+            models.Index(fields=['column', 'position'], name='card_column_position_idx'),
+            models.Index(fields=['column', 'is_completed', 'due_date'], name='card_column_done_due_idx'),
+            models.Index(fields=['column', 'priority'], name='card_column_priority_idx'),
+            # Cross-board due-date feed (see Product.feeds)
+            models.Index(fields=['due_date', 'is_completed'], name='card_due_done_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.column.title})"
@@ -130,7 +152,7 @@ class Release(models.Model):
 
 
 class CarouselImage(models.Model):
-    image = models.ImageField(upload_to='carousel/')
+    image = models.ImageField(upload_to='carousel/', storage=get_media_storage)
     title = models.CharField(max_length=200, blank=True)
     alt_text = models.CharField(max_length=255, blank=True)
     caption = models.TextField(blank=True)
@@ -148,8 +170,40 @@ class CarouselImage(models.Model):
         return self.title or f"CarouselImage #{self.pk}"
 
 
+class SlowQuery(models.Model):
+    """Queries slower than SLOW_QUERY_MS, one row per SQL shape (see Product.slowqueries)."""
+    shape_hash = models.CharField(max_length=40, unique=True)
+    shape = models.TextField()
+    count = models.PositiveIntegerField(default=0)
+    total_ms = models.FloatField(default=0)
+    max_ms = models.FloatField(default=0)
+    # Latest sample
+    last_ms = models.FloatField(default=0)
+    sql = models.TextField()
+    params = models.TextField(blank=True)
+    view = models.CharField(max_length=200, blank=True)
+    stack = models.TextField(blank=True)
+    explain = models.TextField(blank=True)
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField()
+
+    class Meta:
+        ordering = ["-total_ms"]
+        verbose_name = "Slow Query"
+        verbose_name_plural = "Slow Queries"
+
+    @property
+    def avg_ms(self):
+        return self.total_ms / self.count if self.count else 0.0
+
+    def __str__(self):
+        return self.shape[:80]
+
+
 # Signal handlers moved after model definitions to avoid NameError when importing models
-from django.db.models.signals import post_delete
+from django.db.models.signals import post_delete, post_init
+
+from . import events, realtime
 
 
 @receiver(post_save, sender=Board)
@@ -162,84 +216,152 @@ def ensure_owner_membership(sender, instance: Board, created: bool, **kwargs):
     )
 
 
+def broadcast_to_board(board_id, envelope: dict):
+    """Send an event envelope to the board socket group (see Product.realtime); never raises."""
+    realtime.publish(board_id, envelope)
+
+
+# column id -> board id. Columns never move between boards, so an entry only goes stale
+# when its column is deleted (see column_post_delete and deletion.purge_board).
+_column_boards = {}
+COLUMN_BOARD_CACHE_SIZE = 10000
+
+
+def column_board_id(card: Card):
+    """Board id of ``card`` without loading its column for every card (signal handlers, search)."""
+    if Card.column.is_cached(card):
+        return card.column.board_id
+    board_id = _column_boards.get(card.column_id)
+    if board_id is None:
+        board_id = Column.objects.filter(pk=card.column_id).values_list('board_id', flat=True).first()
+        if board_id is not None:
+            if len(_column_boards) >= COLUMN_BOARD_CACHE_SIZE:
+                _column_boards.clear()
+            _column_boards[card.column_id] = board_id
+    return board_id
+
+
+def forget_column_boards(column_ids=None):
+    if column_ids is None:
+        _column_boards.clear()
+    for column_id in column_ids or ():
+        _column_boards.pop(column_id, None)
+
+
+@receiver(post_init, sender=Card)
+def card_post_init(sender, instance: Card, **kwargs):
+    events.take_snapshot(instance, events.CARD_TRACKED_FIELDS)
+
+
+@receiver(post_init, sender=Column)
+def column_post_init(sender, instance: Column, **kwargs):
+    events.take_snapshot(instance, events.COLUMN_EVENT_FIELDS)
+
+
+@receiver(post_delete, sender=User)
+def user_post_delete(sender, instance: User, **kwargs):
+    """Stop accepting the deleted user's tokens (their cached token_version)."""
+    from .tokens import forget_user
+    forget_user(instance.pk)
+
+
+@receiver(post_save, sender=CarouselImage)
+@receiver(post_delete, sender=CarouselImage)
+def carousel_image_changed(sender, **kwargs):
+    """Invalidate the cached carousel manifest served to the homepage."""
+    from .carousel import invalidate_manifest
+    invalidate_manifest()
+
+
+@receiver(post_save, sender=CarouselImage)
+def carousel_image_derivatives(sender, instance: CarouselImage, **kwargs):
+    """Queue responsive width-bucketed copies of a carousel upload."""
+    from .images import generate_derivatives
+    from .tasks import enqueue
+    if instance.image:
+        enqueue(generate_derivatives, instance.image.name)
+
+
+@receiver(post_save, sender=User)
+def user_profilepicture_derivatives(sender, instance: User, update_fields=None, **kwargs):
+    """Queue avatar thumbnails for the profile picture (existing ones are skipped)."""
+    if update_fields is not None and 'profilepicture' not in update_fields:
+        return
+    from .images import generate_derivatives
+    from .tasks import enqueue
+    if instance.profilepicture:
+        enqueue(generate_derivatives, instance.profilepicture.name, avatar=True)
+
+
 @receiver(post_save, sender=Card)
-def card_post_save(sender, instance: Card, created: bool, **kwargs):
-    """Emit board socket event when a card is created or updated."""
-    payload = {
-        'event': 'card.created' if created else 'card.updated',
-        'data': {
-            'id': instance.id,
-            'column_id': instance.column_id,
-            'title': instance.title,
-            'description': instance.description,
-            'position': instance.position,
-            'is_completed': instance.is_completed,
-            'priority': instance.priority,
-            'timestamp': timezone.now().isoformat(),
-        }
-    }
-    try:
-        # send via channels if available; keep silent if channels not installed
-        from channels.layers import get_channel_layer
-        from asgiref.sync import async_to_sync
-        channel_layer = get_channel_layer()
-        group = f'board_{instance.column.board_id}'
-        async_to_sync(channel_layer.group_send)(group, {'type': 'broadcast', 'payload': payload})
-    except Exception:
-        # No channels available or send failed: ignore for now
-        pass
+def card_post_save(sender, instance: Card, created: bool, update_fields=None, **kwargs):
+    """Emit board socket event when a card is created or updated.
+
+    Updates only carry the fields that changed since the instance was loaded (or last
+    saved); a save that changes nothing is not broadcast.
+    """
+    changed = None
+    if not created:
+        changed = events.changed_fields(instance, events.CARD_TRACKED_FIELDS, update_fields)
+    events.take_snapshot(instance, events.CARD_TRACKED_FIELDS)
+    if changed is not None and not changed:
+        return
+    board_id = column_board_id(instance)
+    broadcast_to_board(board_id, events.card_event(instance, created, changed=changed))
+    from .stats import invalidate_board_stats
+    invalidate_board_stats(board_id)
+    if created or {'title', 'description', 'column_id'} & set(changed or ()):
+        from .search import index_instance
+        index_instance(instance)
 
 
 @receiver(post_save, sender=Column)
-def column_post_save(sender, instance: Column, created: bool, **kwargs):
-    """Emit board socket event when a column is created or updated."""
-    payload = {
-        'event': 'column.created' if created else 'column.updated',
-        'data': {
-            'id': instance.id,
-            'title': instance.title,
-            'position': instance.position,
-            'color': instance.color,
-            'timestamp': timezone.now().isoformat(),
-        }
-    }
-    try:
-        from channels.layers import get_channel_layer
-        from asgiref.sync import async_to_sync
-        channel_layer = get_channel_layer()
-        group = f'board_{instance.board_id}'
-        async_to_sync(channel_layer.group_send)(group, {'type': 'broadcast', 'payload': payload})
-    except Exception:
-        pass
+def column_post_save(sender, instance: Column, created: bool, update_fields=None, **kwargs):
+    """Emit board socket event when a column is created or updated (diffed like cards)."""
+    if created:
+        # also replaces an entry left behind by a rolled back column with the same id
+        _column_boards[instance.pk] = instance.board_id
+    changed = None
+    if not created:
+        changed = events.changed_fields(instance, events.COLUMN_EVENT_FIELDS, update_fields)
+    events.take_snapshot(instance, events.COLUMN_EVENT_FIELDS)
+    if changed is not None and not changed:
+        return
+    broadcast_to_board(instance.board_id, events.column_event(instance, created, changed=changed))
+    from .stats import invalidate_board_stats
+    invalidate_board_stats(instance.board_id)
+    if created or 'title' in (changed or ()):
+        from .search import index_instance
+        index_instance(instance)
 
 
 @receiver(post_delete, sender=Card)
 def card_post_delete(sender, instance: Card, **kwargs):
-    payload = {
-        'event': 'card.deleted',
-        'data': {'id': instance.id, 'column_id': instance.column_id, 'timestamp': timezone.now().isoformat()}
-    }
-    try:
-        from channels.layers import get_channel_layer
-        from asgiref.sync import async_to_sync
-        channel_layer = get_channel_layer()
-        group = f'board_{instance.column.board_id}'
-        async_to_sync(channel_layer.group_send)(group, {'type': 'broadcast', 'payload': payload})
-    except Exception:
-        pass
+    board_id = column_board_id(instance)
+    broadcast_to_board(board_id, events.build_event('card.deleted', {'id': instance.id, 'column_id': instance.column_id}))
+    from .search import unindex_instance
+    from .stats import invalidate_board_stats
+    unindex_instance(instance)
+    invalidate_board_stats(board_id)
 
 
 @receiver(post_delete, sender=Column)
 def column_post_delete(sender, instance: Column, **kwargs):
-    payload = {
-        'event': 'column.deleted',
-        'data': {'id': instance.id, 'timestamp': timezone.now().isoformat()}
-    }
-    try:
-        from channels.layers import get_channel_layer
-        from asgiref.sync import async_to_sync
-        channel_layer = get_channel_layer()
-        group = f'board_{instance.board_id}'
-        async_to_sync(channel_layer.group_send)(group, {'type': 'broadcast', 'payload': payload})
-    except Exception:
-        pass
+    broadcast_to_board(instance.board_id, events.build_event('column.deleted', {'id': instance.id}))
+    from .search import unindex_instance
+    from .stats import invalidate_board_stats
+    unindex_instance(instance)
+    invalidate_board_stats(instance.board_id)
+    forget_column_boards([instance.id])
+
+
+@receiver(post_save, sender=Board)
+def board_search_index(sender, instance: Board, **kwargs):
+    from .search import index_instance
+    index_instance(instance)
+
+
+@receiver(post_delete, sender=Board)
+def board_search_unindex(sender, instance: Board, **kwargs):
+    from .search import forget_board
+    forget_board(instance.pk)
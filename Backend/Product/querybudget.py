@@ -0,0 +1,110 @@
+"""Query budgets and N+1 detection.
+
+- ``query_budget(n, max_repeats=None)``: context manager / decorator for tests
+  that fails with ``QueryBudgetExceeded`` when the block runs more than ``n``
+  queries, or the same SQL shape more than ``max_repeats`` times.
+- Views declare their budgets: ``query_budgets = {'list': 3, ...}`` on viewsets
+  (keyed by action), or ``@budget(n)`` on function views. ``QueryBudgetMiddleware``
+  checks them on every request and flags repeated identical SQL shapes (the
+  N+1 signature). It only logs, unless ``QUERY_BUDGET_STRICT`` is on, in which
+  case it raises so test runs fail. It is opt-in: add it to MIDDLEWARE in
+  development, or enable ``QUERY_BUDGET_CHECKS``.
+
+Shapes ignore literal values and the length of IN lists, so ``WHERE id = 1`` and
+``WHERE id = 2`` count as the same query.
+"""
+import re
+from collections import Counter
+from contextlib import ContextDecorator
+
+from django.db import connection
+
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_RE = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?|NULL)\s*,?)+\)', re.IGNORECASE)
+_SPACE_RE = re.compile(r'\s+')
+# Transaction control differs between autocommit (BEGIN) and test transactions (SAVEPOINT)
+_TRANSACTION_RE = re.compile(r'^\s*(BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE\s+SAVEPOINT)\b', re.IGNORECASE)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def sql_shape(sql) -> str:
+    """Normalize ``sql`` so queries differing only in parameters compare equal."""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _SPACE_RE.sub(' ', sql)
+    return _IN_RE.sub('IN (...)', sql).strip()
+
+
+class QueryRecorder:
+    """``connection.execute_wrapper`` callable that keeps the SQL shapes it sees (transaction control excluded)."""
+
+    def __init__(self):
+        self.shapes = Counter()
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if _TRANSACTION_RE.match(sql):
+            return execute(sql, params, many, context)
+        self.count += 1
+        self.shapes[sql_shape(sql)] += 1
+        return execute(sql, params, many, context)
+
+    def repeated(self, threshold):
+        """Shapes executed more than ``threshold`` times, most frequent first."""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n > threshold]
+
+
+def check(recorder, max_queries=None, max_repeats=None, label='block'):
+    """Return a list of human readable problems (empty when within budget)."""
+    problems = []
+    if max_queries is not None and recorder.count > max_queries:
+        problems.append(f'{label} ran {recorder.count} queries (budget {max_queries})')
+    if max_repeats is not None:
+        for shape, n in recorder.repeated(max_repeats):
+            problems.append(f'{label} repeated {n}x: {shape[:300]}')
+    return problems
+
+
+class query_budget(ContextDecorator):
+    """Fail when the wrapped block exceeds ``max_queries`` or repeats a shape over ``max_repeats`` times."""
+
+    def __init__(self, max_queries=None, max_repeats=None):
+        self.max_queries = max_queries
+        self.max_repeats = max_repeats
+
+    def __enter__(self):
+        self.recorder = QueryRecorder()
+        self._wrapper = connection.execute_wrapper(self.recorder)
+        self._wrapper.__enter__()
+        return self.recorder
+
+    def __exit__(self, exc_type, exc, tb):
+        self._wrapper.__exit__(exc_type, exc, tb)
+        if exc_type is None:
+            problems = check(self.recorder, self.max_queries, self.max_repeats)
+            if problems:
+                raise QueryBudgetExceeded('; '.join(problems))
+        return False
+
+
+def budget(max_queries):
+    """Declare the query budget of a function view."""
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+def view_budget(view_func, method):
+    """Budget declared for ``view_func`` handling ``method``, or None."""
+    cls = getattr(view_func, 'cls', None)
+    budgets = getattr(cls, 'query_budgets', None)
+    if budgets:
+        action = (getattr(view_func, 'actions', None) or {}).get(method.lower())
+        return budgets.get(action)
+    return getattr(view_func, 'query_budget', None)
@@ -0,0 +1,181 @@
+"""Board event publisher used by the model signal handlers.
+
+``publish(board_id, envelope)`` hands an event to the channel layer of board
+group ``board_<id>``. The layer is resolved once per process. Two delivery modes:
+
+- network layers (Redis): the event is queued for a daemon thread that owns a
+  long-lived event loop and sends events in order. The saving thread only pays
+  for a ``call_soon_threadsafe`` (microseconds) instead of an ``async_to_sync``
+  round trip (a new loop or a hop to the server loop, milliseconds).
+- ``InMemoryChannelLayer``: its queues belong to the server's event loop, so
+  events are sent inline through one cached ``async_to_sync`` wrapper.
+
+Sends never raise. Failures and events dropped because the queue is full
+(``REALTIME_QUEUE_SIZE``) are logged and counted in
+``cardtrack_ws_dropped_events_total``. ``flush()`` waits for queued events
+(used at exit and in tests). ``reset()`` forgets the layer and stops the thread;
+it runs when CHANNEL_LAYERS changes.
+"""
+import asyncio
+import atexit
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from . import events, metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 10000
+_UNRESOLVED = object()
+
+
+def _record_failure(name, board_id, exc):
+    metrics.ws_dropped.inc({'event': name, 'reason': type(exc).__name__})
+    logger.warning("Dropped realtime event %s for board %s: %r", name, board_id, exc)
+
+
+class _Sender:
+    """Daemon thread running an event loop that drains a FIFO of (board_id, envelope)."""
+
+    def __init__(self, layer, maxsize):
+        self.layer = layer
+        self.loop = asyncio.new_event_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.task = self.loop.create_task(self._drain())
+        self.thread = threading.Thread(target=self._run, name='cardtrack-realtime', daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self.task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.loop.close()
+
+    async def _drain(self):
+        while True:
+            board_id, envelope = await self.queue.get()
+            name = envelope.get('e', 'unknown')
+            start = time.perf_counter()
+            try:
+                await self.layer.group_send(f'board_{board_id}', {'type': 'broadcast', 'payload': envelope})
+            except Exception as exc:
+                _record_failure(name, board_id, exc)
+            else:
+                metrics.ws_group_send.observe(time.perf_counter() - start, {'event': name})
+            finally:
+                self.queue.task_done()
+
+    def _enqueue(self, board_id, envelope):
+        try:
+            self.queue.put_nowait((board_id, envelope))
+        except asyncio.QueueFull:
+            metrics.ws_dropped.inc({'event': envelope.get('e', 'unknown'), 'reason': 'queue_full'})
+            logger.warning("Realtime queue full, dropped %s for board %s", envelope.get('e'), board_id)
+
+    def submit(self, board_id, envelope):
+        self.loop.call_soon_threadsafe(self._enqueue, board_id, envelope)
+
+    def flush(self, timeout):
+        asyncio.run_coroutine_threadsafe(self.queue.join(), self.loop).result(timeout)
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.task.cancel)
+        self.thread.join(1)
+
+
+class Publisher:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._layer = _UNRESOLVED
+        self._send_inline = None
+        self._sender = None
+
+    def _resolve(self):
+        with self._lock:
+            if self._layer is not _UNRESOLVED and self._pid == os.getpid():
+                return
+            # first event in this process (or after a fork): threads and loops do not survive forks
+            try:
+                from channels.layers import InMemoryChannelLayer, get_channel_layer
+                from asgiref.sync import async_to_sync
+                layer = get_channel_layer()
+            except ImportError:
+                layer = None
+            self._sender = None
+            self._send_inline = None
+            if layer is not None:
+                if isinstance(layer, InMemoryChannelLayer):
+                    self._send_inline = async_to_sync(layer.group_send)
+                else:
+                    self._sender = _Sender(layer, getattr(settings, 'REALTIME_QUEUE_SIZE', DEFAULT_QUEUE_SIZE))
+            self._layer = layer
+            self._pid = os.getpid()
+
+    def publish(self, board_id, envelope: dict):
+        if events.events_suppressed():
+            return
+        name = envelope.get('e', 'unknown')
+        metrics.ws_events.inc({'board': board_id, 'event': name})
+        if self._layer is _UNRESOLVED or self._pid != os.getpid():
+            self._resolve()
+        sender, send_inline = self._sender, self._send_inline
+        if sender is not None:
+            try:
+                sender.submit(board_id, envelope)
+            except RuntimeError as exc:  # loop closed by a concurrent reset()
+                _record_failure(name, board_id, exc)
+            return
+        if send_inline is None:
+            # Channels not installed or not configured (USE_CHANNELS off): nobody to deliver to
+            metrics.ws_dropped.inc({'event': name, 'reason': 'no_channel_layer'})
+            return
+        start = time.perf_counter()
+        try:
+            send_inline(f'board_{board_id}', {'type': 'broadcast', 'payload': envelope})
+        except Exception as exc:
+            _record_failure(name, board_id, exc)
+        else:
+            metrics.ws_group_send.observe(time.perf_counter() - start, {'event': name})
+
+    def flush(self, timeout=5):
+        sender = self._sender
+        if sender is not None and self._pid == os.getpid():
+            sender.flush(timeout)
+
+    def reset(self):
+        with self._lock:
+            if self._sender is not None and self._pid == os.getpid():
+                self._sender.stop()
+            self._sender = None
+            self._send_inline = None
+            self._layer = _UNRESOLVED
+
+
+_publisher = Publisher()
+publish = _publisher.publish
+flush = _publisher.flush
+reset = _publisher.reset
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        flush(timeout=2)
+    except Exception:
+        pass
+
+
+@receiver(setting_changed)
+def _channel_layers_changed(setting, **kwargs):
+    if setting in ('CHANNEL_LAYERS', 'REALTIME_QUEUE_SIZE'):
+        reset()
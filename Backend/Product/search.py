@@ -0,0 +1,232 @@
+"""Full-text search over boards, columns and cards.
+
+``search(user, query)`` returns the boards, columns and cards matching every
+word of ``query`` (as a prefix), limited to boards the user owns or is a member of.
+
+- MySQL: ``MATCH ... AGAINST`` in boolean mode on the FULLTEXT indexes created by
+  migration 0017 (Board.title, Column.title, Card.title + description).
+- Other databases (SQLite dev/test runs): an in-process inverted index, built on
+  the first search and kept up to date by the model signal handlers (models.py)
+  and by the bulk board operations (import, duplicate, purge). It is per process,
+  so it is only meant for single-process setups.
+"""
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+
+from django.db import connection, models
+from django.db.models import F
+from django.db.models.expressions import RawSQL
+
+from .models import Board, Column, Card, column_board_id
+
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+KINDS = ('boards', 'columns', 'cards')
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text) -> list:
+    """Lowercase, accent-insensitive words of ``text`` (like MySQL's *_ai_ci collations)."""
+    if not text:
+        return []
+    text = unicodedata.normalize('NFKD', str(text).lower())
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return _TOKEN_RE.findall(text)
+
+
+def uses_fulltext() -> bool:
+    return connection.vendor == 'mysql'
+
+
+def accessible_board_ids(user):
+    return (
+        Board.objects
+        .filter(deleted_at__isnull=True)
+        .filter(models.Q(user=user) | models.Q(memberships__user=user))
+        .values_list('id', flat=True)
+        .distinct()
+    )
+
+
+class InvertedIndex:
+    """token -> ids postings per kind, plus each document's board and tokens for updates."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.built = False
+        self.postings = {kind: defaultdict(set) for kind in KINDS}
+        self.docs = {kind: {} for kind in KINDS}
+
+    def clear(self):
+        with self.lock:
+            self.built = False
+            for kind in KINDS:
+                self.postings[kind].clear()
+                self.docs[kind].clear()
+
+    def add(self, kind, doc_id, board_id, *texts):
+        tokens = frozenset(t for text in texts for t in tokenize(text))
+        with self.lock:
+            self.remove(kind, doc_id)
+            self.docs[kind][doc_id] = (board_id, tokens)
+            postings = self.postings[kind]
+            for token in tokens:
+                postings[token].add(doc_id)
+
+    def remove(self, kind, doc_id):
+        with self.lock:
+            doc = self.docs[kind].pop(doc_id, None)
+            if doc is None:
+                return
+            postings = self.postings[kind]
+            for token in doc[1]:
+                ids = postings.get(token)
+                if ids is not None:
+                    ids.discard(doc_id)
+                    if not ids:
+                        del postings[token]
+
+    def remove_board(self, board_id):
+        with self.lock:
+            for kind in KINDS:
+                for doc_id in [i for i, doc in self.docs[kind].items() if doc[0] == board_id]:
+                    self.remove(kind, doc_id)
+
+    def _matching(self, kind, token):
+        postings = self.postings[kind]
+        found = set(postings.get(token, ()))
+        for candidate, ids in postings.items():
+            if candidate != token and candidate.startswith(token):
+                found |= ids
+        return found
+
+    def query(self, kind, tokens, board_ids, limit):
+        """Newest ``limit`` ids of ``kind`` containing every token (prefix match) on ``board_ids``."""
+        with self.lock:
+            ids = None
+            for token in sorted(set(tokens), key=len, reverse=True):
+                matched = self._matching(kind, token)
+                ids = matched if ids is None else ids & matched
+                if not ids:
+                    return []
+            docs = self.docs[kind]
+            return sorted((i for i in ids if docs[i][0] in board_ids), reverse=True)[:limit]
+
+
+_index = InvertedIndex()
+
+
+def _index_board(board_id):
+    """(Re)index one board with its columns and cards from the database."""
+    for pk, title in Board.objects.filter(pk=board_id, deleted_at__isnull=True).values_list('id', 'title'):
+        _index.add('boards', pk, pk, title)
+    for pk, title in Column.objects.filter(board_id=board_id).values_list('id', 'title'):
+        _index.add('columns', pk, board_id, title)
+    cards = Card.objects.filter(column__board_id=board_id).values_list('id', 'title', 'description')
+    for pk, title, description in cards.iterator(chunk_size=2000):
+        _index.add('cards', pk, board_id, title, description)
+
+
+def _ensure_index():
+    if _index.built:
+        return
+    with _index.lock:
+        if _index.built:
+            return
+        for pk, title in Board.objects.filter(deleted_at__isnull=True).values_list('id', 'title'):
+            _index.add('boards', pk, pk, title)
+        for pk, board_id, title in Column.objects.values_list('id', 'board_id', 'title').iterator(chunk_size=2000):
+            _index.add('columns', pk, board_id, title)
+        cards = Card.objects.values_list('id', 'column__board_id', 'title', 'description')
+        for pk, board_id, title, description in cards.iterator(chunk_size=2000):
+            _index.add('cards', pk, board_id, title, description)
+        _index.built = True
+
+
+def _maintained():
+    return _index.built and not uses_fulltext()
+
+
+def index_instance(instance):
+    """Update the fallback index for a saved Board, Column or Card (no-op until the index is built)."""
+    if not _maintained():
+        return
+    if isinstance(instance, Card):
+        _index.add('cards', instance.pk, column_board_id(instance), instance.title, instance.description)
+    elif isinstance(instance, Column):
+        _index.add('columns', instance.pk, instance.board_id, instance.title)
+    elif isinstance(instance, Board):
+        if instance.deleted_at is None:
+            _index.add('boards', instance.pk, instance.pk, instance.title)
+        else:
+            _index.remove_board(instance.pk)
+
+
+def unindex_instance(instance):
+    if not _maintained():
+        return
+    kind = {Card: 'cards', Column: 'columns', Board: 'boards'}.get(type(instance))
+    if kind:
+        _index.remove(kind, instance.pk)
+
+
+def reindex_board(board_id):
+    """Refresh a board after bulk writes that bypass model signals (import, duplicate, templates)."""
+    if _maintained():
+        _index_board(board_id)
+
+
+def forget_board(board_id):
+    """Drop a purged board from the fallback index."""
+    if _maintained():
+        _index.remove_board(board_id)
+
+
+def _fulltext(model, columns, tokens):
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    match = ', '.join(f'{table}.{quote(c)}' for c in columns)
+    against = ' '.join(f'+{token}*' for token in tokens)
+    return RawSQL(f'MATCH ({match}) AGAINST (%s IN BOOLEAN MODE)', (against,), output_field=models.FloatField())
+
+
+def _querysets(board_ids):
+    return {
+        'boards': (Board.objects.filter(id__in=board_ids).values('id', 'title'), ('title',)),
+        'columns': (Column.objects.filter(board_id__in=board_ids).values('id', 'title', 'board_id'), ('title',)),
+        'cards': (
+            Card.objects.filter(column__board_id__in=board_ids)
+            .values('id', 'title', 'description', 'column_id', 'priority', 'is_completed', 'due_date',
+                    board_id=F('column__board_id')),
+            ('title', 'description'),
+        ),
+    }
+
+
+def search(user, query, limit=DEFAULT_LIMIT) -> dict:
+    """Return ``{'boards': [...], 'columns': [...], 'cards': [...]}`` for ``query`` (plain dicts)."""
+    tokens = tokenize(query)
+    results = {kind: [] for kind in KINDS}
+    if not tokens:
+        return results
+    limit = max(1, min(int(limit), MAX_LIMIT))
+    board_ids = accessible_board_ids(user)
+
+    if uses_fulltext():
+        for kind, (qs, columns) in _querysets(board_ids).items():
+            model = qs.model
+            score = _fulltext(model, columns, tokens)
+            results[kind] = list(qs.annotate(score=score).filter(score__gt=0).order_by('-score', '-id')[:limit])
+        return results
+
+    _ensure_index()
+    allowed = set(board_ids)
+    for kind, (qs, _columns) in _querysets(allowed).items():
+        ids = _index.query(kind, tokens, allowed, limit)
+        rows = {row['id']: row for row in qs.filter(id__in=ids)} if ids else {}
+        results[kind] = [rows[i] for i in ids if i in rows]
+    return results
@@ -1,11 +1,68 @@
 from rest_framework import serializers
 from django.contrib.auth.hashers import make_password
+from django.core.files.storage import default_storage
+from django.utils.encoding import filepath_to_uri
 from .models import User, Board, Column, Card, CarouselImage
 from .models import BoardMembership
 from .models import Release
+from . import images
+from . import tasks
+from . import metrics
+from . import tokens
+
+
+DEFAULT_PROFILEPICTURE_URL_NAME = User._meta.get_field('profilepicture').default
+PROFILEPICTURE_STORAGE = User._meta.get_field('profilepicture').storage
+
+
+def _media_url_builder(request, storage=None):
+    """Map storage names to URLs, absolute when a request is available.
+
+    The absolute media base of each storage is computed once per request and URLs
+    are memoized on it, so serializing a thousand members costs one
+    ``build_absolute_uri`` call.
+    """
+    storage = storage or default_storage
+    if not request:
+        return storage.url
+    http_request = getattr(request, '_request', request)
+    builders = getattr(http_request, '_media_url_builders', None)
+    if builders is None:
+        builders = http_request._media_url_builders = {}
+    url_for = builders.get(storage.base_url)
+    if url_for is None:
+        base = request.build_absolute_uri(storage.base_url)
+        urls = {}
+
+        def url_for(name):
+            name = str(name)
+            url = urls.get(name)
+            if url is None:
+                url = urls[name] = base + filepath_to_uri(name).lstrip('/')
+            return url
+
+        builders[storage.base_url] = url_for
+    return url_for
+
+
+class MediaImageField(serializers.ImageField):
+    """ImageField for uploads whose output is the file's URL from ``_media_url_builder``."""
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        return _media_url_builder(self.context.get('request'), value.storage)(value.name)
+
+
+class TimedSerializerMixin:
+    """Count to_representation time into the request's 'serialize' timing (see Product.metrics)."""
+
+    def to_representation(self, instance):
+        with metrics.span('serialize'):
+            return super().to_representation(instance)
 
 
-class CardSerializer(serializers.ModelSerializer):
+class CardSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Card
         fields = '__all__'
@@ -24,7 +81,7 @@ class CardSerializer(serializers.ModelSerializer):
                 self.fields['column'].queryset = Column.objects.filter(board_id=board_pk)
 
 
-class ColumnSerializer(serializers.ModelSerializer):
+class ColumnSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     cards = CardSerializer(many=True, read_only=True) 
 
     class Meta:
@@ -35,7 +92,7 @@ class ColumnSerializer(serializers.ModelSerializer):
         }
 
 
-class BoardSerializer(serializers.ModelSerializer):
+class BoardSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     columns = ColumnSerializer(many=True, read_only=True)
 
     class Meta:
@@ -46,10 +103,10 @@ class BoardSerializer(serializers.ModelSerializer):
         }
 
 
-class BoardMembershipSerializer(serializers.ModelSerializer):
+class BoardMembershipSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     # Expose convenient read-only user fields so frontend can show name/email/avatar
-    user_name = serializers.SerializerMethodField(read_only=True)
-    user_email = serializers.SerializerMethodField(read_only=True)
+    user_name = serializers.CharField(source='user.name', read_only=True)
+    user_email = serializers.CharField(source='user.email', read_only=True)
     user_profilepicture = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
@@ -62,40 +119,26 @@ class BoardMembershipSerializer(serializers.ModelSerializer):
             'user': {'required': False}
         }
 
-    def get_user_name(self, obj):
-        try:
-            return obj.user.name
-        except Exception:
+    def get_user_profilepicture(self, obj):
+        # Absolute URL when a request is present, otherwise the media path
+        if not obj.user.profilepicture:
             return None
+        picture = obj.user.profilepicture
+        return _media_url_builder(self.context.get('request'), picture.storage)(picture.name)
 
-    def get_user_email(self, obj):
-        try:
-            return obj.user.email
-        except Exception:
-            return None
 
-    def get_user_profilepicture(self, obj):
-        # Return an absolute URL when request is present, otherwise the stored path
-        try:
-            request = self.context.get('request')
-            if obj.user.profilepicture and request:
-                return request.build_absolute_uri(obj.user.profilepicture.url)
-            if obj.user.profilepicture:
-                return getattr(obj.user.profilepicture, 'url', None) or obj.user.profilepicture
-        except Exception:
-            pass
-        return None
-
-
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     # password is write-only and optional for updates
     password = serializers.CharField(write_only=True, required=False, allow_blank=True)
+    profilepicture = MediaImageField(required=False)
     # Provide an absolute URL for the frontend to display the profile image safely
     profilepicture_url = serializers.SerializerMethodField(read_only=True)
+    # Square avatar thumbnails as srcset strings: {"webp": "... 64w, ...", "jpeg": ...}
+    profilepicture_srcset = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = User
-        fields = ["profilepicture","profilepicture_url","id", "name", "email", "password", "aboutme", "registration_date", "last_login"]
+        fields = ["profilepicture","profilepicture_url","profilepicture_srcset","id", "name", "email", "password", "aboutme", "registration_date", "last_login"]
         extra_kwargs = {
             "password": {"write_only": True}
         }
@@ -104,16 +147,8 @@ class UserSerializer(serializers.ModelSerializer):
         password = validated_data.pop("password", None)
         if password:
             validated_data["password_hash"] = make_password(password)
-        # Avoid saving a file named like the default image (which could overwrite it)
-        pf = validated_data.get('profilepicture')
-        if pf and hasattr(pf, 'name'):
-            name = pf.name or ''
-            lname = name.lower()
-            if lname.startswith('default') or lname in ('profilepic/default.png', 'profilepic/default.jpg', 'default.png', 'default.jpg'):
-                import time, os
-                ext = os.path.splitext(name)[1] or ''
-                pf.name = f"user_new_{int(time.time())}{ext}"
-                validated_data['profilepicture'] = pf
+        # Uploads are stored under their content hash (Product.storage), so a file named
+        # like the default image can never overwrite it.
         return super().create(validated_data)
 
     def update(self, instance, validated_data):
@@ -121,57 +156,53 @@ class UserSerializer(serializers.ModelSerializer):
         password = validated_data.pop("password", None)
         if password:
             instance.password_hash = make_password(password)
-            instance.save()
-        # If a new profile picture is uploaded with a reserved filename (e.g. 'default.png'),
-        # rename it to avoid overwriting the default image and to avoid confusing file placements.
+            instance.save(update_fields=['password_hash'])
+            # A new password invalidates every token issued with the old one
+            tokens.revoke_tokens(instance)
         pf = validated_data.get('profilepicture')
-        if pf and hasattr(pf, 'name'):
-            name = pf.name or ''
-            lname = name.lower()
-            if lname.startswith('default') or lname in ('profilepic/default.png', 'profilepic/default.jpg', 'default.png', 'default.jpg'):
-                import time, os
-                ext = os.path.splitext(name)[1] or ''
-                pf.name = f"user_{instance.id}_{int(time.time())}{ext}"
-                validated_data['profilepicture'] = pf
-
-        return super().update(instance, validated_data)
+        old_picture = instance.profilepicture.name if instance.profilepicture else None
+        instance = super().update(instance, validated_data)
+        # Old file cleanup (and thumbnailing, see models) happens off the request
+        if pf and old_picture and old_picture != instance.profilepicture.name:
+            tasks.enqueue(images.remove_unused_profilepicture, old_picture)
+        return instance
 
     def get_profilepicture_url(self, obj):
-        try:
-            request = self.context.get('request')
-            if obj.profilepicture and request:
-                return request.build_absolute_uri(obj.profilepicture.url)
-            if obj.profilepicture:
-                return getattr(obj.profilepicture, 'url', None) or obj.profilepicture
-        except Exception:
-            pass
-        # Fallback to a default media path (the frontend should request an absolute URL via API where possible)
-        try:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri('/media/profilepic/default.jpg')
-        except Exception:
-            return '/media/profilepic/default.jpg'
-
-
-class CarouselImageSerializer(serializers.ModelSerializer):
+        # Fallback to the default image when the user has none
+        name = obj.profilepicture.name if obj.profilepicture else DEFAULT_PROFILEPICTURE_URL_NAME
+        return _media_url_builder(self.context.get('request'), PROFILEPICTURE_STORAGE)(name)
+
+    def get_profilepicture_srcset(self, obj):
+        # The shared default picture has no thumbnails; the plain URL is enough for it
+        if not obj.profilepicture or obj.profilepicture.name == DEFAULT_PROFILEPICTURE_URL_NAME:
+            return None
+        # Derivatives live in default_storage under fixed names (see Product.images)
+        return images.ready_srcset(obj.profilepicture.name, _media_url_builder(self.context.get('request')), avatar=True)
+
+
+class CarouselImageSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    image = MediaImageField()
     image_url = serializers.SerializerMethodField()
+    # Width-bucketed derivatives as srcset strings: {"webp": "... 480w, ...", "jpeg": ...}
+    image_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = CarouselImage
-        fields = ['id', 'image', 'image_url', 'title', 'alt_text', 'caption', 'link_url', 'is_active', 'position', 'created_at']
-        read_only_fields = ['id', 'image_url', 'created_at']
+        fields = ['id', 'image', 'image_url', 'image_srcset', 'title', 'alt_text', 'caption', 'link_url', 'is_active', 'position', 'created_at']
+        read_only_fields = ['id', 'image_url', 'image_srcset', 'created_at']
+
+    def get_image_srcset(self, obj):
+        if not obj.image:
+            return None
+        return images.ready_srcset(obj.image.name, _media_url_builder(self.context.get('request')))
 
     def get_image_url(self, obj):
-        request = self.context.get('request')
-        if obj.image and request:
-            return request.build_absolute_uri(obj.image.url)
-        if obj.image:
-            return obj.image.url
-        return None
+        if not obj.image:
+            return None
+        return _media_url_builder(self.context.get('request'), obj.image.storage)(obj.image.name)
 
 
-class ReleaseSerializer(serializers.ModelSerializer):
+class ReleaseSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Release
         fields = ['id', 'release_title', 'release_description', 'release_date']
@@ -0,0 +1,197 @@
+"""Slow query log with EXPLAIN capture.
+
+``SlowQueryHook`` runs as an ``execute_wrapper`` on every database connection
+(installed from ``ProductConfig.ready``). A query slower than ``SLOW_QUERY_MS``
+is logged with its SQL, parameters, duration, originating view and the
+application frames that issued it. It is then stored in ``SlowQuery``, one row
+per SQL shape (see ``querybudget.sql_shape``), with hit count, total and max time
+and the latest sample.
+
+For SELECTs the plan is captured too (``EXPLAIN``, or ``EXPLAIN QUERY PLAN`` on
+SQLite). To keep this affordable in production:
+
+- only ``SLOW_QUERY_SAMPLE_RATE`` of the slow queries are recorded
+- a shape is explained at most once per ``SLOW_QUERY_EXPLAIN_INTERVAL`` seconds
+  per process
+
+Parameters can hold emails or password hashes, so they are only logged and
+stored with ``SLOW_QUERY_LOG_PARAMS`` on; otherwise just their count is kept.
+EXPLAIN still runs with the real values.
+
+The fast path costs two ``perf_counter`` calls per query. ``SLOW_QUERY_MS = 0``
+turns the hook off.
+"""
+import contextvars
+import hashlib
+import logging
+import os
+import random
+import threading
+import time
+import traceback
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.backends.signals import connection_created
+
+from .querybudget import sql_shape
+
+logger = logging.getLogger(__name__)
+
+MAX_TEXT = 10000
+STACK_DEPTH = 12
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# View handling the current request, set by PerformanceMiddleware
+current_view = contextvars.ContextVar('cardtrack_current_view', default='')
+# True while the hook itself talks to the database (EXPLAIN, storing the row)
+_recording = contextvars.ContextVar('cardtrack_slow_query_recording', default=False)
+
+_explained = {}
+_explained_lock = threading.Lock()
+
+
+def _threshold():
+    return getattr(settings, 'SLOW_QUERY_MS', 0) / 1000
+
+
+def _sampled():
+    rate = getattr(settings, 'SLOW_QUERY_SAMPLE_RATE', 1.0)
+    return rate >= 1 or random.random() < rate
+
+
+def shown_params(params) -> str:
+    """``params`` for logs and storage: the values only when SLOW_QUERY_LOG_PARAMS is on."""
+    if getattr(settings, 'SLOW_QUERY_LOG_PARAMS', False):
+        return repr(params)
+    try:
+        count = len(params)
+    except TypeError:
+        count = 0 if params is None else 1
+    return f'<{count} redacted>'
+
+
+def app_stack() -> str:
+    """Frames from this project (not Django or other libraries), innermost last."""
+    frames = [
+        frame for frame in traceback.extract_stack()
+        if frame.filename.startswith(_APP_ROOT) and frame.filename != __file__ and 'site-packages' not in frame.filename
+    ]
+    return ''.join(traceback.format_list(frames[-STACK_DEPTH:]))
+
+
+def _due_for_explain(shape_hash) -> bool:
+    interval = getattr(settings, 'SLOW_QUERY_EXPLAIN_INTERVAL', 300)
+    now = time.monotonic()
+    with _explained_lock:
+        last = _explained.get(shape_hash)
+        if last is not None and now - last < interval:
+            return False
+        _explained[shape_hash] = now
+        return True
+
+
+def explain(connection, sql, params) -> str:
+    """Plan of a SELECT as text; empty for other statements or when EXPLAIN fails."""
+    if sql.lstrip()[:6].upper() != 'SELECT':
+        return ''
+    prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            columns = [col[0] for col in cursor.description or ()]
+            rows = cursor.fetchall()
+    except Exception as exc:
+        return f'EXPLAIN failed: {exc!r}'
+    lines = ['\t'.join(columns)] if columns else []
+    lines.extend('\t'.join('' if value is None else str(value) for value in row) for row in rows)
+    return '\n'.join(lines)
+
+
+def record(connection, sql, params, duration, view, stack):
+    """Store one slow query sample, aggregated per SQL shape."""
+    from django.db.models import F
+    from django.db.models.functions import Greatest
+    from django.utils import timezone
+
+    from .models import SlowQuery
+
+    shape = sql_shape(sql)
+    shape_hash = hashlib.sha1(shape.encode()).hexdigest()
+    ms = duration * 1000
+    plan = explain(connection, sql, params) if _due_for_explain(shape_hash) else None
+    sample = {
+        'sql': sql[:MAX_TEXT],
+        'params': shown_params(params)[:MAX_TEXT],
+        'view': view[:200],
+        'stack': stack[:MAX_TEXT],
+        'last_ms': ms,
+        'last_seen': timezone.now(),
+    }
+    if plan is not None:
+        sample['explain'] = plan[:MAX_TEXT]
+    updated = SlowQuery.objects.using(connection.alias).filter(shape_hash=shape_hash).update(
+        count=F('count') + 1,
+        total_ms=F('total_ms') + ms,
+        max_ms=Greatest(F('max_ms'), ms),
+        **sample,
+    )
+    if not updated:
+        SlowQuery.objects.using(connection.alias).bulk_create(
+            [SlowQuery(shape_hash=shape_hash, shape=shape[:MAX_TEXT], count=1, total_ms=ms, max_ms=ms, **sample)],
+            ignore_conflicts=True,
+        )
+
+
+class SlowQueryHook:
+    """``execute_wrapper`` that logs and stores queries slower than SLOW_QUERY_MS."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __call__(self, execute, sql, params, many, context):
+        threshold = _threshold()
+        if threshold <= 0 or _recording.get():
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration = time.perf_counter() - start
+        if duration >= threshold and _sampled():
+            self.slow(sql, params, duration)
+        return result
+
+    def slow(self, sql, params, duration):
+        view = current_view.get()
+        stack = app_stack()
+        logger.warning(
+            "Slow query (%.1f ms) in %s: %s; params=%s\n%s",
+            duration * 1000, view or 'no view', sql, shown_params(params), stack,
+        )
+        token = _recording.set(True)
+        try:
+            # savepoint: a failed insert must not break the caller's transaction
+            with transaction.atomic(using=self.connection.alias):
+                record(self.connection, sql, params, duration, view, stack)
+        except Exception:
+            # never fail the original query because the log could not be written
+            logger.exception("Could not store slow query")
+        finally:
+            _recording.reset(token)
+
+
+def _install(connection):
+    if not any(isinstance(wrapper, SlowQueryHook) for wrapper in connection.execute_wrappers):
+        # Outermost, and below any ``execute_wrapper()`` block that is open right now:
+        # those pop the last wrapper when they exit
+        connection.execute_wrappers.insert(0, SlowQueryHook(connection))
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    _install(connection)
+
+
+def install():
+    """Hook every current and future connection (idempotent)."""
+    connection_created.connect(_on_connection_created, dispatch_uid='cardtrack_slow_query_hook')
+    for connection in connections.all(initialized_only=True):
+        _install(connection)
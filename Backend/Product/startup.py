@@ -0,0 +1,78 @@
+"""Cold-start measurements for the management command ``startup_profile``.
+
+Each target is started in a fresh interpreter, the way a new worker or a
+serverless cold start would run it. Python's ``-X importtime`` output is then
+summarized by the modules and top-level packages that cost the most. Targets
+also load the URLconf, which Django otherwise defers to the first request.
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+
+_LOAD_URLS = 'from django.urls import get_resolver; get_resolver().url_patterns'
+
+TARGETS = {
+    'manage': f'import django; django.setup(); {_LOAD_URLS}',
+    'wsgi': f'import CardTrack.wsgi; {_LOAD_URLS}',
+    'asgi': f'import CardTrack.asgi; {_LOAD_URLS}',
+}
+
+
+def parse_importtime(text) -> list:
+    """``-X importtime`` stderr -> list of (module, self_us, cumulative_us, depth)."""
+    rows = []
+    for line in text.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+            self_us, cumulative_us = int(self_us), int(cumulative_us)
+        except ValueError:
+            continue  # header line
+        depth = (len(name) - len(name.lstrip(' '))) // 2
+        rows.append((name.strip(), self_us, cumulative_us, depth))
+    return rows
+
+
+def summarize_imports(rows, top=15) -> dict:
+    by_package = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        by_package[name.split('.')[0]] += self_us
+    return {
+        'modules': len(rows),
+        'import_ms': sum(row[1] for row in rows) / 1000,
+        'packages': sorted(((pkg, us / 1000) for pkg, us in by_package.items()), key=lambda item: -item[1])[:top],
+        'slowest': sorted(((name, cum / 1000) for name, _, cum, _ in rows), key=lambda item: -item[1])[:top],
+    }
+
+
+def _run(code, importtime=False):
+    cmd = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', code]
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'CardTrack.settings')}
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, capture_output=True, text=True, env=env, cwd=_project_dir())
+    elapsed = time.perf_counter() - start
+    if proc.returncode:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f'exit {proc.returncode}')
+    return elapsed, proc.stderr
+
+
+def _project_dir():
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def profile(target, runs=5, top=15) -> dict:
+    """Wall time of ``runs`` cold starts of ``target`` plus an import breakdown of one more."""
+    code = TARGETS[target]
+    times = [_run(code)[0] * 1000 for _ in range(runs)]
+    _, stderr = _run(code, importtime=True)
+    return {
+        'target': target,
+        'min_ms': min(times),
+        'median_ms': statistics.median(times),
+        **summarize_imports(parse_importtime(stderr), top),
+    }
@@ -0,0 +1,85 @@
+"""Per-board analytics computed in the database.
+
+``board_stats`` returns card counts per column, completion and overdue counts and
+the priority distribution using two grouped queries (columns annotated with
+conditional counts, cards grouped by priority) instead of loading the cards.
+
+Results are cached per board for ``BOARD_STATS_CACHE_TTL`` seconds and dropped
+by the card/column signal handlers in models.py and by the bulk board operations,
+so dashboards usually cost a single cache read. Entries also expire at midnight
+because "overdue" depends on the date. Invalidation only reaches the cache of the
+process that handled the write: with the default per-process cache, other workers
+may serve counts up to the TTL old, unless CACHES is shared.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Card, Column
+
+
+PRIORITIES = ('low', 'medium', 'high')
+DEFAULT_CACHE_TTL = 30
+
+
+def _key(board_id):
+    return f'board_stats:{board_id}'
+
+
+def invalidate_board_stats(board_id):
+    if board_id:
+        cache.delete(_key(board_id))
+
+
+def _ratio(part, whole):
+    return round(part / whole, 4) if whole else 0.0
+
+
+def compute_board_stats(board_id) -> dict:
+    today = timezone.localdate()
+    overdue = Q(cards__is_completed=False, cards__due_date__lt=today)
+    columns = list(
+        Column.objects
+        .filter(board_id=board_id)
+        .order_by('position', 'id')
+        .values('id', 'title', 'position')
+        .annotate(
+            card_count=Count('cards'),
+            completed=Count('cards', filter=Q(cards__is_completed=True)),
+            overdue=Count('cards', filter=overdue),
+        )
+    )
+    for column in columns:
+        # annotated under another name: 'cards' is the reverse relation
+        column['cards'] = column.pop('card_count')
+        column['completion_ratio'] = _ratio(column['completed'], column['cards'])
+
+    priorities = dict.fromkeys(PRIORITIES, 0)
+    rows = Card.objects.filter(column__board_id=board_id).order_by().values_list('priority').annotate(n=Count('id'))
+    for priority, n in rows:
+        priorities[priority] = n
+
+    total = sum(c['cards'] for c in columns)
+    completed = sum(c['completed'] for c in columns)
+    return {
+        'board': board_id,
+        'date': today.isoformat(),
+        'cards': total,
+        'completed': completed,
+        'open': total - completed,
+        'overdue': sum(c['overdue'] for c in columns),
+        'completion_ratio': _ratio(completed, total),
+        'priorities': priorities,
+        'columns': columns,
+    }
+
+
+def board_stats(board_id) -> dict:
+    stats = cache.get(_key(board_id))
+    if stats is None or stats['date'] != timezone.localdate().isoformat():
+        stats = compute_board_stats(board_id)
+        ttl = getattr(settings, 'BOARD_STATS_CACHE_TTL', DEFAULT_CACHE_TTL)
+        if ttl:
+            cache.set(_key(board_id), stats, ttl)
+    return stats
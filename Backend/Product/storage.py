@@ -0,0 +1,58 @@
+"""Content-addressed media storage.
+
+Uploads are stored under the SHA-256 of their content instead of the client's
+file name::
+
+    profilepic/users/8/me.png  ->  profilepic/3f/3fa1...9c.png
+
+Only the top-level folder chosen by ``upload_to`` is kept, so identical images
+are stored once and a stored file never changes: its URL can be cached forever
+(see Product.media). Saving a file that already exists is a no-op that returns
+the existing name.
+"""
+import hashlib
+import os
+import re
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+HASHED_NAME_RE = re.compile(r'(?:^|/)[0-9a-f]{64}[^/]*$')
+
+
+def is_content_addressed(name) -> bool:
+    """True for names produced by ContentAddressedStorage (and derivatives named after them)."""
+    return bool(name) and HASHED_NAME_RE.search(str(name).replace('\\', '/')) is not None
+
+
+def hash_content(content) -> str:
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+
+    def content_name(self, name, digest):
+        folder = str(name).replace('\\', '/').split('/', 1)[0] if '/' in str(name) else ''
+        ext = os.path.splitext(str(name))[1].lower()
+        hashed = f"{digest[:2]}/{digest}{ext}"
+        return f"{folder}/{hashed}" if folder else hashed
+
+    def _save(self, name, content):
+        name = self.content_name(name, hash_content(content))
+        if self.exists(name):
+            return name
+        return super()._save(name, content)
+
+
+def get_media_storage():
+    """Storage for user uploads (callable so migrations don't serialize the instance)."""
+    return _media_storage
+
+
+# Overwriting is safe (same name == same bytes) and keeps concurrent identical uploads from colliding
+_media_storage = ContentAddressedStorage(allow_overwrite=True)
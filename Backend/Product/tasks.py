@@ -0,0 +1,73 @@
+"""Lightweight in-process background task queue.
+
+No external broker: ``enqueue`` hands a callable to a small pool of daemon worker
+threads once the current transaction commits, so requests return as soon as
+their own writes are done. Work that must not be lost (derivatives, purges) has
+a management command that can redo it: tasks are kept in memory only.
+
+Set ``TASKS_EAGER = True`` to run tasks inline in the caller (tests, scripts).
+"""
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_queue = queue.Queue()
+_workers = []
+_lock = threading.Lock()
+
+
+def _run(func, args, kwargs):
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception(f"Background task {getattr(func, '__name__', func)} failed")
+
+
+def _worker():
+    while True:
+        func, args, kwargs = _queue.get()
+        close_old_connections()
+        try:
+            _run(func, args, kwargs)
+        finally:
+            close_old_connections()
+            _queue.task_done()
+
+
+def _ensure_workers():
+    if _workers:
+        return
+    with _lock:
+        if _workers:
+            return
+        for i in range(max(1, getattr(settings, 'TASK_WORKERS', 2))):
+            thread = threading.Thread(target=_worker, name=f'cardtrack-task-{i}', daemon=True)
+            thread.start()
+            _workers.append(thread)
+
+
+def _submit(func, args, kwargs):
+    _ensure_workers()
+    _queue.put((func, args, kwargs))
+
+
+def enqueue(func, *args, **kwargs):
+    """Run ``func(*args, **kwargs)`` in the background after the current transaction commits."""
+    if getattr(settings, 'TASKS_EAGER', False):
+        _run(func, args, kwargs)
+        return
+    transaction.on_commit(lambda: _submit(func, args, kwargs))
+
+
+def drain():
+    """Block until every submitted task has finished (management commands, shutdown hooks)."""
+    _queue.join()
+
+
+def pending() -> int:
+    return _queue.qsize()
@@ -1,9 +1,23 @@
+import hashlib
+import io
+import json
+import os
+import threading
+from unittest import mock
+
 from django.test import TestCase
 from django.contrib.auth.hashers import check_password, make_password
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from .models import User, Board, Column, Card
+from . import carousel, events, images, search
+from .models import User, Board, BoardMembership, Column, Card, CarouselImage
+
+
+def make_image(path, size=(2000, 1000), fmt=None):
+    from PIL import Image
+
+    Image.new("RGB", size, (200, 30, 30)).save(path, fmt)
 
 
 class UserAuthTests(TestCase):
@@ -203,3 +217,1505 @@ class BoardColumnCardTests(TestCase):
         self.assertIn(self.user.email, str(board))
         self.assertIn(board.title, str(col))
         self.assertIn(col.title, str(card))
+
+
+class RealtimeEventTests(TestCase):
+    """
+    Pruebas del sobre de eventos v2 (diffs de campos y codificación por subprotocolo).
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(name="Rt", email="rt@example.com", password_hash="x")
+        self.board = Board.objects.create(user=self.user, title="RT")
+        self.column = Column.objects.create(board=self.board, title="Todo", position=0)
+
+    def test_update_fields_limits_payload(self):
+        card = Card.objects.create(column=self.column, title="T", description="long text", position=0)
+        with mock.patch("Product.models.broadcast_to_board") as sent:
+            card.position = 5
+            card.save(update_fields=["position"])
+        board_id, envelope = sent.call_args[0]
+        self.assertEqual(board_id, self.board.id)
+        self.assertEqual(envelope["v"], events.EVENT_SCHEMA_VERSION)
+        self.assertEqual(envelope["e"], "card.updated")
+        self.assertEqual(envelope["d"], {"id": card.id, "column_id": self.column.id, "position": 5})
+
+    def test_full_save_sends_only_changed_fields(self):
+        card = Card.objects.create(column=self.column, title="T", description="long text", position=0)
+        card = Card.objects.get(pk=card.pk)
+        with mock.patch("Product.models.broadcast_to_board") as sent:
+            card.position = 3
+            card.save()
+        envelope = sent.call_args[0][1]
+        self.assertEqual(envelope["d"], {"id": card.id, "column_id": self.column.id, "position": 3})
+
+    def test_noop_save_is_not_broadcast(self):
+        card = Card.objects.create(column=self.column, title="T", position=0)
+        with mock.patch("Product.models.broadcast_to_board") as sent:
+            card.save()
+            Card.objects.get(pk=card.pk).save()
+            self.column.save()
+        sent.assert_not_called()
+
+    def test_encodings(self):
+        envelope = events.build_event("card.deleted", {"id": 1, "column_id": 2})
+        text, data = events.encode(envelope, None)
+        self.assertIsNone(data)
+        legacy = json.loads(text)
+        self.assertEqual(legacy["event"], "card.deleted")
+        self.assertIn("timestamp", legacy["data"])
+
+        text, data = events.encode(envelope, events.SUBPROTOCOL_JSON)
+        self.assertEqual(json.loads(text), envelope)
+
+        if events.msgpack is not None:
+            text, data = events.encode(envelope, events.SUBPROTOCOL_MSGPACK)
+            self.assertIsNone(text)
+            self.assertEqual(events.msgpack.unpackb(data), envelope)
+            self.assertLess(len(data), len(json.dumps(events.to_legacy(envelope))))
+
+    def test_negotiate_subprotocol(self):
+        self.assertIsNone(events.negotiate_subprotocol([]))
+        self.assertEqual(events.negotiate_subprotocol(["x", events.SUBPROTOCOL_JSON]), events.SUBPROTOCOL_JSON)
+
+
+class BoardTransferTests(TestCase):
+    """
+    Pruebas de exportación/importación de boards en streaming (NDJSON y CSV).
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create(name="Io", email="io@example.com", password_hash="x")
+        self.client.force_authenticate(self.user)
+        self.board = Board.objects.create(user=self.user, title="Source", description="desc")
+        todo = Column.objects.create(board=self.board, title="Todo", position=0)
+        done = Column.objects.create(board=self.board, title="Done", position=1, color="#00FF00")
+        Card.objects.create(column=todo, title="A", position=0, priority="high", due_date="2030-01-02")
+        Card.objects.create(column=todo, title="B", position=1, description="multi\nline")
+        Card.objects.create(column=done, title="C", position=0, is_completed=True)
+
+    def _export(self, fmt):
+        res = self.client.get(f"/api/boards/{self.board.id}/export/", {"type": fmt})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return b"".join(res.streaming_content)
+
+    def _assert_copy(self, board_id):
+        board = Board.objects.get(pk=board_id)
+        self.assertEqual(board.title, "Source")
+        self.assertEqual(list(board.columns.values_list("title", "color")), [("Todo", "#007ACF"), ("Done", "#00FF00")])
+        cards = Card.objects.filter(column__board=board).order_by("column__position", "position")
+        self.assertEqual(
+            [(c.column.title, c.title, c.priority, c.is_completed) for c in cards],
+            [("Todo", "A", "high", False), ("Todo", "B", "medium", False), ("Done", "C", "medium", True)],
+        )
+        self.assertEqual(str(cards[0].due_date), "2030-01-02")
+        self.assertEqual(cards[1].description, "multi\nline")
+
+    def test_ndjson_round_trip_sends_single_event(self):
+        body = self._export("ndjson")
+        self.assertEqual(len(body.splitlines()), 6)
+        with mock.patch("Product.models.broadcast_to_board") as sent, \
+                mock.patch("Product.transfer.broadcast_to_board") as summary:
+            res = self.client.generic("POST", "/api/boards/import/", body, content_type="application/x-ndjson")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((res.data["columns"], res.data["cards"]), (2, 3))
+        self._assert_copy(res.data["id"])
+        self.assertFalse(any(call[0][1]["e"].startswith("card.") for call in sent.call_args_list))
+        summary.assert_called_once()
+        self.assertEqual(summary.call_args[0][1]["e"], "board.reloaded")
+
+    def test_csv_round_trip_via_upload(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        upload = SimpleUploadedFile("board.csv", self._export("csv"), content_type="text/csv")
+        res = self.client.post("/api/boards/import/", {"file": upload}, format="multipart")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self._assert_copy(res.data["id"])
+
+    def test_invalid_stream_rolls_back(self):
+        body = b'{"type":"board","title":"X"}\n{"type":"card","column":99,"title":"orphan"}\n'
+        res = self.client.generic("POST", "/api/boards/import/", body, content_type="application/x-ndjson")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Board.objects.filter(title="X").exists())
+
+
+class BoardDuplicateTests(TestCase):
+    """
+    Pruebas de duplicación de boards y creación desde plantillas.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create(name="Dup", email="dup@example.com", password_hash="x")
+        self.client.force_authenticate(self.user)
+        self.board = Board.objects.create(user=self.user, title="Origen")
+        self.cols = [Column.objects.create(board=self.board, title=f"C{i}", position=i) for i in range(3)]
+        Card.objects.bulk_create([
+            Card(column=self.cols[i % 3], title=f"T{i}", position=i, priority="high" if i % 2 else "low")
+            for i in range(30)
+        ])
+
+    def test_duplicate_copies_columns_and_cards(self):
+        with self.assertNumQueries(12):
+            res = self.client.post(f"/api/boards/{self.board.id}/duplicate/", {"title": "Copia"}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((res.data["columns"], res.data["cards"]), (3, 30))
+        new_board = Board.objects.get(pk=res.data["id"])
+        self.assertEqual(new_board.title, "Copia")
+        src = Card.objects.filter(column__board=self.board).order_by("column__position", "position")
+        dst = Card.objects.filter(column__board=new_board).order_by("column__position", "position")
+        self.assertEqual(
+            [(c.column.title, c.title, c.priority) for c in src],
+            [(c.column.title, c.title, c.priority) for c in dst],
+        )
+        self.assertEqual(Card.objects.filter(column__board=self.board).count(), 30)
+
+    def test_duplicate_without_cards(self):
+        res = self.client.post(f"/api/boards/{self.board.id}/duplicate/", {"include_cards": False}, format="json")
+        self.assertEqual(res.data["cards"], 0)
+        self.assertFalse(Card.objects.filter(column__board_id=res.data["id"]).exists())
+
+    def test_duplicate_rejects_non_text_title(self):
+        for title in (5, ["Copia"]):
+            res = self.client.post(f"/api/boards/{self.board.id}/duplicate/", {"title": title}, format="json")
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("title", res.data)
+        self.assertEqual(Board.objects.count(), 1)
+
+    def test_from_template_rejects_non_text_title(self):
+        for title in (5, {"x": 1}):
+            res = self.client.post("/api/boards/from-template/", {"template": "kanban", "title": title}, format="json")
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("title", res.data)
+        self.assertEqual(Board.objects.count(), 1)
+
+    def test_create_from_template(self):
+        res = self.client.get("/api/boards/templates/")
+        self.assertIn("kanban", [t["key"] for t in res.data])
+        res = self.client.post("/api/boards/from-template/", {"template": "kanban", "title": "Mi tablero"}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([c["title"] for c in res.data["columns"]], ["Por hacer", "En progreso", "Hecho"])
+
+
+class BoardDeleteTests(TestCase):
+    """
+    Pruebas del borrado rápido de boards (borrado por lotes y soft-delete).
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create(name="Del", email="del@example.com", password_hash="x")
+        self.client.force_authenticate(self.user)
+        self.board = Board.objects.create(user=self.user, title="Grande")
+        cols = [Column.objects.create(board=self.board, title=f"C{i}", position=i) for i in range(4)]
+        Card.objects.bulk_create([Card(column=cols[i % 4], title=f"T{i}", position=i) for i in range(200)])
+
+    def test_delete_sends_single_event(self):
+        with mock.patch("Product.models.broadcast_to_board") as per_row, \
+                mock.patch("Product.deletion.broadcast_to_board") as summary:
+            res = self.client.delete(f"/api/boards/{self.board.id}/")
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        per_row.assert_not_called()
+        summary.assert_called_once()
+        self.assertEqual(summary.call_args[0][1]["e"], "board.deleted")
+        self.assertFalse(Board.objects.filter(pk=self.board.pk).exists())
+        self.assertFalse(Column.objects.filter(board_id=self.board.pk).exists())
+        self.assertEqual(Card.objects.count(), 0)
+
+    def test_large_board_is_soft_deleted_then_purged(self):
+        from django.core.management import call_command
+        from django.test import override_settings
+
+        with override_settings(BOARD_ASYNC_DELETE_THRESHOLD=100), \
+                self.captureOnCommitCallbacks(execute=False) as callbacks:
+            res = self.client.delete(f"/api/boards/{self.board.id}/")
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(len(callbacks), 1)
+        self.assertIsNotNone(Board.objects.get(pk=self.board.pk).deleted_at)
+        self.assertEqual(self.client.get("/api/boards/").data, [])
+        self.assertEqual(self.client.get(f"/api/boards/{self.board.id}/").status_code, status.HTTP_404_NOT_FOUND)
+
+        call_command("purge_deleted_boards", stdout=io.StringIO())
+        self.assertFalse(Board.objects.filter(pk=self.board.pk).exists())
+        self.assertEqual(Card.objects.count(), 0)
+
+    def test_interrupted_inline_purge_is_resumed(self):
+        from django.core.management import call_command
+        from . import deletion
+
+        original = deletion._raw_delete_chunked
+        calls = []
+
+        def fail_on_columns(queryset, chunk_size=deletion.PURGE_CHUNK_SIZE):
+            calls.append(queryset.model)
+            if queryset.model is Column:
+                raise RuntimeError("conexión perdida")
+            return original(queryset, chunk_size)
+
+        with mock.patch("Product.deletion._raw_delete_chunked", side_effect=fail_on_columns):
+            with self.assertRaises(RuntimeError):
+                deletion.delete_board(self.board)
+        self.assertEqual(Card.objects.count(), 0)
+        self.assertIsNotNone(Board.objects.get(pk=self.board.pk).deleted_at)
+        self.assertEqual(self.client.get("/api/boards/").data, [])
+
+        call_command("purge_deleted_boards", stdout=io.StringIO())
+        self.assertFalse(Board.objects.filter(pk=self.board.pk).exists())
+        self.assertFalse(Column.objects.filter(board_id=self.board.pk).exists())
+
+    def test_soft_deleted_board_takes_no_new_rows_or_sockets(self):
+        from asgiref.sync import async_to_sync
+        from django.utils import timezone
+        from .consumers import _is_board_member
+
+        column = Column.objects.filter(board=self.board).first()
+        Board.objects.filter(pk=self.board.pk).update(deleted_at=timezone.now())
+        res = self.client.post(
+            f"/api/boards/{self.board.id}/columns/{column.id}/cards/", {"title": "Tarde"}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        res = self.client.post(f"/api/boards/{self.board.id}/members/", {"email": "late@example.com"}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        res = self.client.post(f"/api/boards/{self.board.id}/members/bulk/", {"invites": ["late@example.com"]}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(async_to_sync(_is_board_member)(self.board.id, self.user.id))
+        self.assertEqual(Card.objects.filter(title="Tarde").count(), 0)
+
+
+class CarouselManifestTests(TestCase):
+    """
+    Pruebas del manifiesto cacheado del carousel (fallback de filesystem y filas en BD).
+    """
+
+    def setUp(self):
+        import tempfile
+        from django.test import override_settings
+
+        self.client = APIClient()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        os.makedirs(os.path.join(self.tmp.name, "carousel"))
+        for name in ("b.jpg", "a.png"):
+            make_image(os.path.join(self.tmp.name, "carousel", name))
+        open(os.path.join(self.tmp.name, "carousel", "notes.txt"), "wb").close()
+        settings_override = override_settings(MEDIA_ROOT=self.tmp.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        carousel._manifests.clear()
+
+    def test_filesystem_fallback_is_cached(self):
+        with mock.patch("Product.carousel.os.listdir", wraps=os.listdir) as listdir, \
+                mock.patch("Product.carousel.tasks.enqueue") as enqueue:
+            first = self.client.get("/api/carousel-images/")
+            second = self.client.get("/api/carousel-images/")
+        self.assertEqual(listdir.call_count, 1)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertIn("max-age", first["Cache-Control"])
+        data = json.loads(first.content)
+        self.assertEqual([d["title"] for d in data], ["a", "b"])
+        self.assertEqual(data[0]["image_url"], "http://testserver/media/carousel/a.png")
+        self.assertEqual(first.content, second.content)
+
+        not_modified = self.client.get("/api/carousel-images/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # No Pillow work in the request: originals are served until the queued task runs
+        self.assertIsNone(data[0]["image_srcset"])
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "derived", "carousel", "a_w480.webp")))
+        self.assertEqual(
+            [c.args for c in enqueue.call_args_list],
+            [(carousel.generate_derivatives, "carousel/a.png"), (carousel.generate_derivatives, "carousel/b.jpg")],
+        )
+        for call in enqueue.call_args_list:
+            call.args[0](*call.args[1:])
+        data = json.loads(self.client.get("/api/carousel-images/").content)
+        self.assertIn("http://testserver/media/derived/carousel/a_w480.webp 480w", data[0]["image_srcset"]["webp"])
+
+    def test_db_change_invalidates_manifest(self):
+        first = self.client.get("/api/carousel-images/")
+        CarouselImage.objects.create(image="carousel/a.png", title="Portada")
+        with self.assertNumQueries(1):
+            second = self.client.get("/api/carousel-images/")
+        with self.assertNumQueries(0):
+            self.client.get("/api/carousel-images/")
+        self.assertNotEqual(first["ETag"], second["ETag"])
+        self.assertEqual([d["title"] for d in json.loads(second.content)], ["Portada"])
+
+
+class ImageDerivativeTests(TestCase):
+    """
+    Pruebas de derivados responsivos (carousel) y miniaturas de avatar.
+    """
+
+    def setUp(self):
+        import tempfile
+        from django.test import override_settings
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=self.tmp.name, TASKS_EAGER=True)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        for folder in ("carousel", "profilepic"):
+            os.makedirs(os.path.join(self.tmp.name, folder))
+
+    def test_carousel_upload_generates_width_buckets(self):
+        from PIL import Image
+        from .serializers import CarouselImageSerializer
+
+        make_image(os.path.join(self.tmp.name, "carousel", "wide.jpg"))
+        image = CarouselImage.objects.create(image="carousel/wide.jpg", title="Wide")
+        with Image.open(os.path.join(self.tmp.name, "derived", "carousel", "wide_w960.webp")) as derived:
+            self.assertEqual(derived.size, (960, 480))
+        with Image.open(os.path.join(self.tmp.name, "derived", "carousel", "wide_w1600.jpg")) as derived:
+            self.assertEqual(derived.format, "JPEG")
+
+        data = CarouselImageSerializer(image).data
+        self.assertEqual(
+            data["image_srcset"]["jpeg"],
+            "/media/derived/carousel/wide_w480.jpg 480w, /media/derived/carousel/wide_w960.jpg 960w, "
+            "/media/derived/carousel/wide_w1600.jpg 1600w",
+        )
+
+    def test_profile_picture_gets_square_thumbnails(self):
+        from PIL import Image
+        from .serializers import UserSerializer
+
+        make_image(os.path.join(self.tmp.name, "profilepic", "me.png"), size=(300, 200))
+        user = User.objects.create(name="Pic", email="pic@example.com", password_hash="x", profilepicture="profilepic/me.png")
+        with Image.open(os.path.join(self.tmp.name, "derived", "profilepic", "me_s64.webp")) as thumb:
+            self.assertEqual(thumb.size, (64, 64))
+        self.assertIn("/media/derived/profilepic/me_s128.jpg 128w", UserSerializer(user).data["profilepicture_srcset"]["jpeg"])
+
+    def test_default_profile_picture_has_no_srcset(self):
+        from django.conf import settings as dj_settings
+        from .serializers import UserSerializer
+
+        user = User.objects.create(name="Sin foto", email="nopic@example.com", password_hash="x")
+        data = UserSerializer(user).data
+        self.assertIsNone(data["profilepicture_srcset"])
+        self.assertEqual(data["profilepicture_url"], "/media/" + user.profilepicture.name)
+        # The default must be a file that ships with the media folder
+        self.assertTrue((dj_settings.BASE_DIR / "media" / user.profilepicture.name).is_file())
+
+    def test_srcset_waits_for_missing_derivatives(self):
+        from .serializers import CarouselImageSerializer, UserSerializer
+
+        make_image(os.path.join(self.tmp.name, "profilepic", "legacy.png"), size=(100, 100))
+        make_image(os.path.join(self.tmp.name, "carousel", "legacy.jpg"))
+        # Media stored before derivatives existed: no thumbnails on disk
+        with mock.patch("Product.tasks.enqueue"):
+            user = User.objects.create(name="Legacy", email="legacy@example.com", password_hash="x", profilepicture="profilepic/legacy.png")
+            image = CarouselImage.objects.create(image="carousel/legacy.jpg", title="Legacy")
+
+        with mock.patch("Product.tasks.enqueue") as enqueue:
+            self.assertIsNone(UserSerializer(user).data["profilepicture_srcset"])
+            self.assertIsNone(CarouselImageSerializer(image).data["image_srcset"])
+        self.assertEqual(
+            [(c.args, c.kwargs["avatar"]) for c in enqueue.call_args_list],
+            [((images.generate_derivatives, "profilepic/legacy.png"), True), ((images.generate_derivatives, "carousel/legacy.jpg"), False)],
+        )
+        for call in enqueue.call_args_list:
+            call.args[0](*call.args[1:], **call.kwargs)
+        self.assertIn("/media/derived/profilepic/legacy_s64.webp 64w", UserSerializer(user).data["profilepicture_srcset"]["webp"])
+        self.assertIn("/media/derived/carousel/legacy_w480.jpg 480w", CarouselImageSerializer(image).data["image_srcset"]["jpeg"])
+
+    def test_thumbnails_are_queued_after_commit(self):
+        from django.test import override_settings
+
+        make_image(os.path.join(self.tmp.name, "profilepic", "late.png"), size=(100, 100))
+        with override_settings(TASKS_EAGER=False), \
+                mock.patch("Product.tasks._submit") as submit, \
+                self.captureOnCommitCallbacks(execute=True):
+            User.objects.create(name="Late", email="late@example.com", password_hash="x", profilepicture="profilepic/late.png")
+            submit.assert_not_called()
+        func, args, kwargs = submit.call_args[0]
+        self.assertEqual((func.__name__, args, kwargs), ("generate_derivatives", ("profilepic/late.png",), {"avatar": True}))
+
+    def test_replaced_profile_picture_is_cleaned_up(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from .serializers import UserSerializer
+
+        make_image(os.path.join(self.tmp.name, "profilepic", "old.png"), size=(100, 100))
+        user = User.objects.create(name="Old", email="old@example.com", password_hash="x", profilepicture="profilepic/old.png")
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, "derived", "profilepic", "old_s64.webp")))
+
+        buffer = io.BytesIO()
+        make_image(buffer, size=(120, 120), fmt="PNG")
+        upload = SimpleUploadedFile("new.png", buffer.getvalue(), content_type="image/png")
+        serializer = UserSerializer(user, data={"profilepicture": upload}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+
+        digest = hashlib.sha256(buffer.getvalue()).hexdigest()
+        self.assertEqual(user.profilepicture.name, f"profilepic/{digest[:2]}/{digest}.png")
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "profilepic", "old.png")))
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "derived", "profilepic", "old_s64.webp")))
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, "derived", "profilepic", digest[:2], f"{digest}_s64.webp")))
+
+    def test_identical_uploads_are_stored_once(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from django.test import RequestFactory
+        from .media import serve_media
+        from .serializers import UserSerializer
+
+        buffer = io.BytesIO()
+        make_image(buffer, size=(50, 50), fmt="PNG")
+        names = []
+        for i, filename in enumerate(("default.png", "mine.png")):
+            user = User.objects.create(name=f"U{i}", email=f"u{i}@example.com", password_hash="x")
+            serializer = UserSerializer(user, data={"profilepicture": SimpleUploadedFile(filename, buffer.getvalue())}, partial=True)
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+            names.append(serializer.save().profilepicture.name)
+        self.assertEqual(names[0], names[1])
+        self.assertEqual(len(os.listdir(os.path.dirname(os.path.join(self.tmp.name, names[0])))), 1)
+
+        response = serve_media(RequestFactory().get("/media/x"), names[0])
+        self.assertIn("immutable", response["Cache-Control"])
+        make_image(os.path.join(self.tmp.name, "profilepic", "legacy.png"), size=(10, 10))
+        response = serve_media(RequestFactory().get("/media/x"), "profilepic/legacy.png")
+        self.assertEqual(response["Cache-Control"], "public, max-age=3600")
+
+
+class MediaServingTests(TestCase):
+    """
+    Pruebas del servido de media en producción: rangos, 304, offload y ASGI.
+    """
+
+    def setUp(self):
+        import tempfile
+        from django.test import override_settings
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=self.tmp.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.payload = bytes(range(256)) * 4
+        with open(os.path.join(self.tmp.name, "clip.bin"), "wb") as fh:
+            fh.write(self.payload)
+
+    def get(self, **headers):
+        from django.test import RequestFactory
+        from .media import serve_media
+
+        return serve_media(RequestFactory().get("/media/clip.bin", headers=headers), "clip.bin")
+
+    def test_range_and_conditional_requests(self):
+        full = self.get()
+        self.assertEqual(full.status_code, 200)
+        self.assertEqual(b"".join(full.streaming_content), self.payload)
+        self.assertEqual(full["Accept-Ranges"], "bytes")
+
+        partial = self.get(Range="bytes=10-19")
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial["Content-Range"], "bytes 10-19/1024")
+        self.assertEqual(b"".join(partial.streaming_content), self.payload[10:20])
+        suffix = self.get(Range="bytes=-4")
+        self.assertEqual(b"".join(suffix.streaming_content), self.payload[-4:])
+        self.assertEqual(self.get(Range="bytes=5000-").status_code, 416)
+        # Stale If-Range: the whole file is sent again
+        self.assertEqual(self.get(Range="bytes=0-1", If_Range='"other"').status_code, 200)
+
+        not_modified = self.get(If_None_Match=full["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b"")
+        self.assertEqual(self.get(If_Modified_Since=full["Last-Modified"]).status_code, 304)
+
+    def test_offload_to_front_server(self):
+        from django.test import override_settings
+
+        with override_settings(MEDIA_ACCEL_REDIRECT_PREFIX="/protected-media/"):
+            response = self.get()
+        self.assertEqual(response["X-Accel-Redirect"], "/protected-media/clip.bin")
+        self.assertEqual(response.content, b"")
+        with override_settings(MEDIA_SENDFILE_HEADER="X-Sendfile"):
+            response = self.get()
+        self.assertEqual(response["X-Sendfile"], os.path.join(self.tmp.name, "clip.bin"))
+
+    def test_path_traversal_is_not_served(self):
+        from django.http import Http404
+        from django.test import RequestFactory
+        from .media import serve_media
+
+        with self.assertRaises(Http404):
+            serve_media(RequestFactory().get("/media/x"), "../secret.txt")
+
+    def test_asgi_app_uses_zero_copy_when_available(self):
+        import asyncio
+        from .media import MediaFilesApp
+
+        async def inner(scope, receive, send):
+            await send({"type": "http.response.start", "status": 418, "headers": []})
+
+        def call(path, extensions=None, headers=()):
+            messages = []
+
+            async def send(message):
+                messages.append(message)
+
+            scope = {"type": "http", "method": "GET", "path": path, "headers": list(headers), "extensions": extensions or {}}
+            asyncio.run(MediaFilesApp(inner)(scope, None, send))
+            return messages
+
+        start, *body = call("/media/clip.bin", headers=[(b"range", b"bytes=100-")])
+        self.assertEqual(start["status"], 206)
+        self.assertEqual(b"".join(m["body"] for m in body), self.payload[100:])
+        self.assertFalse(body[-1].get("more_body"))
+
+        start, zerocopy = call("/media/clip.bin", extensions={"http.response.zerocopysend": {}})
+        self.assertEqual(zerocopy["type"], "http.response.zerocopysend")
+        self.assertEqual((zerocopy["offset"], zerocopy["count"]), (0, 1024))
+
+        self.assertEqual(call("/media/missing.bin")[0]["status"], 418)
+        self.assertEqual(call("/api/boards/")[0]["status"], 418)
+
+
+class MemberSerializationTests(TestCase):
+    """
+    Pruebas de serialización de miembros: URLs de avatar sin trabajo por fila.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = User.objects.create(name="Owner", email="owner@example.com", password_hash="x")
+        self.client.force_authenticate(self.owner)
+        self.board = Board.objects.create(user=self.owner, title="Crowd")
+        users = User.objects.bulk_create(
+            User(name=f"Member {i}", email=f"member{i}@example.com", password_hash="x",
+                 profilepicture=f"profilepic/{i % 10}.png")
+            for i in range(1000)
+        )
+        BoardMembership.objects.bulk_create(BoardMembership(board=self.board, user=u, role="viewer") for u in users)
+
+    def test_large_member_list_builds_media_base_once(self):
+        from django.http import HttpRequest
+
+        original = HttpRequest.build_absolute_uri
+        with mock.patch.object(HttpRequest, "build_absolute_uri", autospec=True, side_effect=original) as build, \
+                self.assertNumQueries(3):
+            res = self.client.get(f"/api/boards/{self.board.id}/members/")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 1001)
+        self.assertEqual(build.call_count, 1)
+        member = next(m for m in res.data if m["user_email"] == "member7@example.com")
+        self.assertEqual(member["user_name"], "Member 7")
+        self.assertEqual(member["user_profilepicture"], "http://testserver/media/profilepic/7.png")
+
+    def test_user_list_builds_file_urls_once(self):
+        from django.http import HttpRequest
+        from django.test import RequestFactory
+        from .serializers import UserSerializer
+
+        request = RequestFactory().get("/api/users/")
+        users = list(User.objects.filter(email__startswith="member").order_by("id")[:200])
+        original = HttpRequest.build_absolute_uri
+        with mock.patch.object(HttpRequest, "build_absolute_uri", autospec=True, side_effect=original) as build, \
+                mock.patch("Product.tasks.enqueue"):
+            data = UserSerializer(users, many=True, context={"request": request}).data
+        self.assertEqual(build.call_count, 1)
+        self.assertEqual(data[7]["profilepicture"], "http://testserver/media/profilepic/7.png")
+        self.assertEqual(data[7]["profilepicture_url"], data[7]["profilepicture"])
+
+    def test_media_urls_follow_the_field_storage(self):
+        from django.core.files.storage import FileSystemStorage
+        from django.test import RequestFactory
+        from .serializers import _media_url_builder
+
+        request = RequestFactory().get("/")
+        cdn = FileSystemStorage(base_url="https://cdn.example.com/m/")
+        uploads = FileSystemStorage(base_url="/uploads/")
+        self.assertEqual(_media_url_builder(request, cdn)("a/b.png"), "https://cdn.example.com/m/a/b.png")
+        self.assertEqual(_media_url_builder(request, uploads)("a b.png"), "http://testserver/uploads/a%20b.png")
+        self.assertEqual(_media_url_builder(request)("a.png"), "http://testserver/media/a.png")
+        self.assertEqual(_media_url_builder(None, uploads)("a.png"), "/uploads/a.png")
+
+    def test_user_urls_without_request(self):
+        from .serializers import UserSerializer
+
+        self.assertEqual(UserSerializer(self.owner).data["profilepicture_url"], "/media/profilepic/default.jpg")
+
+
+class SearchTests(TestCase):
+    """
+    Pruebas de búsqueda de texto completo (índice invertido en SQLite) y su alcance por usuario.
+    """
+
+    def setUp(self):
+        search._index.clear()
+        self.addCleanup(search._index.clear)
+        self.client = APIClient()
+        self.user = User.objects.create(name="Sol", email="sol@example.com", password_hash="x")
+        self.other = User.objects.create(name="Luna", email="luna@example.com", password_hash="x")
+        self.client.force_authenticate(self.user)
+        self.board = Board.objects.create(user=self.user, title="Lanzamiento móvil")
+        self.column = Column.objects.create(board=self.board, title="Revisión")
+        self.card = Card.objects.create(column=self.column, title="Corregir login", description="Falla la sesión en Android")
+        foreign = Board.objects.create(user=self.other, title="Privado")
+        Card.objects.create(column=Column.objects.create(board=foreign, title="Todo"), title="Login secreto")
+
+    def _search(self, q):
+        res = self.client.get("/api/search/", {"q": q})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_search_matches_prefixes_and_is_scoped(self):
+        data = self._search("LOG")
+        self.assertEqual([c["id"] for c in data["cards"]], [self.card.id])
+        self.assertEqual(data["cards"][0]["board_id"], self.board.id)
+        self.assertEqual([b["id"] for b in self._search("movil")["boards"]], [self.board.id])
+        self.assertEqual([c["id"] for c in self._search("revision")["columns"]], [self.column.id])
+        self.assertEqual(self._search("sesion android")["cards"][0]["id"], self.card.id)
+        self.assertEqual(self._search("sesion ios")["cards"], [])
+        self.assertEqual(self.client.get("/api/search/", {"q": "  "}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_index_follows_signals_and_bulk_operations(self):
+        from . import board_templates
+
+        self._search("login")
+        self.card.title = "Arreglar registro"
+        self.card.save()
+        self.assertEqual(self._search("login")["cards"], [])
+        self.assertEqual(self._search("registro")["cards"][0]["id"], self.card.id)
+        self.card.delete()
+        self.assertEqual(self._search("registro")["cards"], [])
+
+        copy, _counts = board_templates.duplicate_board(self.board, self.user, title="Copia")
+        Card.objects.create(column=self.column, title="Pagos")
+        self.assertEqual(len(self._search("pagos")["cards"]), 1)
+        self.assertEqual([b["id"] for b in self._search("copia")["boards"]], [copy.id])
+        BoardMembership.objects.create(board=Board.objects.get(title="Privado"), user=self.user)
+        self.assertEqual(len(self._search("secreto")["cards"]), 1)
+
+
+class CardFilterTests(TestCase):
+    """
+    Pruebas de filtros y orden de tarjetas en el servidor (lista de cards y detalle de board).
+    """
+
+    def setUp(self):
+        from datetime import timedelta
+        from django.utils import timezone
+
+        self.client = APIClient()
+        self.user = User.objects.create(name="Fil", email="fil@example.com", password_hash="x")
+        self.client.force_authenticate(self.user)
+        self.board = Board.objects.create(user=self.user, title="Filtros")
+        self.column = Column.objects.create(board=self.board, title="Todo")
+        today = timezone.localdate()
+        self.late = Card.objects.create(column=self.column, title="Late", position=0, priority="low", due_date=today - timedelta(days=2))
+        self.done = Card.objects.create(column=self.column, title="Done", position=1, priority="high", due_date=today - timedelta(days=1), is_completed=True)
+        self.soon = Card.objects.create(column=self.column, title="Soon", position=2, priority="high", due_date=today + timedelta(days=3))
+        self.open = Card.objects.create(column=self.column, title="Open", position=3, priority="medium")
+        self.url = f"/api/boards/{self.board.id}/columns/{self.column.id}/cards/"
+
+    def _titles(self, **params):
+        res = self.client.get(self.url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK, res.data)
+        return [c["title"] for c in res.data]
+
+    def test_card_list_filters_and_ordering(self):
+        self.assertEqual(self._titles(), ["Late", "Done", "Soon", "Open"])
+        self.assertEqual(self._titles(priority="high"), ["Done", "Soon"])
+        self.assertEqual(self._titles(priority="low,medium", is_completed="false"), ["Late", "Open"])
+        self.assertEqual(self._titles(overdue="true"), ["Late"])
+        self.assertEqual(self._titles(due_after=str(self.done.due_date), due_before=str(self.soon.due_date)), ["Done", "Soon"])
+        self.assertEqual(self._titles(ordering="-priority,position"), ["Done", "Soon", "Open", "Late"])
+        self.assertEqual(self._titles(ordering="-due_date", is_completed="false", due_after="2000-01-01"), ["Soon", "Late"])
+
+        for params in ({"priority": "urgent"}, {"due_before": "mañana"}, {"ordering": "column"}, {"is_completed": "maybe"}):
+            self.assertEqual(self.client.get(self.url, params).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_board_retrieve_filters_nested_cards(self):
+        res = self.client.get(f"/api/boards/{self.board.id}/", {"priority": "high", "ordering": "-position"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([c["title"] for c in res.data["columns"][0]["cards"]], ["Soon", "Done"])
+        res = self.client.get(f"/api/boards/{self.board.id}/")
+        self.assertEqual(len(res.data["columns"][0]["cards"]), 4)
+
+
+class DueFeedTests(TestCase):
+    """
+    Pruebas del feed de tarjetas próximas a vencer en todos los boards del usuario.
+    """
+
+    def setUp(self):
+        from datetime import timedelta
+        from django.core.cache import cache
+        from django.utils import timezone
+
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create(name="Due", email="due@example.com", password_hash="x")
+        other = User.objects.create(name="Else", email="else@example.com", password_hash="x")
+        self.client.force_authenticate(self.user)
+        today = timezone.localdate()
+        own = Column.objects.create(board=Board.objects.create(user=self.user, title="Mine"), title="A")
+        shared_board = Board.objects.create(user=other, title="Shared")
+        BoardMembership.objects.create(board=shared_board, user=self.user, role="viewer")
+        shared = Column.objects.create(board=shared_board, title="B")
+        foreign = Column.objects.create(board=Board.objects.create(user=other, title="Foreign"), title="C")
+        self.overdue = Card.objects.create(column=own, title="Overdue", due_date=today - timedelta(days=3))
+        self.today = Card.objects.create(column=shared, title="Today", due_date=today)
+        self.soon = Card.objects.create(column=own, title="Soon", due_date=today + timedelta(days=2))
+        Card.objects.create(column=own, title="Later", due_date=today + timedelta(days=30))
+        Card.objects.create(column=own, title="Finished", due_date=today, is_completed=True)
+        Card.objects.create(column=own, title="No date")
+        Card.objects.create(column=foreign, title="Not mine", due_date=today)
+
+    def test_feed_spans_boards_with_keyset_pages(self):
+        with self.assertNumQueries(1):
+            res = self.client.get("/api/cards/due/", {"limit": 2})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([c["title"] for c in res.data["results"]], ["Overdue", "Today"])
+        self.assertTrue(res.data["results"][0]["overdue"])
+        self.assertEqual(res.data["results"][1]["board_title"], "Shared")
+
+        res = self.client.get("/api/cards/due/", {"limit": 2, "cursor": res.data["next"]})
+        self.assertEqual([c["title"] for c in res.data["results"]], ["Soon"])
+        self.assertIsNone(res.data["next"])
+
+        res = self.client.get("/api/cards/due/", {"overdue": "false", "days": 60})
+        self.assertEqual([c["title"] for c in res.data["results"]], ["Today", "Soon", "Later"])
+        self.assertEqual(self.client.get("/api/cards/due/", {"cursor": "???"}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_owner_without_membership_row_sees_own_cards(self):
+        mine = Board.objects.get(title="Mine")
+        self.assertEqual(BoardMembership.objects.filter(board=mine, user=self.user).delete()[0], 1)
+        # Other members of the board must not repeat its cards
+        BoardMembership.objects.create(board=mine, user=User.objects.get(email="else@example.com"), role="viewer")
+        res = self.client.get("/api/cards/due/")
+        self.assertEqual([c["title"] for c in res.data["results"]], ["Overdue", "Today", "Soon"])
+
+    def test_pages_are_cached_per_user(self):
+        self.client.get("/api/cards/due/")
+        with self.assertNumQueries(0):
+            res = self.client.get("/api/cards/due/")
+        self.assertEqual(len(res.data["results"]), 3)
+
+
+class BoardStatsTests(TestCase):
+    """
+    Pruebas de estadísticas del board calculadas con agregaciones SQL y su caché.
+    """
+
+    def setUp(self):
+        from datetime import timedelta
+        from django.core.cache import cache
+        from django.utils import timezone
+
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create(name="Stat", email="stat@example.com", password_hash="x")
+        self.client.force_authenticate(self.user)
+        self.board = Board.objects.create(user=self.user, title="Stats")
+        self.todo = Column.objects.create(board=self.board, title="Todo", position=0)
+        self.done = Column.objects.create(board=self.board, title="Done", position=1)
+        Column.objects.create(board=self.board, title="Empty", position=2)
+        yesterday = timezone.localdate() - timedelta(days=1)
+        Card.objects.create(column=self.todo, title="a", priority="high", due_date=yesterday)
+        Card.objects.create(column=self.todo, title="b", priority="low")
+        self.card = Card.objects.create(column=self.done, title="c", priority="high", is_completed=True, due_date=yesterday)
+        self.url = f"/api/boards/{self.board.id}/stats/"
+
+    def test_stats_are_aggregated_and_cached(self):
+        with self.assertNumQueries(3):
+            res = self.client.get(self.url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual((res.data["cards"], res.data["completed"], res.data["overdue"]), (3, 1, 1))
+        self.assertEqual(res.data["priorities"], {"low": 1, "medium": 0, "high": 2})
+        self.assertEqual(
+            [(c["title"], c["cards"], c["completed"], c["completion_ratio"]) for c in res.data["columns"]],
+            [("Todo", 2, 0, 0.0), ("Done", 1, 1, 1.0), ("Empty", 0, 0, 0.0)],
+        )
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+        self.card.delete()
+        res = self.client.get(self.url)
+        self.assertEqual((res.data["cards"], res.data["completed"]), (2, 0))
+        Card.objects.create(column=self.todo, title="d", priority="medium")
+        self.assertEqual(self.client.get(self.url).data["priorities"]["medium"], 1)
+
+    def test_stats_cache_ttl_is_short_and_configurable(self):
+        from django.test import override_settings
+
+        with mock.patch("Product.stats.cache.set") as cache_set:
+            self.client.get(self.url)
+        self.assertEqual(cache_set.call_args.args[2], 30)
+        with override_settings(BOARD_STATS_CACHE_TTL=0):
+            self.client.get(self.url)
+            with self.assertNumQueries(3):
+                self.client.get(self.url)
+
+    def test_stats_require_access(self):
+        stranger = User.objects.create(name="No", email="no@example.com", password_hash="x")
+        self.client.force_authenticate(stranger)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
+
+
+class PerformanceMetricsTests(TestCase):
+    """
+    Pruebas de la instrumentación por request (Server-Timing) y del endpoint de métricas.
+    """
+
+    def setUp(self):
+        from . import metrics
+
+        metrics.reset()
+        self.client = APIClient()
+        self.user = User.objects.create(name="Perf", email="perf@example.com", password_hash="x")
+        self.client.force_authenticate(self.user)
+        self.board = Board.objects.create(user=self.user, title="Hot")
+        Card.objects.create(column=Column.objects.create(board=self.board, title="Todo"), title="Card")
+
+    def test_server_timing_and_prometheus_output(self):
+        from django.test import override_settings
+
+        res = self.client.get(f"/api/boards/{self.board.id}/")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        timing = res["Server-Timing"]
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn("serialize;dur=", timing)
+        self.assertIn("render;dur=", timing)
+
+        with override_settings(DEBUG=True):
+            body = self.client.get("/api/metrics/").content.decode()
+        self.assertIn('cardtrack_http_requests_total{method="GET",status="200",view="BoardViewSet.retrieve"} 1', body)
+        self.assertIn('cardtrack_http_request_duration_seconds_count{view="BoardViewSet.retrieve"} 1', body)
+        self.assertRegex(body, r'cardtrack_db_queries_total\{view="BoardViewSet.retrieve"\} [1-9]')
+        self.assertRegex(body, r'cardtrack_response_bytes_total\{view="BoardViewSet.retrieve"\} [1-9]')
+
+    def test_metrics_token(self):
+        from django.test import override_settings
+
+        with override_settings(METRICS_TOKEN="s3cret"):
+            self.assertEqual(self.client.get("/api/metrics/").status_code, 403)
+            res = self.client.get("/api/metrics/", HTTP_AUTHORIZATION="Bearer s3cret")
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res["Content-Type"].startswith("text/plain; version=0.0.4"))
+        # No token: only open in DEBUG, hidden in production
+        with override_settings(METRICS_TOKEN=None, DEBUG=False):
+            self.assertEqual(self.client.get("/api/metrics/").status_code, 404)
+        with override_settings(METRICS_TOKEN=None, DEBUG=True):
+            self.assertEqual(self.client.get("/api/metrics/").status_code, 200)
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Pruebas del presupuesto de queries por endpoint y de la detección de N+1.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create(name="Budget", email="budget@example.com", password_hash="x")
+        self.client.force_authenticate(self.user)
+        self.board = Board.objects.create(user=self.user, title="Budget")
+        for i in range(6):
+            member = User.objects.create(name=f"M{i}", email=f"m{i}@example.com", password_hash="x")
+            BoardMembership.objects.create(board=self.board, user=member, role="editor")
+            column = Column.objects.create(board=self.board, title=f"Col {i}", position=i)
+            for j in range(6):
+                Card.objects.create(column=column, title=f"Card {i}-{j}", position=j, due_date="2030-01-01")
+        self.column = self.board.columns.first()
+        self.card = self.column.cards.first()
+
+    def test_sql_shapes_ignore_literals(self):
+        from .querybudget import sql_shape
+
+        self.assertEqual(
+            sql_shape("SELECT * FROM t WHERE id = 12 AND name = 'x' AND pk IN (%s, %s, %s)"),
+            sql_shape("SELECT  *  FROM t WHERE id = 7 AND name = 'it''s' AND pk IN (%s)"),
+        )
+
+    def test_budget_context_manager_catches_n_plus_one(self):
+        from .querybudget import QueryBudgetExceeded, query_budget
+
+        with self.assertRaises(QueryBudgetExceeded):
+            with query_budget(max_repeats=3):
+                [card.column.title for card in Card.objects.all()]
+        with query_budget(2, max_repeats=1):
+            [card.column.title for card in Card.objects.select_related("column")]
+
+        # card_post_save resolves the board through the column -> board cache, not per card
+        from .models import forget_column_boards
+
+        forget_column_boards()
+        with query_budget() as recorder:
+            for card in Card.objects.filter(column=self.column):
+                card.title += "!"
+                card.save()
+        column_lookups = [n for shape, n in recorder.shapes.items() if 'FROM "Product_column"' in shape]
+        self.assertEqual(column_lookups, [1])
+
+    def test_every_endpoint_stays_within_budget(self):
+        from django.test import modify_settings, override_settings
+
+        b, c, k = self.board.id, self.column.id, self.card.id
+        member = self.board.memberships.filter(role="editor").first().id
+        calls = [
+            ("get", "/api/users/"), ("get", f"/api/users/{self.user.id}/"), ("get", "/api/users/me/"),
+            ("patch", f"/api/users/{self.user.id}/", {"aboutme": "hola"}),
+            ("get", "/api/boards/"), ("get", f"/api/boards/{b}/"), ("patch", f"/api/boards/{b}/", {"title": "Nuevo"}),
+            ("get", f"/api/boards/{b}/members/"), ("patch", f"/api/boards/{b}/members/{member}/", {"role": "viewer"}),
+            ("get", f"/api/boards/{b}/columns/"), ("get", f"/api/boards/{b}/columns/{c}/"),
+            ("patch", f"/api/boards/{b}/columns/{c}/", {"title": "Renamed"}),
+            ("get", f"/api/boards/{b}/columns/{c}/cards/"), ("get", f"/api/boards/{b}/columns/{c}/cards/{k}/"),
+            ("patch", f"/api/boards/{b}/columns/{c}/cards/{k}/", {"title": "Edited"}),
+            ("post", f"/api/boards/{b}/columns/{c}/cards/", {"title": "New"}),
+            ("get", f"/api/boards/{b}/stats/"), ("get", f"/api/boards/{b}/export/"), ("get", "/api/boards/templates/"),
+            ("post", "/api/boards/from-template/", {"template": "kanban"}), ("post", f"/api/boards/{b}/duplicate/", {}),
+            ("get", "/api/search/", {"q": "card"}), ("get", "/api/cards/due/", {"days": 10000}),
+            ("get", "/api/releases/"), ("get", "/api/healthz/"), ("get", "/api/metrics/"),
+            ("delete", f"/api/boards/{b}/columns/{c}/cards/{k}/"), ("delete", f"/api/boards/{b}/columns/{c}/"),
+            ("delete", f"/api/boards/{b}/"),
+        ]
+        with modify_settings(MIDDLEWARE={"append": "Product.middleware.QueryBudgetMiddleware"}), \
+                override_settings(QUERY_BUDGET_STRICT=True, METRICS_TOKEN="t"):
+            self.client.credentials(HTTP_AUTHORIZATION="Bearer t")  # only read by /metrics/ (forced auth)
+            for method, url, *data in calls:
+                res = getattr(self.client, method)(url, *data, format="json") if method != "get" else self.client.get(url, *data)
+                self.assertLess(res.status_code, 300, (method, url, getattr(res, "data", None)))
+                if getattr(res, "streaming", False):
+                    b"".join(res.streaming_content)
+
+
+class BenchmarkTests(TestCase):
+    """
+    Pruebas del generador de datos sintéticos y del benchmark en proceso.
+    """
+
+    def test_seed_creates_requested_scale(self):
+        from .benchmark import delete_seeded, seed
+
+        counts = seed(users=3, boards=2, columns=2, cards=3, members=1, prefix="syn")
+        self.assertEqual(counts, {"users": 3, "boards": 6, "memberships": 12, "columns": 12, "cards": 36})
+        self.assertEqual(Card.objects.filter(column__board__user__email="syn0@example.com").count(), 12)
+        # every board has its owner membership even though bulk_create skips signals
+        self.assertEqual(BoardMembership.objects.filter(role=BoardMembership.ROLE_OWNER).count(), 6)
+
+        delete_seeded("syn")
+        self.assertFalse(User.objects.filter(email__startswith="syn").exists())
+
+    def test_run_http_reports_percentiles_and_queries(self):
+        from .benchmark import percentile, run_http, seed
+
+        self.assertEqual(percentile([5, 1, 4, 2, 3], 50), 3)
+        self.assertEqual(percentile(list(range(1, 101)), 99), 99)
+
+        seed(users=2, boards=1, columns=2, cards=2, members=1, prefix="syn")
+        user = User.objects.get(email="syn0@example.com")
+        mix = [
+            {"name": "boards.retrieve", "method": "GET", "path": "/api/boards/{board}/", "weight": 1},
+            {"name": "cards.patch", "method": "PATCH", "path": "/api/boards/{board}/columns/{column}/cards/{card}/",
+             "body": {"title": "Edit {n}"}, "weight": 1},
+        ]
+        report = run_http(user, mix, requests=20, warmup=2, host="testserver")
+
+        self.assertEqual(set(report), {"boards.retrieve", "cards.patch"})
+        self.assertEqual(sum(row["requests"] for row in report.values()), 20)
+        for row in report.values():
+            self.assertEqual(row["errors"], 0)
+            self.assertLessEqual(row["p50"], row["p95"])
+            self.assertLessEqual(row["p95"], row["p99"])
+            self.assertGreater(row["queries"], 0)
+
+
+class RealtimeMetricsTests(TestCase):
+    """
+    Pruebas de las métricas del camino realtime (emisión, envíos perdidos y entrega).
+    """
+
+    def setUp(self):
+        from . import metrics
+
+        metrics.reset()
+        self.metrics = metrics
+        self.user = User.objects.create(name="Ws", email="ws@example.com", password_hash="x")
+        self.board = Board.objects.create(user=self.user, title="WS")
+        self.column = Column.objects.create(board=self.board, title="Todo", position=0)
+
+    def test_failed_group_send_is_logged_and_counted(self):
+        from . import realtime
+
+        layer = mock.Mock()
+        layer.group_send = mock.AsyncMock(side_effect=ConnectionError("redis down"))
+        self.addCleanup(realtime.reset)
+        realtime.reset()
+        with mock.patch("channels.layers.get_channel_layer", return_value=layer), \
+                self.assertLogs("Product.realtime", "WARNING") as logs:
+            Card.objects.create(column=self.column, title="T")
+            realtime.flush()
+
+        self.assertIn("card.created", logs.output[0])
+        events_key = (("board", self.board.id), ("event", "card.created"))
+        self.assertEqual(self.metrics.ws_events.values[events_key], 1)
+        dropped_key = (("event", "card.created"), ("reason", "ConnectionError"))
+        self.assertEqual(self.metrics.ws_dropped.values[dropped_key], 1)
+
+        layer.group_send = mock.AsyncMock()
+        Card.objects.create(column=self.column, title="U")
+        realtime.flush()
+        self.assertEqual(self.metrics.ws_group_send.values[(("event", "card.created"),)][2], 1)
+
+    def test_publisher_resolves_layer_once_and_sends_in_background(self):
+        from . import realtime
+
+        layer = mock.Mock()
+        sent = []
+        sender_threads = set()
+
+        async def group_send(group, message):
+            sender_threads.add(threading.current_thread().name)
+            sent.append((group, message["payload"]["d"]["title"]))
+
+        layer.group_send = group_send
+        self.addCleanup(realtime.reset)
+        realtime.reset()
+        with mock.patch("channels.layers.get_channel_layer", return_value=layer) as get_layer:
+            for i in range(20):
+                Card.objects.create(column=self.column, title=f"C{i}")
+            realtime.flush()
+
+        get_layer.assert_called_once()
+        self.assertEqual(sent, [(f"board_{self.board.id}", f"C{i}") for i in range(20)])
+        self.assertEqual(sender_threads, {"cardtrack-realtime"})
+
+    def test_chat_frames_follow_the_negotiated_subprotocol(self):
+        from asgiref.sync import async_to_sync
+        from .consumers import BoardChatConsumer
+
+        message = {"id": 1, "board": 2, "user": 3, "content": "hola", "created_at": "2026-01-01T00:00:00"}
+        sent = {}
+        for subprotocol in (None, events.SUBPROTOCOL_JSON, events.SUBPROTOCOL_MSGPACK):
+            consumer = BoardChatConsumer()
+            consumer.subprotocol = subprotocol
+            consumer.send = mock.AsyncMock()
+            async_to_sync(consumer.chat_message)({"type": "chat.message", "message": message})
+            sent[subprotocol] = consumer.send.await_args.kwargs
+
+        self.assertEqual(json.loads(sent[None]["text_data"]), message)
+        envelope = json.loads(sent[events.SUBPROTOCOL_JSON]["text_data"])
+        self.assertEqual((envelope["e"], envelope["d"]), ("chat.message", message))
+        if events.msgpack is not None:
+            self.assertIsNone(sent[events.SUBPROTOCOL_MSGPACK]["text_data"])
+            self.assertEqual(events.msgpack.unpackb(sent[events.SUBPROTOCOL_MSGPACK]["bytes_data"])["d"], message)
+
+    def test_consumer_records_delivery_latency(self):
+        from asgiref.sync import async_to_sync
+        from .consumers import BoardChatConsumer
+
+        consumer = BoardChatConsumer()
+        consumer.subprotocol = events.SUBPROTOCOL_JSON
+        consumer.send = mock.AsyncMock()
+        envelope = events.build_event("card.deleted", {"id": 1, "column_id": 2})
+        envelope["ts"] -= 250
+        async_to_sync(consumer.broadcast)({"type": "broadcast", "payload": envelope})
+
+        consumer.send.assert_awaited_once()
+        self.assertEqual(self.metrics.ws_delivered.values[(("event", "card.deleted"),)], 1)
+        _, total, count = self.metrics.ws_delivery_latency.values[(("event", "card.deleted"),)]
+        self.assertEqual(count, 1)
+        self.assertGreaterEqual(total, 0.25)
+        self.assertIn("cardtrack_ws_delivery_latency_seconds_count", self.metrics.render())
+
+
+class SlowQueryLogTests(TestCase):
+    """
+    Pruebas del registro de queries lentas con EXPLAIN.
+    """
+
+    def setUp(self):
+        from . import slowqueries
+
+        slowqueries._explained.clear()
+        self.client = APIClient()
+        self.user = User.objects.create(name="Slow", email="slow@example.com", password_hash="x")
+        self.client.force_authenticate(self.user)
+        self.board = Board.objects.create(user=self.user, title="Slow")
+
+    def test_slow_queries_are_stored_per_shape_with_plan(self):
+        from django.test import override_settings
+        from .models import SlowQuery
+
+        with override_settings(SLOW_QUERY_MS=0.0001, SLOW_QUERY_SAMPLE_RATE=1.0), \
+                self.assertLogs("Product.slowqueries", "WARNING"):
+            res = self.client.get(f"/api/boards/{self.board.id}/")
+            self.client.get(f"/api/boards/{self.board.id}/")
+        self.assertEqual(res.status_code, 200)
+
+        board_query = SlowQuery.objects.filter(shape__contains='FROM "Product_board"', view="BoardViewSet.retrieve").first()
+        self.assertIsNotNone(board_query)
+        self.assertGreaterEqual(board_query.count, 2)
+        self.assertIn("SELECT", board_query.sql)
+        self.assertTrue(board_query.explain)
+        self.assertNotIn("failed", board_query.explain)
+        # application frames only: the test issuing the request, not Django/DRF internals
+        self.assertIn("test_slow_queries_are_stored_per_shape_with_plan", board_query.stack)
+        self.assertNotIn("site-packages", board_query.stack)
+        # the hook does not log its own EXPLAIN/insert statements
+        self.assertFalse(SlowQuery.objects.filter(shape__contains="Product_slowquery").exists())
+
+    def test_params_are_redacted_unless_enabled(self):
+        from django.test import override_settings
+        from .models import SlowQuery
+
+        with override_settings(SLOW_QUERY_MS=0.0001, SLOW_QUERY_SAMPLE_RATE=1.0), \
+                self.assertLogs("Product.slowqueries", "WARNING") as logs:
+            User.objects.filter(email="secret@example.com").exists()
+        row = SlowQuery.objects.get(shape__contains='WHERE "Product_user"."email"')
+        self.assertEqual(row.params, "<2 redacted>")
+        self.assertIn("params=<2 redacted>", logs.output[0])
+
+        SlowQuery.objects.all().delete()
+        with override_settings(SLOW_QUERY_MS=0.0001, SLOW_QUERY_SAMPLE_RATE=1.0, SLOW_QUERY_LOG_PARAMS=True), \
+                self.assertLogs("Product.slowqueries", "WARNING"):
+            User.objects.filter(email="secret@example.com").exists()
+        self.assertIn("secret@example.com", SlowQuery.objects.get(shape__contains='WHERE "Product_user"."email"').params)
+
+    def test_sampling_and_threshold(self):
+        from django.test import override_settings
+        from .models import SlowQuery
+
+        with override_settings(SLOW_QUERY_MS=0.0001, SLOW_QUERY_SAMPLE_RATE=0.0):
+            self.client.get(f"/api/boards/{self.board.id}/")
+        with override_settings(SLOW_QUERY_MS=60000, SLOW_QUERY_SAMPLE_RATE=1.0):
+            self.client.get(f"/api/boards/{self.board.id}/")
+        self.assertFalse(SlowQuery.objects.exists())
+
+
+class StartupTests(TestCase):
+    """
+    Pruebas del perfil de arranque y de la escritura del certificado CA.
+    """
+
+    def test_parse_importtime(self):
+        from .startup import parse_importtime, summarize_imports
+
+        text = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       100 |        100 |     yaml.error\n"
+            "import time:      2000 |       2100 |   yaml\n"
+            "import time:       500 |       2600 | rest_framework.compat\n"
+        )
+        rows = parse_importtime(text)
+        self.assertEqual(rows[0], ("yaml.error", 100, 100, 2))
+        summary = summarize_imports(rows, top=2)
+        self.assertEqual(summary["modules"], 3)
+        self.assertEqual(summary["packages"][0], ("yaml", 2.1))
+        self.assertEqual(summary["slowest"][0], ("rest_framework.compat", 2.6))
+
+    def test_ca_file_is_only_written_when_changed(self):
+        import tempfile
+        from pathlib import Path
+        from CardTrack import settings as project_settings
+
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(project_settings, "BASE_DIR", Path(tmp)):
+            path = project_settings._write_ca_file("-----BEGIN-----\\nabc\\n-----END-----")
+            self.assertEqual(Path(path).read_text(), "-----BEGIN-----\nabc\n-----END-----")
+            with mock.patch.object(Path, "write_text") as write:
+                self.assertEqual(project_settings._write_ca_file("-----BEGIN-----\\nabc\\n-----END-----"), path)
+            write.assert_not_called()
+
+
+class SignedTokenAuthTests(TestCase):
+    """
+    Pruebas de la autenticación con tokens firmados (HTTP y WebSocket).
+    """
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create(
+            name="Tok", email="tok@example.com", password_hash=make_password("oldpassword")
+        )
+
+    def test_user_is_verified_without_queries(self):
+        from . import tokens
+
+        token = tokens.issue_token(self.user)
+        tokens.user_from_token(token)  # first use reads and caches token_version
+        with self.assertNumQueries(0):
+            user = tokens.user_from_token(token)
+            self.assertEqual(user.id, self.user.id)
+        # the rest of the row is loaded once, not per field
+        with self.assertNumQueries(1):
+            self.assertEqual((user.email, user.name), ("tok@example.com", "Tok"))
+            self.assertIsNone(user.aboutme)
+
+    def test_keywords_and_rejected_tokens(self):
+        from django.test import override_settings
+        from . import tokens
+
+        token = tokens.issue_token(self.user)
+        for keyword in ("Token", "Bearer"):
+            res = self.client.get("/api/users/me/", HTTP_AUTHORIZATION=f"{keyword} {token}")
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(res.data["email"], "tok@example.com")
+
+        for bad in ("fake-token-tok@example.com", token[:-2] + "xx"):
+            res = self.client.get("/api/users/me/", HTTP_AUTHORIZATION=f"Token {bad}")
+            self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        with override_settings(AUTH_TOKEN_MAX_AGE=-1):
+            res = self.client.get("/api/users/me/", HTTP_AUTHORIZATION=f"Token {token}")
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_revokes_previous_tokens(self):
+        from . import tokens
+
+        old = tokens.issue_token(self.user)
+        res = self.client.post(
+            f"/api/users/{self.user.id}/change-password/",
+            {"current_password": "oldpassword", "new_password": "newpassword"},
+            format="json",
+            HTTP_AUTHORIZATION=f"Token {old}",
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get("/api/users/me/", HTTP_AUTHORIZATION=f"Token {old}").status_code, 401)
+        fresh = self.client.get("/api/users/me/", HTTP_AUTHORIZATION=f"Token {res.data['token']}")
+        self.assertEqual(fresh.status_code, status.HTTP_200_OK)
+
+    def test_every_password_reset_revokes_previous_tokens(self):
+        from django.core.management import call_command
+        from . import tokens
+
+        old = tokens.issue_token(self.user)
+        self.client.force_authenticate(user=self.user)
+        res = self.client.patch(f"/api/users/{self.user.id}/", {"password": "patchedpass"}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get("/api/users/me/", HTTP_AUTHORIZATION=f"Token {old}").status_code, 401)
+
+        self.user.refresh_from_db()
+        old = tokens.issue_token(self.user)
+        call_command("set_user_password", email="tok@example.com", password="commandpass", stdout=io.StringIO())
+        self.assertEqual(self.client.get("/api/users/me/", HTTP_AUTHORIZATION=f"Token {old}").status_code, 401)
+
+    def test_production_refuses_the_repository_secret_key(self):
+        import subprocess
+        import sys
+
+        env = {k: v for k, v in os.environ.items() if k != "SECRET_KEY"}
+        code = "import CardTrack.settings"
+        cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        failed = subprocess.run([sys.executable, "-c", code], env={**env, "DEBUG": "False"}, cwd=cwd, capture_output=True, text=True)
+        self.assertNotEqual(failed.returncode, 0)
+        self.assertIn("ImproperlyConfigured", failed.stderr)
+        ok = subprocess.run([sys.executable, "-c", code], env={**env, "DEBUG": "False", "SECRET_KEY": "x" * 50}, cwd=cwd)
+        self.assertEqual(ok.returncode, 0)
+
+    def test_websocket_middleware_accepts_signed_tokens_only(self):
+        from asgiref.sync import async_to_sync
+        from . import tokens
+        from .ws_auth import TokenAuthMiddleware
+
+        seen = []
+
+        async def app(scope, receive, send):
+            seen.append(scope["user"])
+
+        middleware = TokenAuthMiddleware(app)
+        token = tokens.issue_token(self.user)
+        for scope in (
+            {"type": "websocket", "query_string": f"token={token}".encode(), "headers": []},
+            {"type": "websocket", "query_string": b"", "headers": [(b"authorization", f"Bearer {token}".encode())]},
+            {"type": "websocket", "query_string": b"token=fake-token-tok@example.com", "headers": []},
+        ):
+            async_to_sync(middleware)(scope, None, None)
+        self.assertEqual([getattr(u, "id", None) for u in seen], [self.user.id, self.user.id, None])
+
+
+class ThrottlingTests(TestCase):
+    """
+    Pruebas de los límites de tasa (token bucket) para la API y los sockets.
+    """
+
+    def setUp(self):
+        from django.core.cache import cache
+        from . import throttling
+
+        cache.clear()
+        throttling.reset()
+        self.client = APIClient()
+        self.user = User.objects.create(name="Rate", email="rate@example.com", password_hash=make_password("secret123"))
+
+    def test_bucket_allows_burst_then_refills(self):
+        from . import throttling
+
+        buckets = throttling.LocalBuckets()
+        with mock.patch("Product.throttling.time.monotonic", return_value=100.0):
+            self.assertEqual([buckets.consume("k", 3, 60) for _ in range(3)], [0, 0, 0])
+            self.assertAlmostEqual(buckets.consume("k", 3, 60), 20.0)
+            self.assertEqual(buckets.consume("other", 3, 60), 0)
+        with mock.patch("Product.throttling.time.monotonic", return_value=120.0):
+            self.assertEqual(buckets.consume("k", 3, 60), 0)
+            self.assertGreater(buckets.consume("k", 3, 60), 0)
+        self.assertEqual(throttling.parse_rate("10/min"), (10, 60))
+        self.assertIsNone(throttling.parse_rate(None))
+
+    def test_login_is_limited_per_ip(self):
+        from django.test import override_settings
+        from . import metrics
+
+        body = {"email": "rate@example.com", "password": "wrong"}
+        codes = [self.client.post("/api/users/login/", body, format="json").status_code for _ in range(10)]
+        self.assertEqual(set(codes), {status.HTTP_400_BAD_REQUEST})
+        res = self.client.post("/api/users/login/", body, format="json")
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertGreater(int(res["Retry-After"]), 0)
+        self.assertGreaterEqual(metrics.throttled.values[(("scope", "login"),)], 1)
+
+        other_ip = self.client.post("/api/users/login/", body, format="json", REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(other_ip.status_code, status.HTTP_400_BAD_REQUEST)
+        with override_settings(THROTTLE_ENABLED=False):
+            res = self.client.post("/api/users/login/", body, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_forged_forwarded_for_does_not_reset_the_limit(self):
+        body = {"email": "rate@example.com", "password": "wrong"}
+        # The proxy appends the real client address; anything before it comes from the client
+        for _ in range(10):
+            self.client.post("/api/users/login/", body, format="json", HTTP_X_FORWARDED_FOR="203.0.113.5")
+        codes = [
+            self.client.post(
+                "/api/users/login/", body, format="json", HTTP_X_FORWARDED_FOR=f"198.51.100.{i}, 203.0.113.5"
+            ).status_code
+            for i in range(3)
+        ]
+        self.assertEqual(codes, [status.HTTP_429_TOO_MANY_REQUESTS] * 3)
+
+    def test_invite_is_limited_per_user(self):
+        from django.conf import settings
+        from django.test import override_settings
+
+        board = Board.objects.create(user=self.user, title="B")
+        self.client.force_authenticate(user=self.user)
+        rates = {**settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"], "invite": "2/min"}
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": rates}):
+            codes = [
+                self.client.post(f"/api/boards/{board.id}/members/", {"email": f"m{i}@example.com"}, format="json").status_code
+                for i in range(3)
+            ]
+        self.assertEqual(codes, [status.HTTP_201_CREATED, status.HTTP_201_CREATED, status.HTTP_429_TOO_MANY_REQUESTS])
+
+    def test_socket_messages_are_limited_per_user(self):
+        from asgiref.sync import async_to_sync
+        from .consumers import BoardChatConsumer
+
+        consumer = BoardChatConsumer()
+        consumer.board_id = 1
+        consumer.group_name = "board_1"
+        consumer.scope = {"user": self.user}
+        consumer.send = mock.AsyncMock()
+        with mock.patch("Product.consumers._save_message", mock.AsyncMock(return_value=None)) as save:
+            for _ in range(31):
+                async_to_sync(consumer.receive_json)({"type": "message", "content": "hola"})
+        self.assertEqual(save.await_count, 30)
+        frame = json.loads(consumer.send.await_args.kwargs["text_data"])
+        self.assertEqual((frame["type"], frame["code"]), ("error", "throttled"))
+        self.assertGreater(frame["retry_after"], 0)
+
+
+class BulkInviteTests(TestCase):
+    """
+    Pruebas de las invitaciones masivas a un tablero.
+    """
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.client = APIClient()
+        self.owner = User.objects.create(name="Owner", email="owner@example.com", password_hash="x")
+        self.board = Board.objects.create(user=self.owner, title="Team")
+        self.existing = User.objects.create(name="Ana", email="ana@example.com", password_hash="x")
+        self.member = User.objects.create(name="Beto", email="beto@example.com", password_hash="x")
+        BoardMembership.objects.create(board=self.board, user=self.member, role="editor")
+        self.client.force_authenticate(user=self.owner)
+        self.url = f"/api/boards/{self.board.id}/members/bulk/"
+
+    def test_results_per_email(self):
+        invites = [
+            "ana@example.com",
+            {"email": "new@example.com", "role": "editor"},
+            "beto@example.com",
+            "owner@example.com",
+            "new@example.com",
+            "not-an-email",
+            {"email": "x@example.com", "role": "owner"},
+        ]
+        res = self.client.post(self.url, {"invites": invites}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["invited"], 2)
+        results = res.data["results"]
+        self.assertEqual(
+            [r["status"] for r in results],
+            ["invited", "invited", "already_member", "already_member", "duplicate", "invalid", "invalid"],
+        )
+        self.assertEqual((results[0]["user"], results[0]["user_created"]), (self.existing.id, False))
+        self.assertTrue(results[1]["user_created"])
+        self.assertEqual(results[2]["role"], "editor")
+        self.assertEqual(results[3]["role"], "owner")
+
+        new_user = User.objects.get(email="new@example.com")
+        self.assertEqual(new_user.name, "new")
+        roles = dict(BoardMembership.objects.filter(board=self.board).values_list("user__email", "role"))
+        self.assertEqual(roles["ana@example.com"], "viewer")
+        self.assertEqual(roles["new@example.com"], "editor")
+        self.assertEqual(roles["beto@example.com"], "editor")
+        self.assertNotIn("x@example.com", roles)
+
+    def test_emails_match_case_insensitively(self):
+        dora = User.objects.create(name="Dora", email="Dora@Example.com", password_hash="x")
+        invites = ["ANA@example.com", "Carl@Example.com", "carl@example.COM", "Dora@Example.com", "dora@example.com"]
+        res = self.client.post(self.url, {"invites": invites}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        results = res.data["results"]
+        self.assertEqual([r["status"] for r in results], ["invited", "invited", "duplicate", "invited", "duplicate"])
+        self.assertEqual((results[0]["user"], results[0]["user_created"]), (self.existing.id, False))
+        self.assertTrue(results[1]["user_created"])
+        self.assertEqual(User.objects.get(id=results[1]["user"]).email, "carl@example.com")
+        self.assertEqual((results[3]["user"], results[3]["user_created"]), (dora.id, False))
+
+    def test_user_created_by_a_concurrent_signup_is_not_reported_as_created(self):
+        original = User.objects.bulk_create
+
+        def signup_first(objs, **kwargs):
+            User.objects.create(name="Eve", email="eve@example.com", password_hash="x")
+            return original(objs, **kwargs)
+
+        with mock.patch.object(User.objects, "bulk_create", side_effect=signup_first):
+            res = self.client.post(self.url, {"invites": ["eve@example.com", "fred@example.com"]}, format="json")
+        eve, fred = res.data["results"]
+        self.assertEqual((eve["status"], eve["user_created"]), ("invited", False))
+        self.assertEqual(eve["user"], User.objects.get(email="eve@example.com").id)
+        self.assertTrue(fred["user_created"])
+
+    def test_query_count_does_not_grow_with_batch(self):
+        from .querybudget import query_budget
+
+        # 100 new users fit in one INSERT on SQLite, which caps parameters per query
+        emails = [f"team{i}@example.com" for i in range(100)] + ["ana@example.com"]
+        with query_budget(6):
+            res = self.client.post(self.url, {"invites": emails, "role": "editor"}, format="json")
+        self.assertEqual(res.data["invited"], 101)
+        self.assertEqual(BoardMembership.objects.filter(board=self.board, role="editor").count(), 102)
+
+    def test_only_owner_and_limits(self):
+        from django.test import override_settings
+
+        self.client.force_authenticate(user=self.member)
+        res = self.client.post(self.url, {"invites": ["z@example.com"]}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.force_authenticate(user=self.owner)
+        self.assertEqual(self.client.post(self.url, {"invites": []}, format="json").status_code, 400)
+        res = self.client.post(self.url, {"invites": ["z@example.com"], "role": "owner"}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        with override_settings(INVITE_MAX_BATCH=2):
+            res = self.client.post(self.url, {"invites": ["a@x.com", "b@x.com", "c@x.com"]}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(User.objects.filter(email="z@example.com").exists())
@@ -0,0 +1,187 @@
+"""Token-bucket rate limiting for the REST API and board sockets.
+
+A rate ``'N/period'`` (DRF syntax: ``'10/min'``, ``'1000/hour'``) is a bucket of
+``N`` tokens refilled at ``N / period`` tokens per second. A client can burst up to
+``N`` requests and is then held to the steady rate. Each request takes one token.
+When the bucket is empty, the wait until the next token is reported (``Retry-After``).
+
+Two stores share the ``consume(key, capacity, period) -> wait`` interface:
+
+- ``CacheBuckets`` keeps ``(tokens, stamp)`` per key in a Django cache
+  (``THROTTLE_CACHE``). With a shared cache (Redis, Memcached) the limits are
+  global. Updates are atomic within a process (striped locks). Across processes
+  a race can let a few extra requests through, which is acceptable for abuse
+  protection. With the default local-memory cache, each process has its own
+  buckets.
+- ``LocalBuckets``: a dict under a lock. No I/O, so it is safe to call from the
+  socket event loop. Used for WebSocket limits.
+
+Keys expire once their bucket would be full again, so idle clients cost nothing.
+
+REST throttles are configured in ``REST_FRAMEWORK``: ``AnonRateThrottle`` (per
+IP), ``UserRateThrottle`` (per user) and ``ActionRateThrottle``. The latter uses
+the scope a viewset assigns to the action in ``throttle_scopes``, for example
+``{'login': 'login'}``. Rates come from ``DEFAULT_THROTTLE_RATES``; a scope
+without a rate is not limited. ``THROTTLE_ENABLED = False`` turns every limit off.
+"""
+import threading
+import time
+import zlib
+
+from django.conf import settings
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from . import metrics
+
+_PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+_STRIPES = 64
+
+
+def enabled() -> bool:
+    return getattr(settings, 'THROTTLE_ENABLED', True)
+
+
+def parse_rate(rate):
+    """``'10/min'`` -> (10, 60); None for a missing rate."""
+    if not rate:
+        return None
+    num, period = rate.split('/')
+    return int(num), _PERIODS[period.strip()[0]]
+
+
+def rate_for(scope):
+    return parse_rate(api_settings.DEFAULT_THROTTLE_RATES.get(scope))
+
+
+def _take(state, capacity, period, now):
+    """Refill ``state`` (tokens, stamp) and take a token: returns (new_state, wait)."""
+    if state is None:
+        tokens = float(capacity)
+    else:
+        tokens, stamp = state
+        tokens = min(float(capacity), tokens + (now - stamp) * capacity / period)
+    if tokens >= 1:
+        return (tokens - 1, now), 0.0
+    return (tokens, now), (1 - tokens) * period / capacity
+
+
+class LocalBuckets:
+    """Buckets in process memory; expired keys are swept as new ones arrive."""
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def consume(self, key, capacity, period) -> float:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._buckets.get(key)
+            if entry is None and len(self._buckets) >= self.max_keys:
+                self._sweep(now)
+            state, wait = _take(entry[0] if entry else None, capacity, period, now)
+            self._buckets[key] = (state, now + period)
+            return wait
+
+    def _sweep(self, now):
+        self._buckets = {key: entry for key, entry in self._buckets.items() if entry[1] > now}
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBuckets:
+    """Buckets in the Django cache ``THROTTLE_CACHE`` (default: ``'default'``)."""
+
+    def __init__(self):
+        self._locks = [threading.Lock() for _ in range(_STRIPES)]
+
+    def consume(self, key, capacity, period) -> float:
+        from django.core.cache import caches
+
+        cache = caches[getattr(settings, 'THROTTLE_CACHE', 'default')]
+        now = time.time()
+        with self._locks[zlib.crc32(key.encode()) % _STRIPES]:
+            state, wait = _take(cache.get(key), capacity, period, now)
+            cache.set(key, state, period)
+        return wait
+
+
+cache_buckets = CacheBuckets()
+local_buckets = LocalBuckets()
+
+
+def throttle(buckets, scope, ident) -> float:
+    """Take a token for ``ident`` in ``scope``; returns 0 when allowed, else seconds to wait."""
+    if not enabled():
+        return 0.0
+    rate = rate_for(scope)
+    if rate is None or ident is None:
+        return 0.0
+    wait = buckets.consume(f'throttle:{scope}:{ident}', *rate)
+    if wait:
+        metrics.throttled.inc({'scope': scope})
+    return wait
+
+
+class BucketThrottle(BaseThrottle):
+    """DRF throttle backed by ``cache_buckets``; subclasses pick the scope and the client key."""
+
+    scope = None
+
+    def get_scope(self, request, view):
+        return self.scope
+
+    def get_ident_for(self, request, view):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(request, view)
+        if scope is None:
+            return True
+        self._wait = throttle(cache_buckets, scope, self.get_ident_for(request, view))
+        return not self._wait
+
+    def wait(self):
+        return self._wait
+
+
+class AnonRateThrottle(BucketThrottle):
+    """Unauthenticated requests, per client IP (as seen by our proxy, see ``NUM_PROXIES``)."""
+
+    scope = 'anon'
+
+    def get_ident_for(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return None
+        return self.get_ident(request)
+
+
+class UserRateThrottle(BucketThrottle):
+    """Authenticated requests, per user."""
+
+    scope = 'user'
+
+    def get_ident_for(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return request.user.id
+        return None
+
+
+class ActionRateThrottle(BucketThrottle):
+    """Per-action limits from ``view.throttle_scopes``: per user, or per IP when anonymous."""
+
+    def get_scope(self, request, view):
+        return getattr(view, 'throttle_scopes', {}).get(getattr(view, 'action', None))
+
+    def get_ident_for(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.id}'
+        return f'ip:{self.get_ident(request)}'
+
+
+def reset():
+    """Forget every local bucket (tests). Cache-backed buckets go with ``cache.clear()``."""
+    local_buckets.clear()
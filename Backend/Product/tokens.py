@@ -0,0 +1,89 @@
+"""Signed, stateless auth tokens.
+
+A token is ``{"uid": <user id>, "ver": <User.token_version>}`` signed with
+``SECRET_KEY`` and timestamped (``django.core.signing``), so it is verified in
+process without touching the database:
+
+- the signature and the age (``AUTH_TOKEN_MAX_AGE``) are checked first
+- ``ver`` must match the user's current ``token_version``. That version is
+  read from the cache (``AUTH_TOKEN_VERSION_CACHE_TTL``) and only queried on a
+  miss, so most requests authenticate with zero queries.
+
+Bumping ``token_version`` (``revoke_tokens``; done on password change) invalidates
+every token issued before. Other processes notice once their cached version
+expires, unless the cache is shared.
+
+The authenticated user is a ``User`` with only ``id`` and ``token_version``
+loaded. The rest of the row is fetched in one query the first time another
+field is read (see ``User.refresh_from_db``).
+"""
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import F
+
+from .models import User
+
+
+SALT = 'cardtrack.auth'
+DEFAULT_MAX_AGE = 7 * 24 * 3600
+DEFAULT_VERSION_CACHE_TTL = 300
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def _version_key(user_id):
+    return f'auth_token_version:{user_id}'
+
+
+def issue_token(user) -> str:
+    return signing.dumps({'uid': user.id, 'ver': user.token_version}, salt=SALT, compress=False)
+
+
+def read_claims(token) -> dict:
+    """Verify signature and age; returns the claims or raises InvalidToken."""
+    max_age = getattr(settings, 'AUTH_TOKEN_MAX_AGE', DEFAULT_MAX_AGE)
+    try:
+        claims = signing.loads(token, salt=SALT, max_age=max_age)
+    except signing.SignatureExpired:
+        raise InvalidToken('Token expired.')
+    except signing.BadSignature:
+        raise InvalidToken('Invalid token.')
+    if not isinstance(claims, dict) or not isinstance(claims.get('uid'), int) or not isinstance(claims.get('ver'), int):
+        raise InvalidToken('Invalid token.')
+    return claims
+
+
+def current_version(user_id):
+    """User's token_version (cached); None when the user does not exist."""
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = User.objects.filter(pk=user_id).values_list('token_version', flat=True).first()
+        if version is not None:
+            cache.set(key, version, getattr(settings, 'AUTH_TOKEN_VERSION_CACHE_TTL', DEFAULT_VERSION_CACHE_TTL))
+    return version
+
+
+def user_from_token(token) -> User:
+    """User for a valid token (without loading its row) or raises InvalidToken."""
+    claims = read_claims(token)
+    version = current_version(claims['uid'])
+    if version is None:
+        raise InvalidToken('User not found.')
+    if version != claims['ver']:
+        raise InvalidToken('Token revoked.')
+    return User.from_db(User.objects.db, ['id', 'token_version'], [claims['uid'], version])
+
+
+def revoke_tokens(user):
+    """Invalidate every token issued to ``user`` so far (its next token uses the new version)."""
+    User.objects.filter(pk=user.pk).update(token_version=F('token_version') + 1)
+    user.token_version = User.objects.filter(pk=user.pk).values_list('token_version', flat=True).get()
+    cache.set(_version_key(user.pk), user.token_version, getattr(settings, 'AUTH_TOKEN_VERSION_CACHE_TTL', DEFAULT_VERSION_CACHE_TTL))
+
+
+def forget_user(user_id):
+    cache.delete(_version_key(user_id))
@@ -0,0 +1,227 @@
+"""Streaming board export/import (NDJSON and CSV).
+
+Both formats carry the same flat records, in order: one ``board`` record, the
+``column`` records, then the ``card`` records. Column records carry their source
+id in ``column``; card records reference it through the same key.
+
+Exports read rows with ``values().iterator(chunk_size=...)`` so memory stays flat
+regardless of board size. Imports parse the stream line by line and insert cards
+with ``bulk_create`` in batches inside one transaction; per-row realtime events are
+suppressed and a single ``board.reloaded`` event is sent once the import commits.
+"""
+import csv
+import io
+import json
+from datetime import date
+
+from django.db import transaction
+
+from . import events, search, stats
+from .models import Board, Column, Card, broadcast_to_board
+
+
+EXPORT_CHUNK_SIZE = 2000
+IMPORT_BATCH_SIZE = 1000
+
+FORMAT_NDJSON = 'ndjson'
+FORMAT_CSV = 'csv'
+CONTENT_TYPES = {
+    FORMAT_NDJSON: 'application/x-ndjson',
+    FORMAT_CSV: 'text/csv',
+}
+
+CSV_HEADER = ['type', 'column', 'title', 'description', 'position', 'color', 'due_date', 'is_completed', 'priority']
+
+COLUMN_VALUES = ('id', 'title', 'position', 'color')
+CARD_VALUES = ('column_id', 'title', 'description', 'position', 'due_date', 'is_completed', 'priority')
+PRIORITIES = {'low', 'medium', 'high'}
+
+
+class BoardImportError(ValueError):
+    """Raised for malformed import streams; the surrounding transaction is rolled back."""
+
+    def __init__(self, message, line=None):
+        self.line = line
+        super().__init__(f"line {line}: {message}" if line else message)
+
+
+def iter_board_records(board: Board):
+    """Yield the export records of ``board`` as dicts."""
+    yield {'type': 'board', 'title': board.title, 'description': board.description}
+
+    columns = (
+        Column.objects.filter(board=board)
+        .order_by('position', 'id')
+        .values_list(*COLUMN_VALUES)
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    for col_id, title, position, color in columns:
+        yield {'type': 'column', 'column': col_id, 'title': title, 'position': position, 'color': color}
+
+    cards = (
+        Card.objects.filter(column__board=board)
+        .order_by('column_id', 'position', 'id')
+        .values_list(*CARD_VALUES)
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    for column_id, title, description, position, due_date, is_completed, priority in cards:
+        yield {
+            'type': 'card',
+            'column': column_id,
+            'title': title,
+            'description': description,
+            'position': position,
+            'due_date': due_date.isoformat() if due_date else None,
+            'is_completed': is_completed,
+            'priority': priority,
+        }
+
+
+def export_ndjson(board: Board):
+    """Yield the board as NDJSON lines."""
+    for record in iter_board_records(board):
+        yield json.dumps(record, separators=(',', ':')) + '\n'
+
+
+def export_csv(board: Board):
+    """Yield the board as CSV lines (header first)."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_HEADER, extrasaction='ignore')
+
+    def flush():
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+        return value
+
+    writer.writeheader()
+    yield flush()
+    for record in iter_board_records(board):
+        writer.writerow(record)
+        yield flush()
+
+
+def export_board(board: Board, fmt: str = FORMAT_NDJSON):
+    if fmt == FORMAT_CSV:
+        return export_csv(board)
+    return export_ndjson(board)
+
+
+def _decoded_lines(source):
+    """Iterate text lines from a binary/text line iterable (uploaded file or request stream)."""
+    for raw in source:
+        if isinstance(raw, bytes):
+            raw = raw.decode('utf-8-sig')
+        yield raw
+
+
+def parse_records(source, fmt: str = FORMAT_NDJSON):
+    """Yield ``(line_number, record)`` pairs parsed incrementally from ``source``."""
+    lines = _decoded_lines(source)
+    if fmt == FORMAT_CSV:
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            raise BoardImportError('invalid JSON', number)
+        if not isinstance(record, dict):
+            raise BoardImportError('expected an object', number)
+        yield number, record
+
+
+def _as_int(value, default=0):
+    if value in (None, ''):
+        return default
+    return int(value)
+
+
+def _as_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value or '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _card_from_record(record, column_id):
+    priority = record.get('priority') or 'medium'
+    if priority not in PRIORITIES:
+        raise ValueError(f"invalid priority '{priority}'")
+    return Card(
+        column_id=column_id,
+        title=(record.get('title') or '')[:100],
+        description=record.get('description') or None,
+        position=_as_int(record.get('position')),
+        due_date=date.fromisoformat(record['due_date']) if record.get('due_date') else None,
+        is_completed=_as_bool(record.get('is_completed')),
+        priority=priority,
+    )
+
+
+def import_board(source, user=None, board: Board = None, fmt: str = FORMAT_NDJSON, batch_size: int = IMPORT_BATCH_SIZE):
+    """Import a stream of records.
+
+    When ``board`` is None a new board owned by ``user`` is created from the ``board``
+    record; otherwise columns and cards are appended to ``board`` (its ``board``
+    record, if any, is ignored). Returns ``(board, counts)``.
+    """
+    column_map = {}
+    counts = {'columns': 0, 'cards': 0}
+    pending = []
+
+    def flush():
+        if pending:
+            Card.objects.bulk_create(pending, batch_size=batch_size)
+            counts['cards'] += len(pending)
+            pending.clear()
+
+    with events.suppress_board_events(), transaction.atomic():
+        for line, record in parse_records(source, fmt):
+            kind = record.get('type')
+            try:
+                if kind == 'board':
+                    if board is None:
+                        board = Board.objects.create(
+                            user=user,
+                            title=(record.get('title') or 'Imported board')[:100],
+                            description=record.get('description') or None,
+                        )
+                    continue
+                if board is None:
+                    raise BoardImportError('a board record must come first', line)
+                if kind == 'column':
+                    column = Column.objects.create(
+                        board=board,
+                        title=(record.get('title') or '')[:100],
+                        position=_as_int(record.get('position')),
+                        color=record.get('color') or '#007ACF',
+                    )
+                    column_map[str(record.get('column'))] = column.id
+                    counts['columns'] += 1
+                elif kind == 'card':
+                    column_id = column_map.get(str(record.get('column')))
+                    if column_id is None:
+                        raise BoardImportError(f"card references unknown column '{record.get('column')}'", line)
+                    pending.append(_card_from_record(record, column_id))
+                    if len(pending) >= batch_size:
+                        flush()
+                else:
+                    raise BoardImportError(f"unknown record type '{kind}'", line)
+            except (TypeError, ValueError) as exc:
+                if isinstance(exc, BoardImportError):
+                    raise
+                raise BoardImportError(str(exc), line)
+        if board is None:
+            raise BoardImportError('empty import')
+        flush()
+
+    # bulk_create skips the signal handlers that keep the search fallback index current
+    search.reindex_board(board.id)
+    stats.invalidate_board_stats(board.id)
+    broadcast_to_board(board.id, events.build_event('board.reloaded', {'id': board.id}))
+    return board, counts
@@ -1,20 +1,20 @@
 
 from django.urls import path, include
-import importlib
 from rest_framework.routers import DefaultRouter
 from rest_framework_nested import routers
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.permissions import AllowAny
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from . import metrics
+from .querybudget import budget
 from .views import UserViewSet, BoardViewSet, ColumnViewSet, CardViewSet
 from .views import CarouselImageViewSet
 from .views import ReleaseViewSet
 from .views import BoardMembershipViewSet
-
-try:
-    _SIMPLEJWT_AVAILABLE = importlib.util.find_spec('rest_framework_simplejwt') is not None
-except Exception:
-    _SIMPLEJWT_AVAILABLE = False
+from .views import SearchViewSet, DueCardsViewSet
 
 # Router principal
 router = DefaultRouter()
@@ -32,18 +32,38 @@ columns_router = routers.NestedDefaultRouter(boards_router, r'columns', lookup='
 columns_router.register(r'cards', CardViewSet, basename='column-cards')
 router.register(r'carousel-images', CarouselImageViewSet)
 router.register(r'releases', ReleaseViewSet)
+router.register(r'search', SearchViewSet, basename='search')
+router.register(r'cards/due', DueCardsViewSet, basename='due-cards')
 
+@budget(0)
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def healthz(_request):
     return Response({'status': 'ok'})
 
+@budget(0)
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def metrics_view(request):
+    """Prometheus scrape endpoint (this process only); METRICS_TOKEN, when set, is required as a bearer token.
+
+    Without a token it is only served in DEBUG: the output names boards and views.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if not token and not settings.DEBUG:
+        return HttpResponse('not found\n', status=404, content_type='text/plain')
+    if token and not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse('forbidden\n', status=403, content_type='text/plain')
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 urlpatterns = [
     path('healthz/', healthz, name='healthz'),
+    path('metrics/', metrics_view, name='metrics'),
 ]
 
-if _SIMPLEJWT_AVAILABLE:
-    _sjwt = importlib.import_module('rest_framework_simplejwt.views')
+if getattr(settings, 'SIMPLEJWT_ENDPOINTS', False):
+    from rest_framework_simplejwt import views as _sjwt
     urlpatterns += [
         # JWT token endpoints
         path('token/', _sjwt.TokenObtainPairView.as_view(), name='token_obtain_pair'),
@@ -1,7 +1,6 @@
 from django.utils import timezone
 from django.db import models
-import os
-from pathlib import Path
+from django.db.models import prefetch_related_objects
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status, viewsets
@@ -16,14 +15,34 @@ from .serializers import BoardMembershipSerializer
 from .models import Release
 from .serializers import ReleaseSerializer
 
+from . import transfer
+from . import board_templates
+from . import deletion
+from . import carousel
+from . import search
+from . import feeds
+from . import invitations
+from . import stats
+from . import tokens
+from .filters import cards_prefetch, filter_cards
+
 import logging
 from django.db import IntegrityError
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
 
 logger = logging.getLogger(__name__)
 
 
 class UserViewSet(viewsets.ModelViewSet):
     parser_classes = [MultiPartParser, FormParser, JSONParser]
+    # Max queries per action, checked by QueryBudgetMiddleware (see Product.querybudget)
+    query_budgets = {
+        'list': 1, 'retrieve': 1, 'me': 0, 'create': 2, 'register': 2, 'login': 2,
+        'update': 2, 'partial_update': 2, 'change_password': 4,
+    }
+    # Per-action rate limits (see Product.throttling)
+    throttle_scopes = {'login': 'login', 'register': 'register'}
 
     @action(detail=False, methods=["get"], url_path="me", permission_classes=[IsAuthenticated])
     def me(self, request):
@@ -100,8 +119,9 @@ class UserViewSet(viewsets.ModelViewSet):
 
         if check_password(password, user.password_hash):
             user.last_login = timezone.now()
-            user.save()
-            token = f"fake-token-{user.email}"
+            # Only last_login: writing the row back could undo a concurrent revoke_tokens()
+            user.save(update_fields=['last_login'])
+            token = tokens.issue_token(user)
             return Response({
                 "message": "Login exitoso",
                 "user_id": user.id,
@@ -143,12 +163,19 @@ class UserViewSet(viewsets.ModelViewSet):
 
         # everything ok -> set new password
         instance.password_hash = make_password(new)
-        instance.save()
-        return Response({'message': 'Contraseña actualizada'}, status=status.HTTP_200_OK)
+        instance.save(update_fields=['password_hash'])
+        # tokens issued with the old password stop working; the caller gets a fresh one
+        tokens.revoke_tokens(instance)
+        return Response({'message': 'Contraseña actualizada', 'token': tokens.issue_token(instance)}, status=status.HTTP_200_OK)
 
 
 class BoardMembershipViewSet(viewsets.ModelViewSet):
     serializer_class = BoardMembershipSerializer
+    query_budgets = {
+        'list': 3, 'retrieve': 3, 'create': 4, 'update': 5, 'partial_update': 5, 'destroy': 4,
+        'bulk_invite': 6,
+    }
+    throttle_scopes = {'create': 'invite', 'bulk_invite': 'invite'}
 
     def get_queryset(self):
         board_id = self.kwargs.get('board_pk')
@@ -180,7 +207,7 @@ class BoardMembershipViewSet(viewsets.ModelViewSet):
         board_id = self.kwargs.get('board_pk')
         try:
             # Solo el owner del board puede invitar/añadir miembros
-            board = Board.objects.get(id=board_id, user=self.request.user)
+            board = Board.objects.get(id=board_id, user=self.request.user, deleted_at__isnull=True)
         except Board.DoesNotExist:
             raise NotFound('Board no encontrado o sin permiso para modificar miembros.')
         # Do not allow creating owner via API
@@ -203,6 +230,35 @@ class BoardMembershipViewSet(viewsets.ModelViewSet):
         # otherwise expect user PK provided in validated_data
         serializer.save(board=board)
 
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_invite(self, request, board_pk=None):
+        """Invite many people at once. Only the board owner can invite.
+
+        Accepts JSON: { "role": "viewer", "invites": ["a@example.com", {"email": "b@example.com", "role": "editor"}] }
+        ``role`` is the default for entries without one. Missing users are created.
+        Returns one result per entry, in order (see Product.invitations).
+        """
+        try:
+            board = Board.objects.get(id=board_pk, user=request.user, deleted_at__isnull=True)
+        except Board.DoesNotExist:
+            raise NotFound('Board no encontrado o sin permiso para invitar.')
+
+        items = request.data.get('invites')
+        if not isinstance(items, list) or not items:
+            return Response({'invites': ['Se espera una lista no vacía de emails.']}, status=status.HTTP_400_BAD_REQUEST)
+        max_batch = getattr(settings, 'INVITE_MAX_BATCH', invitations.DEFAULT_MAX_BATCH)
+        if len(items) > max_batch:
+            return Response({'invites': [f'Máximo {max_batch} invitaciones por solicitud.']}, status=status.HTTP_400_BAD_REQUEST)
+        default_role = request.data.get('role') or BoardMembership.ROLE_VIEWER
+        if default_role not in invitations.INVITABLE_ROLES:
+            return Response({'role': ['Valor inválido o no permitido']}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = invitations.invite_many(board, invitations.parse_entries(items, default_role))
+        return Response({
+            'invited': sum(1 for r in results if r['status'] == 'invited'),
+            'results': results,
+        })
+
     def perform_update(self, serializer):
         """Enforce role-change rules:
 
@@ -244,26 +300,71 @@ class BoardMembershipViewSet(viewsets.ModelViewSet):
         return super().perform_destroy(instance)
 
 
+class SearchViewSet(viewsets.ViewSet):
+    """GET /api/search/?q=texto&limit=20: boards, columns and cards the user can access."""
+    # 2 per kind with FULLTEXT; the first fallback search also builds the in-process index
+    query_budgets = {'list': 5}
+
+    def list(self, request):
+        query = (request.query_params.get('q') or '').strip()
+        if not search.tokenize(query):
+            return Response({'q': ['Este campo es requerido.']}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.query_params.get('limit', search.DEFAULT_LIMIT))
+        except (TypeError, ValueError):
+            return Response({'limit': ['Debe ser un número entero.']}, status=status.HTTP_400_BAD_REQUEST)
+        results = search.search(request.user, query, limit=limit)
+        return Response({'query': query, **results})
+
+
+class DueCardsViewSet(viewsets.ViewSet):
+    """GET /api/cards/due/?days=7&overdue=true&limit=50&cursor=: open cards due soon on all my boards."""
+    query_budgets = {'list': 1}
+
+    def list(self, request):
+        return Response(feeds.due_feed(request.user, request.query_params))
+
+
 class BoardViewSet(viewsets.ModelViewSet):
     serializer_class = BoardSerializer
+    query_budgets = {
+        'list': 3, 'retrieve': 3, 'create': 4, 'update': 8, 'partial_update': 8, 'destroy': 18,
+        'leave': 2, 'invite': 4, 'export': 3, 'import_board': 8, 'import_into': 8, 'stats': 3,
+        'duplicate': 11, 'templates': 0, 'from_template': 11,
+    }
+    throttle_scopes = {'invite': 'invite'}
 
     def get_queryset(self):
         # Optimización para evitar Queries N+1
         return (
             Board.objects
+            .filter(deleted_at__isnull=True)
             .filter(models.Q(user=self.request.user) | models.Q(memberships__user=self.request.user))
             .distinct()
-            .prefetch_related('columns__cards')
+            # ?priority=&is_completed=&due_before=&... filter the nested cards (see Product.filters)
+            .prefetch_related(cards_prefetch(self.request.query_params))
         )
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    def update(self, request, *args, **kwargs):
+        partial = kwargs.pop('partial', False)
+        instance = self.get_object()
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        # DRF drops the prefetch cache here, which made the response load cards column by column
+        instance._prefetched_objects_cache = {}
+        prefetch_related_objects([instance], cards_prefetch(request.query_params))
+        return Response(serializer.data)
+
     def perform_destroy(self, instance):
         # Only owner can delete board
         if instance.user_id != self.request.user.id:
             raise NotFound('No tienes permiso para eliminar este tablero.')
-        return super().perform_destroy(instance)
+        # Raw chunked deletes + a single board.deleted event instead of the per-row collector
+        deletion.delete_board(instance)
 
     @action(detail=True, methods=['post'], url_path='leave')
     def leave(self, request, pk=None):
@@ -294,7 +395,7 @@ class BoardViewSet(viewsets.ModelViewSet):
 
         # Ensure request.user is the board owner
         try:
-            board = Board.objects.get(id=board_id, user=self.request.user)
+            board = Board.objects.get(id=board_id, user=self.request.user, deleted_at__isnull=True)
         except Board.DoesNotExist:
             raise NotFound('Board no encontrado o sin permiso para invitar.')
 
@@ -319,19 +420,150 @@ class BoardViewSet(viewsets.ModelViewSet):
         serializer = BoardMembershipSerializer(membership, context={'request': request})
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    def _editable_board(self, board_id):
+        return (
+            Board.objects
+            .filter(id=board_id, deleted_at__isnull=True)
+            .filter(
+                models.Q(user=self.request.user) |
+                models.Q(memberships__user=self.request.user, memberships__role__in=[BoardMembership.ROLE_OWNER, BoardMembership.ROLE_EDITOR])
+            )
+            .first()
+        )
+
+    def _import_source(self, request):
+        """Return (line iterable, format) for an import request.
+
+        Accepts a multipart upload in 'file' or a raw NDJSON/CSV request body; the
+        format comes from ?type=, the upload name or the content type.
+        """
+        fmt = request.query_params.get('type')
+        if request.content_type.startswith('multipart/'):
+            upload = request.FILES.get('file')
+            if upload is None:
+                return None, fmt
+            if not fmt and upload.name.lower().endswith('.csv'):
+                fmt = transfer.FORMAT_CSV
+            source = upload
+        else:
+            source = request.stream or []
+            if not fmt and request.content_type.startswith('text/csv'):
+                fmt = transfer.FORMAT_CSV
+        return source, fmt or transfer.FORMAT_NDJSON
+
+    def _run_import(self, request, board=None):
+        source, fmt = self._import_source(request)
+        if source is None:
+            return Response({'file': ['Este campo es requerido.']}, status=status.HTTP_400_BAD_REQUEST)
+        if fmt not in transfer.CONTENT_TYPES:
+            return Response({'type': ['Formato no soportado.']}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            board, counts = transfer.import_board(source, user=request.user, board=board, fmt=fmt)
+        except transfer.BoardImportError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'id': board.id, 'title': board.title, **counts}, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get'], url_path='export')
+    def export(self, request, pk=None):
+        """Stream the board (columns, then cards) as NDJSON, or CSV with ?type=csv."""
+        board = (
+            Board.objects
+            .filter(id=pk, deleted_at__isnull=True)
+            .filter(models.Q(user=request.user) | models.Q(memberships__user=request.user))
+            .first()
+        )
+        if not board:
+            raise NotFound('Board no encontrado.')
+        fmt = request.query_params.get('type', transfer.FORMAT_NDJSON)
+        if fmt not in transfer.CONTENT_TYPES:
+            return Response({'type': ['Formato no soportado.']}, status=status.HTTP_400_BAD_REQUEST)
+        response = StreamingHttpResponse(transfer.export_board(board, fmt), content_type=transfer.CONTENT_TYPES[fmt])
+        response['Content-Disposition'] = f'attachment; filename="board-{board.id}.{fmt}"'
+        return response
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_board(self, request):
+        """Create a new board from an NDJSON/CSV export stream."""
+        return self._run_import(request)
+
+    @action(detail=True, methods=['post'], url_path='import')
+    def import_into(self, request, pk=None):
+        """Append the columns and cards of an export stream to this board (owner/editor)."""
+        board = self._editable_board(pk)
+        if not board:
+            raise NotFound('Board no encontrado o sin permisos para modificar.')
+        return self._run_import(request, board=board)
+
+    @action(detail=True, methods=['get'], url_path='stats')
+    def stats(self, request, pk=None):
+        """Card counts per column, completion/overdue totals and priority distribution."""
+        visible = (
+            Board.objects
+            .filter(id=pk, deleted_at__isnull=True)
+            .filter(models.Q(user=request.user) | models.Q(memberships__user=request.user))
+            .exists()
+        )
+        if not visible:
+            raise NotFound('Board no encontrado.')
+        return Response(stats.board_stats(int(pk)))
+
+    @action(detail=True, methods=['post'], url_path='duplicate')
+    def duplicate(self, request, pk=None):
+        """Clone this board into a new board owned by request.user.
+
+        Accepts JSON: { "title": "optional", "include_cards": true }
+        """
+        board = (
+            Board.objects
+            .filter(id=pk, deleted_at__isnull=True)
+            .filter(models.Q(user=request.user) | models.Q(memberships__user=request.user))
+            .first()
+        )
+        if not board:
+            raise NotFound('Board no encontrado.')
+        title = request.data.get('title')
+        if title is not None and not isinstance(title, str):
+            return Response({'title': ['Debe ser un texto.']}, status=status.HTTP_400_BAD_REQUEST)
+        include_cards = request.data.get('include_cards', True)
+        if isinstance(include_cards, str):
+            include_cards = include_cards.lower() in ('1', 'true', 'yes', 'on')
+        new_board, counts = board_templates.duplicate_board(
+            board, request.user, title=title, include_cards=bool(include_cards),
+        )
+        return Response({'id': new_board.id, 'title': new_board.title, **counts}, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get'], url_path='templates')
+    def templates(self, request):
+        return Response(board_templates.list_templates())
+
+    @action(detail=False, methods=['post'], url_path='from-template')
+    def from_template(self, request):
+        """Create a board from a registered template. Accepts JSON: { "template": "kanban", "title": "optional" }"""
+        key = request.data.get('template')
+        if key not in board_templates.BOARD_TEMPLATES:
+            return Response({'template': ['Plantilla no encontrada.']}, status=status.HTTP_400_BAD_REQUEST)
+        title = request.data.get('title')
+        if title is not None and not isinstance(title, str):
+            return Response({'title': ['Debe ser un texto.']}, status=status.HTTP_400_BAD_REQUEST)
+        board = board_templates.create_from_template(key, request.user, title=title)
+        board = self.get_queryset().get(pk=board.pk)
+        serializer = self.get_serializer(board)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
 class ColumnViewSet(viewsets.ModelViewSet):
     serializer_class = ColumnSerializer
+    query_budgets = {'list': 2, 'retrieve': 2, 'create': 3, 'update': 4, 'partial_update': 4, 'destroy': 5}
 
     def get_queryset(self):
         board_id = self.kwargs.get('board_pk')
-        qs = Column.objects.filter(
+        qs = Column.objects.filter(board__deleted_at__isnull=True).filter(
             models.Q(board__user=self.request.user) |
             models.Q(board__memberships__user=self.request.user)
         ).distinct()
         if board_id:
             qs = qs.filter(board_id=board_id)
 
-        return qs.prefetch_related('cards')
+        return qs.prefetch_related(cards_prefetch(self.request.query_params, 'cards'))
 
     def perform_create(self, serializer):
         board_id = self.kwargs.get('board_pk')
@@ -340,7 +572,7 @@ class ColumnViewSet(viewsets.ModelViewSet):
         # Require owner or editor to create columns
         board = (
             Board.objects
-            .filter(id=board_id)
+            .filter(id=board_id, deleted_at__isnull=True)
             .filter(
                 models.Q(user=self.request.user) |
                 models.Q(memberships__user=self.request.user, memberships__role__in=[BoardMembership.ROLE_OWNER, BoardMembership.ROLE_EDITOR])
@@ -354,18 +586,20 @@ class ColumnViewSet(viewsets.ModelViewSet):
 
 class CardViewSet(viewsets.ModelViewSet):
     serializer_class = CardSerializer
+    query_budgets = {'list': 1, 'retrieve': 1, 'create': 2, 'update': 2, 'partial_update': 2, 'destroy': 2}
 
     def get_queryset(self):
         board_id = self.kwargs.get('board_pk')
         column_id = self.kwargs.get('column_pk')
         if not board_id or not column_id:
             return Card.objects.none()
-        return (
+        qs = (
             Card.objects
             .select_related('column', 'column__board')
             .filter(
                 column__id=column_id,
                 column__board__id=board_id,
+                column__board__deleted_at__isnull=True,
             )
             .filter(
                 models.Q(column__board__user=self.request.user) |
@@ -373,6 +607,9 @@ class CardViewSet(viewsets.ModelViewSet):
             )
             .distinct()
         )
+        if self.action == 'list':
+            qs = filter_cards(qs, self.request.query_params)
+        return qs
 
     def perform_create(self, serializer):
         board_id = self.kwargs.get('board_pk')
@@ -381,7 +618,8 @@ class CardViewSet(viewsets.ModelViewSet):
             raise NotFound('Ruta inválida para crear la tarjeta.')
         column = (
             Column.objects
-            .filter(id=column_id, board__id=board_id)
+            # Not into a board being purged: the purge's raw column delete would hit the new card
+            .filter(id=column_id, board__id=board_id, board__deleted_at__isnull=True)
             .filter(
                 models.Q(board__user=self.request.user) |
                 models.Q(board__memberships__user=self.request.user, board__memberships__role__in=[BoardMembership.ROLE_OWNER, BoardMembership.ROLE_EDITOR])
@@ -403,6 +641,7 @@ class CarouselImageViewSet(viewsets.ModelViewSet):
     queryset = CarouselImage.objects.all().order_by('position', '-created_at')
     serializer_class = CarouselImageSerializer
     parser_classes = [MultiPartParser, FormParser]
+    query_budgets = {'list': 1, 'retrieve': 1, 'create': 1, 'update': 2, 'partial_update': 2, 'destroy': 2}
 
     def get_permissions(self):
         # lectura pública, escritura autenticada
@@ -411,53 +650,22 @@ class CarouselImageViewSet(viewsets.ModelViewSet):
         return [IsAuthenticated()]
     
     def list(self, request, *args, **kwargs):
-        """Override list to provide a filesystem fallback.
+        """Serve the cached carousel manifest.
 
-        If there are CarouselImage objects in the database, behave normally.
-        Otherwise, read image files from MEDIA_ROOT / 'carousel' and return
-        a list of dicts matching the serializer fields (including `image_url`).
-        This does not write to the database.
+        If there are CarouselImage objects in the database, they are serialized as usual.
+        Otherwise, image files from MEDIA_ROOT / 'carousel' are listed as dicts matching
+        the serializer fields (including `image_url`); this does not write to the database.
+        Either way the JSON is built once and reused until the table or the directory
+        changes (see Product.carousel), with ETag/304 support and public cache headers.
         """
-        qs = self.filter_queryset(self.get_queryset())
-        if qs.exists():
-            serializer = self.get_serializer(qs, many=True, context={'request': request})
-            return Response(serializer.data)
-
-        # No DB images -> fallback to media/carousel directory
-        from django.conf import settings
-
-        media_root = settings.MEDIA_ROOT
-        # support pathlib.Path or str
-        media_carousel_path = Path(media_root) / 'carousel'
-        if not media_carousel_path.exists() or not media_carousel_path.is_dir():
-            return Response([], status=status.HTTP_200_OK)
-
-        # allowed image extensions
-        allowed_ext = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg'}
-        files = sorted([f for f in os.listdir(media_carousel_path) if Path(f).suffix.lower() in allowed_ext])
-        data = []
-        for idx, fname in enumerate(files):
-            # build absolute URL to the media file
-            # settings.MEDIA_URL may be a Path or str; ensure str
-            media_url = str(settings.MEDIA_URL)
-            # Ensure MEDIA_URL ends with '/'
-            if not media_url.endswith('/'):
-                media_url = media_url + '/'
-            image_url = request.build_absolute_uri(media_url + 'carousel/' + fname)
-            data.append({
-                'id': None,
-                'image': None,
-                'image_url': image_url,
-                'title': Path(fname).stem,
-                'alt_text': '',
-                'caption': '',
-                'link_url': '',
-                'is_active': True,
-                'position': idx,
-                'created_at': None,
-            })
-
-        return Response(data, status=status.HTTP_200_OK)
+        manifest = carousel.get_manifest(request)
+        if manifest.etag in request.headers.get('If-None-Match', ''):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = HttpResponse(manifest.body, content_type='application/json')
+        response['ETag'] = manifest.etag
+        response['Cache-Control'] = f'public, max-age={settings.CAROUSEL_CACHE_MAX_AGE}'
+        return response
 
 
 class ReleaseViewSet(viewsets.ModelViewSet):
@@ -465,3 +673,4 @@ class ReleaseViewSet(viewsets.ModelViewSet):
     queryset = Release.objects.all().order_by('-release_date')
     serializer_class = ReleaseSerializer
     permission_classes = [AllowAny]
+    query_budgets = {'list': 1, 'retrieve': 1, 'create': 1, 'update': 2, 'partial_update': 2, 'destroy': 2}
@@ -1,32 +1,25 @@
-"""Custom Token Auth middleware for Channels.
+"""Token auth middleware for Channels.
 
-Accepts Authorization header ("Token fake-token-{email}") or query string token
-("?token=fake-token-{email}") to identify a Product.User and attach it as scope['user'].
+Accepts the same signed tokens as the REST API (see Product.tokens), either in the
+Authorization header ("Token <token>" / "Bearer <token>") or in the query string
+("?token=<token>", for browsers), and attaches the Product.User as scope['user'].
 """
 from urllib.parse import parse_qs
 
 from channels.middleware import BaseMiddleware
 from channels.db import database_sync_to_async
 
-from .models import User
+from . import tokens
 
 
-def _get_email_from_token(token: str) -> str | None:
-    prefix = 'fake-token-'
-    if not token:
-        return None
-    token = token.strip()
-    if not token.startswith(prefix):
-        return None
-    email = token[len(prefix):]
-    return email or None
+KEYWORDS = ('Token', 'Bearer')
 
 
 @database_sync_to_async
-def _get_user_by_email(email: str):
+def _get_user(token: str):
     try:
-        return User.objects.get(email=email)
-    except User.DoesNotExist:
+        return tokens.user_from_token(token)
+    except tokens.InvalidToken:
         return None
 
 
@@ -40,8 +33,8 @@ class TokenAuthMiddleware(BaseMiddleware):
         if auth_header:
             try:
                 scheme, value = auth_header.decode().split(' ', 1)
-                if scheme == 'Token':
-                    token = value
+                if scheme in KEYWORDS:
+                    token = value.strip()
             except Exception:
                 token = None
 
@@ -53,10 +46,5 @@ class TokenAuthMiddleware(BaseMiddleware):
             except Exception:
                 token = None
 
-        user_obj = None
-        email = _get_email_from_token(token) if token else None
-        if email:
-            user_obj = await _get_user_by_email(email)
-
-        scope['user'] = user_obj
+        scope['user'] = await _get_user(token) if token else None
         return await super().__call__(scope, receive, send)